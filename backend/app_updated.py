@@ -1,34 +1,110 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, abort
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity, verify_jwt_in_request
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import base64
+import hashlib
+import json
 import os
+import threading
+import time
 import numpy as np
 
+APP_IMPORT_STARTED = time.perf_counter()
+
+from inference_queue import BatchingQueue
+from job_queue import JobQueue
+from model_registry import registry
+from prediction_cache import PredictionCache, image_key, delay_key
+from sqlite_profile import DEFAULT_PRAGMAS, engine_options, install_pragmas, is_file_database
+from serializers import (
+    FastJSONProvider, PROJECT_LIST_FIELDS, PROJECT_FIELDS, PROJECT_DETAIL_FIELDS, COMMENT_FIELDS,
+    UNRESOLVED_COMMENT_FIELDS, USER_LIST_FIELDS, rows_to_dicts, model_to_dict, stream_json,
+)
+
 # Initialize extensions
 db = SQLAlchemy()
 jwt = JWTManager()
 
 # Create app
 app = Flask(__name__)
+# orjson-backed when installed; also encodes datetimes as ISO 8601
+app.json = FastJSONProvider(app)
 
 # Configure the app
+DATABASE_URI = os.environ.get('DATABASE_URI', 'sqlite:///nirmaan.db')
+# SQLite performance profile (WAL, busy timeout, tuned pragmas); SQLITE_PERFORMANCE=0 restores the defaults
+SQLITE_PERFORMANCE = os.environ.get('SQLITE_PERFORMANCE', '1') == '1' and is_file_database(DATABASE_URI)
+
 app.config.from_mapping(
     SECRET_KEY=os.environ.get('SECRET_KEY', 'dev'),
-    SQLALCHEMY_DATABASE_URI=os.environ.get('DATABASE_URI', 'sqlite:///nirmaan.db'),
+    SQLALCHEMY_DATABASE_URI=DATABASE_URI,
     SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    SQLALCHEMY_ENGINE_OPTIONS=engine_options(
+        DATABASE_URI,
+        pool_size=int(os.environ.get('SQLITE_POOL_SIZE', 10)),
+        max_overflow=int(os.environ.get('SQLITE_MAX_OVERFLOW', 10)),
+        busy_timeout_ms=int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', DEFAULT_PRAGMAS['busy_timeout'])),
+    ) if SQLITE_PERFORMANCE else {},
+    SQLITE_PRAGMAS=dict(
+        DEFAULT_PRAGMAS,
+        journal_mode=os.environ.get('SQLITE_JOURNAL_MODE', DEFAULT_PRAGMAS['journal_mode']),
+        synchronous=os.environ.get('SQLITE_SYNCHRONOUS', DEFAULT_PRAGMAS['synchronous']),
+        busy_timeout=int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', DEFAULT_PRAGMAS['busy_timeout'])),
+        mmap_size=int(os.environ.get('SQLITE_MMAP_SIZE', DEFAULT_PRAGMAS['mmap_size'])),
+        cache_size=int(os.environ.get('SQLITE_CACHE_SIZE', DEFAULT_PRAGMAS['cache_size'])),
+    ),
     JWT_SECRET_KEY=os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key'),
+    # Micro-batching for /predict: larger batches raise throughput, longer waits add latency
+    INFERENCE_MAX_BATCH_SIZE=int(os.environ.get('INFERENCE_MAX_BATCH_SIZE', 8)),
+    INFERENCE_MAX_WAIT_MS=float(os.environ.get('INFERENCE_MAX_WAIT_MS', 5)),
+    # Prediction cache keyed by image content hash; set PREDICTION_CACHE_PATH to persist across restarts
+    PREDICTION_CACHE_SIZE=int(os.environ.get('PREDICTION_CACHE_SIZE', 1024)),
+    PREDICTION_CACHE_TTL=float(os.environ.get('PREDICTION_CACHE_TTL', 24 * 3600)),
+    PREDICTION_CACHE_PATH=os.environ.get('PREDICTION_CACHE_PATH'),
+    # Models load lazily on first use; set MODEL_WARMUP=1 to load them in a background thread at startup
+    MODEL_WARMUP=os.environ.get('MODEL_WARMUP', '0') == '1',
+    # Bulk prediction: projects per model call and threads used for image reading/decoding
+    BULK_PREDICT_BATCH_SIZE=int(os.environ.get('BULK_PREDICT_BATCH_SIZE', 32)),
+    BULK_PREDICT_WORKERS=int(os.environ.get('BULK_PREDICT_WORKERS', os.cpu_count() or 4)),
+    # Upper bound for ?limit= on the project list endpoints
+    PROJECT_PAGE_SIZE_MAX=int(os.environ.get('PROJECT_PAGE_SIZE_MAX', 500)),
+    # Map: individual markers from this zoom level up, grid clusters below it
+    MAP_POINTS_MIN_ZOOM=int(os.environ.get('MAP_POINTS_MIN_ZOOM', 12)),
+    MAP_MAX_POINTS=int(os.environ.get('MAP_MAX_POINTS', 5000)),
+    # Rendered GET responses kept per ETag; cleared whenever a tracked table is written
+    RESPONSE_CACHE_SIZE=int(os.environ.get('RESPONSE_CACHE_SIZE', 256)),
+    RESPONSE_CACHE_TTL=float(os.environ.get('RESPONSE_CACHE_TTL', 600)),
+    # Background prediction jobs; set JOB_STORE_PATH so every server process can answer status polls
+    JOB_WORKERS=int(os.environ.get('JOB_WORKERS', 2)),
+    JOB_MAX_RECORDS=int(os.environ.get('JOB_MAX_RECORDS', 1000)),
+    JOB_STORE_PATH=os.environ.get('JOB_STORE_PATH'),
+    # Background re-prediction of dirty projects: runs after PREDICTION_IDLE_SECONDS without
+    # requests, or regardless once a project has waited PREDICTION_FRESHNESS_SLA seconds
+    PREDICTION_SCHEDULER=os.environ.get('PREDICTION_SCHEDULER', '0') == '1',
+    PREDICTION_SCHEDULER_INTERVAL=float(os.environ.get('PREDICTION_SCHEDULER_INTERVAL', 30)),
+    PREDICTION_IDLE_SECONDS=float(os.environ.get('PREDICTION_IDLE_SECONDS', 10)),
+    PREDICTION_FRESHNESS_SLA=float(os.environ.get('PREDICTION_FRESHNESS_SLA', 3600)),
+    PREDICTION_SCHEDULER_BATCH_SIZE=int(os.environ.get('PREDICTION_SCHEDULER_BATCH_SIZE', 32)),
+    PREDICTION_SCHEDULER_PREDICTOR=os.environ.get('PREDICTION_SCHEDULER_PREDICTOR', 'image'),
 )
 
-# Enable CORS
-CORS(app)
+# Enable CORS (expose the pagination cursor and cache validators to the frontend)
+CORS(app, expose_headers=['X-Next-Cursor', 'ETag', 'Last-Modified'])
 
 # Initialize extensions with app
 db.init_app(app)
 jwt.init_app(app)
 
+# Pragmas go on every pooled connection, so they must be hooked before the first one opens
+if SQLITE_PERFORMANCE:
+    with app.app_context():
+        install_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+
 # Import models after db is initialized
 from models.user import create_user_model
 from models.project import create_project_models
@@ -37,12 +113,30 @@ from models.project import create_project_models
 User = create_user_model(db)
 Project, Comment = create_project_models(db)
 
-# Create database tables after models are defined
+# Bring the schema up to date; existing data is kept
+from migrations import run_migrations, schema_version
+
 with app.app_context():
-    # Drop all tables first to ensure clean recreation
-    db.drop_all()
-    # Create all tables with new schema
-    db.create_all()
+    run_migrations(db)
+
+# Conditional GET: every write bumps a per-table version that the read endpoints' ETags are built from
+from http_cache import TableVersions, conditional_get
+
+response_cache = PredictionCache(
+    'responses', max_entries=app.config['RESPONSE_CACHE_SIZE'], ttl_seconds=app.config['RESPONSE_CACHE_TTL']
+)
+table_versions = TableVersions(db, on_change=lambda tables: response_cache.clear())
+table_versions.install()
+
+# Dashboard aggregates, maintained incrementally in the project_stats table
+from project_stats import ProjectStats
+
+project_stats = ProjectStats(db, Project)
+project_stats.install()
+
+def cached_get(*tables, per_user=False):
+    # per_user for endpoints whose body depends on who is asking
+    return conditional_get(table_versions, response_cache, tables, identity=get_jwt_identity if per_user else None)
 
 # Add some sample users for testing
 with app.app_context():
@@ -151,28 +245,290 @@ with app.app_context():
         db.session.commit()
         print("Sample projects added to database")
 
-# Import AI model functions
-try:
-    from tensorflow.keras.models import load_model
-    from utils import preprocess_image
-    from progress_model import predict_stage, stage_to_percent
-    
-    # Load AI model
-    model = load_model("backend/delay_model.h5")
-    AI_MODEL_LOADED = True
-except Exception as e:
-    print(f"Warning: AI model could not be loaded: {e}")
-    AI_MODEL_LOADED = False
+# AI model functions; importing these does not load TensorFlow or the models
+from utils import load_image, preprocess_image
+from progress_model import (
+    STAGE_MODEL_PATH, YOLO_MODEL_PATH, extract_building_rois, classify_rois, classify_and_embed_rois, stage_to_percent,
+)
+from inference_backend import (
+    MODEL_BACKEND, backend_imports, load_model, model_file, model_fingerprint,
+)
+from tabular_delay import MODEL_PATH as TABULAR_MODEL_PATH, load_tabular_model, schedule_slack
+
+# 'hybrid' runs the original image + tabular CNN; 'slim' feeds the stage model's pooled
+# embedding to a small head (train_slim_delay_model.py). Both can be served side by side:
+# requests choose one with delay_model=..., DELAY_MODEL sets the default
+DELAY_MODEL = os.environ.get('DELAY_MODEL', 'hybrid')
+DELAY_MODELS = ('hybrid', 'slim')
+if DELAY_MODEL not in DELAY_MODELS:
+    raise ValueError(f"Unknown DELAY_MODEL '{DELAY_MODEL}'; expected one of {', '.join(DELAY_MODELS)}")
+
+DELAY_MODEL_PATH = "backend/delay_model.h5"
+DELAY_HEAD_MODEL_PATH = "backend/delay_head_model.h5"
+
+def _load_delay_model():
+    # Keras or a quantized TFLite export, depending on MODEL_BACKEND
+    return load_model(DELAY_MODEL_PATH, input_names=('image_input', 'tabular_input'))
+
+def _load_delay_head_model():
+    return load_model(DELAY_HEAD_MODEL_PATH, backend='keras')
+
+registry.register('delay', _load_delay_model, imports=backend_imports(), files=(model_file(DELAY_MODEL_PATH),))
+registry.register('delay_head', _load_delay_head_model, imports=('tensorflow',), files=(DELAY_HEAD_MODEL_PATH,))
+# Tabular-only delay predictor: needs no photo; trained beforehand with `python tabular_delay.py`
+registry.register('tabular_delay', load_tabular_model, imports=('sklearn',), files=(TABULAR_MODEL_PATH,))
+
+# Registry models behind each delay model; AI_MODELS are the default's, warmed up at startup
+DELAY_MODEL_REGISTRY_NAMES = {
+    'hybrid': ('yolo', 'stage', 'delay'),
+    'slim': ('yolo', 'stage_embedding', 'delay_head'),
+}
+AI_MODELS = DELAY_MODEL_REGISTRY_NAMES[DELAY_MODEL]
+
+def unknown_delay_model(delay_model):
+    return jsonify({'error': f"Unknown delay_model '{delay_model}'; expected one of {', '.join(DELAY_MODELS)}"}), 400
+
+def ai_models_loaded(delay_model=DELAY_MODEL):
+    """Load the prediction models on first use; False if any of them failed to load."""
+    try:
+        for name in DELAY_MODEL_REGISTRY_NAMES[delay_model]:
+            registry.get(name)
+    except RuntimeError:
+        return False
+    return True
+
+def get_user(user_id):
+    """Look up a user once per request; repeated lookups are served from flask.g."""
+    cache = g.setdefault('user_cache', {})
+    if user_id not in cache:
+        cache[user_id] = db.session.get(User, user_id)
+    return cache[user_id]
+
+def author_name(user):
+    return user.username if user else 'Unknown User'
+
+def comment_columns(*extra):
+    # Columns for COMMENT_FIELDS with ``extra`` before created_at; needs an outer join to the author
+    return (
+        Comment.id, Comment.content, Comment.author_id,
+        db.func.coalesce(User.username, 'Unknown User'), *extra, Comment.created_at,
+    )
 
 # Routes
 @app.route("/")
 def index():
     return jsonify({"message": "Welcome to Nirmaan AI API"})
 
+def image_model_files(delay_model):
+    """(YOLO, stage, delay) model files behind an image prediction, as loaded under MODEL_BACKEND.
+
+    The slim path takes its stage output from the Keras stage model that also
+    produces the embedding, whatever the backend.
+    """
+    if delay_model == 'hybrid':
+        return YOLO_MODEL_PATH, model_file(STAGE_MODEL_PATH), model_file(DELAY_MODEL_PATH)
+    return YOLO_MODEL_PATH, STAGE_MODEL_PATH, DELAY_HEAD_MODEL_PATH
+
+# The cache's disk tier outlives the process, so every cache is namespaced by a fingerprint
+# of the model files behind it: retraining or re-exporting a model, or switching
+# MODEL_BACKEND or MODEL_QUANTIZATION, starts an empty namespace instead of serving old results
+_prediction_caches = {}
+
+def prediction_cache(name):
+    # Delay models whose vision comes from the same stage file share one vision cache
+    if name not in _prediction_caches:
+        _prediction_caches[name] = PredictionCache(
+            name,
+            max_entries=app.config['PREDICTION_CACHE_SIZE'],
+            ttl_seconds=app.config['PREDICTION_CACHE_TTL'],
+            persist_path=app.config['PREDICTION_CACHE_PATH'],
+        )
+    return _prediction_caches[name]
+
+# Vision results (stage, confidence, ROI crop) depend only on the photo, so they are
+# cached separately from the delay probability, which also depends on the tabular inputs
+vision_caches = {
+    delay_model: prediction_cache(f"vision_{model_fingerprint(*image_model_files(delay_model)[:2])}")
+    for delay_model in DELAY_MODELS
+}
+# Probabilities from the two delay models differ, so each gets its own cache
+delay_caches = {
+    'hybrid': prediction_cache(f"delay_{model_fingerprint(*image_model_files('hybrid'))}"),
+    'slim': prediction_cache(f"delay_slim_{model_fingerprint(*image_model_files('slim'))}"),
+}
+
+# Pooled stage-model embedding per photo, the image input of the slim delay head
+embedding_cache = prediction_cache(f"embedding_{model_fingerprint(*image_model_files('slim')[:2])}")
+
+def compute_vision(image_hashes, images, delay_model=DELAY_MODEL):
+    """Run YOLO and the stage classifier on a batch and cache (stage, conf, roi) per photo.
+
+    With the slim delay model the same classifier pass also yields each
+    photo's embedding, which is cached for the delay head.
+    """
+    rois = extract_building_rois(images, image_hashes)
+    if delay_model == 'slim':
+        stages, embeddings = classify_and_embed_rois(rois)
+        for image_hash, embedding in zip(image_hashes, embeddings):
+            embedding_cache.set(image_hash, embedding)
+    else:
+        stages = classify_rois(rois)
+    results = []
+    for image_hash, roi, (stage, conf) in zip(image_hashes, rois, stages):
+        vision = (int(stage), float(conf), roi)
+        vision_caches[delay_model].set(image_hash, vision)
+        results.append(vision)
+    return results
+
+def delay_embeddings(image_hashes, get_image):
+    """Stage-model embeddings for a batch, re-encoding only photos evicted from the cache."""
+    found = {image_hash: embedding_cache.get(image_hash) for image_hash in dict.fromkeys(image_hashes)}
+    missing = [image_hash for image_hash, embedding in found.items() if embedding is None]
+    if missing:
+        rois = extract_building_rois([get_image(image_hash) for image_hash in missing], missing)
+        _, embeddings = classify_and_embed_rois(rois)
+        for image_hash, embedding in zip(missing, embeddings):
+            embedding_cache.set(image_hash, embedding)
+            found[image_hash] = embedding
+    return np.stack([found[image_hash] for image_hash in image_hashes])
+
+def compute_delay(keys, image_hashes, tabular, get_image, delay_model=DELAY_MODEL):
+    """Run a delay model on a batch and cache the probability per input.
+
+    ``get_image(image_hash)`` returns the decoded photo; the slim model only
+    asks for photos whose embedding is no longer cached.
+    """
+    tabular = np.array(tabular, dtype=np.float32)
+    if delay_model == 'slim':
+        inputs = [delay_embeddings(image_hashes, get_image), tabular]
+        preds = np.asarray(registry.get('delay_head').predict_on_batch(inputs))
+    else:
+        imgs = np.stack([preprocess_image(get_image(image_hash)) for image_hash in image_hashes])
+        preds = np.asarray(registry.get('delay').predict_on_batch([imgs, tabular]))
+    results = []
+    for key, pred in zip(keys, preds):
+        delay_caches[delay_model].set(key, float(pred[0]))
+        results.append(float(pred[0]))
+    return results
+
+def format_prediction(stage, conf, progress, prob):
+    return {
+        "predicted_stage": int(stage),
+        "confidence": round(float(conf), 2),
+        "estimated_progress_percent": progress,
+        "delayed": int(prob > 0.5),
+        "probability": round(float(prob), 2)
+    }
+
+def run_prediction_batch(items):
+    """Predict a coalesced batch, returning an exception for each item that fails.
+
+    Requests batched together are unrelated, so one corrupt photo or failing
+    input must not fail the others: when the batch call raises, the items are
+    retried one by one and only the failing ones get their exception.
+    """
+    try:
+        return predict_batch(items)
+    except Exception as e:
+        if len(items) == 1:
+            return [e]
+        return [run_prediction_batch([item])[0] for item in items]
+
+def predict_batch(items):
+    """Run the /predict pipeline on (image_hash, image, timeline, budget, vision, delay_model) items.
+
+    Items are grouped by the delay model they asked for, one pass per model.
+    """
+    results = [None] * len(items)
+    by_delay_model = {}
+    for i, item in enumerate(items):
+        by_delay_model.setdefault(item[5], []).append(i)
+    for delay_model, indexes in by_delay_model.items():
+        for i, result in zip(indexes, _predict_batch([items[i][:5] for i in indexes], delay_model)):
+            results[i] = result
+    return results
+
+def _predict_batch(items, delay_model):
+    """Run the full /predict pipeline on a batch of (image_hash, image, timeline, budget, vision) items.
+
+    Images arrive already decoded, so YOLO, the stage classifier and the delay
+    model all work from the same in-memory pixels. ``vision`` is the cached
+    vision result when the request thread already found one; repeated photos
+    inside a batch are only run through YOLO and the classifier once.
+    """
+    vision = {image_hash: cached for image_hash, _, _, _, cached in items if cached is not None}
+    missing = {}
+    for image_hash, image, _, _, _ in items:
+        if image_hash not in vision:
+            missing.setdefault(image_hash, image)
+    if missing:
+        vision.update(zip(missing, compute_vision(list(missing), list(missing.values()), delay_model)))
+
+    # Look up delay probabilities now that every stage is known
+    probs = {}
+    pending = {}
+    for image_hash, _, timeline, budget, cached in items:
+        stage = vision[image_hash][0]
+        key = delay_key(image_hash, timeline, stage_to_percent[stage], budget)
+        # The request thread already missed on this key when it had the vision result
+        prob = delay_caches[delay_model].get(key) if cached is None else None
+        if prob is not None:
+            probs[key] = prob
+        elif key not in pending:
+            pending[key] = (image_hash, [timeline, stage_to_percent[stage], budget])
+    if pending:
+        images = {image_hash: image for image_hash, image, _, _, _ in items}
+        image_hashes, tabular = zip(*pending.values())
+        probs.update(zip(pending, compute_delay(list(pending), image_hashes, tabular, images.get, delay_model)))
+
+    results = []
+    for image_hash, _, timeline, budget, _ in items:
+        stage, conf, _ = vision[image_hash]
+        progress = stage_to_percent[stage]
+        results.append(format_prediction(
+            stage, conf, progress, probs[delay_key(image_hash, timeline, progress, budget)]
+        ))
+    return results
+
+inference_queue = BatchingQueue(
+    run_prediction_batch,
+    max_batch_size=app.config['INFERENCE_MAX_BATCH_SIZE'],
+    max_wait_ms=app.config['INFERENCE_MAX_WAIT_MS'],
+    name='predict',
+)
+
+# Prediction jobs run here when the client asks for an async answer (?async=1 or Prefer: respond-async)
+job_queue = JobQueue(
+    'predict',
+    workers=app.config['JOB_WORKERS'],
+    max_jobs=app.config['JOB_MAX_RECORDS'],
+    persist_path=app.config['JOB_STORE_PATH'],
+)
+
+def wants_async():
+    return request.args.get('async') == '1' or 'respond-async' in request.headers.get('Prefer', '')
+
+def in_app_context(fn):
+    # Job callables run on worker threads and need their own app context for the database
+    def run(*args, **kwargs):
+        with app.app_context():
+            return fn(*args, **kwargs)
+    return run
+
+def job_accepted(job_id):
+    response = jsonify({'job_id': job_id, 'status': 'queued', 'status_url': f'/jobs/{job_id}'})
+    response.status_code = 202
+    response.headers['Location'] = f'/jobs/{job_id}'
+    response.headers['Preference-Applied'] = 'respond-async'
+    return response
+
 # AI Prediction route
 @app.route("/predict", methods=["POST"])
 def predict():
-    if not AI_MODEL_LOADED:
+    delay_model = request.values.get('delay_model', DELAY_MODEL)
+    if delay_model not in DELAY_MODELS:
+        return unknown_delay_model(delay_model)
+    if not ai_models_loaded(delay_model):
         return jsonify({"error": "AI model not loaded"}), 500
         
     try:
@@ -180,30 +536,76 @@ def predict():
         budget = float(request.form["budget_utilized_percent"])
         file = request.files["image"]
 
-        # Save and use the uploaded image
-        filepath = "temp.jpg"
-        file.save(filepath)
+        data = file.read()
+        image_hash = image_key(data)
 
-        # Predict stage and progress % from image
-        stage, conf = predict_stage(filepath)
-        progress = stage_to_percent[stage]
+        # Re-uploaded photo with the same inputs: answer straight from the cache
+        vision = vision_caches[delay_model].get(image_hash)
+        if vision is not None:
+            stage, conf, _ = vision
+            progress = stage_to_percent[stage]
+            prob = delay_caches[delay_model].get(delay_key(image_hash, timeline, progress, budget))
+            if prob is not None:
+                return jsonify(format_prediction(stage, conf, progress, prob))
 
-        # Prepare inputs for hybrid model
-        img = preprocess_image(filepath).reshape(1, 224, 224, 3)
-        tabular = np.array([[timeline, progress, budget]])
+        if wants_async():
+            # Job results are only readable by their owner, so background predictions need a login
+            verify_jwt_in_request(optional=True)
+            owner = get_jwt_identity()
+            if owner is None:
+                return jsonify({"error": "Log in to run predictions in the background"}), 401
+            # Decoding and inference both happen on a job worker; poll /jobs/<id> for the result
+            return job_accepted(job_queue.submit(
+                'predict',
+                lambda: inference_queue((image_hash, load_image(data), timeline, budget, vision, delay_model)),
+                owner=int(owner),
+            ))
 
-        pred = model.predict([img, tabular])[0][0]
+        # Decode the upload once, in memory; every model reuses this buffer
+        image = load_image(data)
 
-        return jsonify({
-            "predicted_stage": int(stage),
-            "confidence": round(float(conf), 2),
-            "estimated_progress_percent": progress,
-            "delayed": int(pred > 0.5),
-            "probability": round(float(pred), 2)
-        })
+        # Wait for our slot in the next coalesced batch
+        return jsonify(inference_queue((image_hash, image, timeline, budget, vision, delay_model)))
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@app.route("/health", methods=["GET"])
+def health():
+    """Readiness of the lazily loaded models plus cold-start timings"""
+    return jsonify({
+        'status': 'ok',
+        'ready': registry.is_ready(*AI_MODELS),
+        'schema_version': schema_version(db),
+        'startup_seconds': STARTUP_SECONDS,
+        'model_backend': MODEL_BACKEND,
+        'delay_model': DELAY_MODEL,
+        'delay_models': {name: registry.is_ready(*models) for name, models in DELAY_MODEL_REGISTRY_NAMES.items()},
+        'models': registry.status(),
+    })
+
+@app.route("/predict/metrics", methods=["GET"])
+def predict_metrics():
+    """Batcher queue statistics and prediction cache hit/miss counters"""
+    return jsonify({
+        'batcher': inference_queue.metrics(),
+        'vision_caches': {delay_model: cache.stats() for delay_model, cache in vision_caches.items()},
+        'delay_caches': {delay_model: cache.stats() for delay_model, cache in delay_caches.items()},
+        'embedding_cache': embedding_cache.stats(),
+        'jobs': job_queue.metrics(),
+    })
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    """Status, timings and (once finished) result or error of a background prediction job - owner or admin only"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+    current_user = get_user(int(get_jwt_identity()))
+    if not current_user or (job['owner'] != current_user.id and current_user.role != 'admin'):
+        return jsonify({'message': 'You can only view your own jobs'}), 403
+    return jsonify(job)
+
 # Auth routes
 @app.route('/auth/register', methods=['POST'])
 def register():
@@ -288,7 +690,7 @@ def profile():
     user_id = int(get_jwt_identity())
     
     # Find user by ID
-    user = User.query.get(user_id)
+    user = get_user(user_id)
     
     if not user:
         return jsonify({'message': 'User not found'}), 404
@@ -300,50 +702,123 @@ def profile():
         'role': user.role
     }), 200
 
+# Project listing: keyset pagination, field projection and filters shared by the list endpoints
+PROJECT_ORDERINGS = ('id', 'created_at')
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+
+def _parse_date_arg(name):
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
+def project_list_response(*criteria, default_fields=PROJECT_LIST_FIELDS, extra=None):
+    """Serialize a filtered, paginated list of projects selecting only the requested columns.
+
+    Query parameters:
+      fields=a,b,c       columns to return (default: the usual list fields)
+      status=a,b         only these statuses
+      manager_id=N       only projects managed by N
+      created_after / created_before / start_after / end_before   ISO dates
+      order=id|created_at, limit=N, cursor=...   keyset pagination
+
+    The body stays a JSON array; when more rows remain the opaque cursor for the
+    next page is returned in the X-Next-Cursor header. Without ``limit`` or
+    ``cursor`` every matching project is returned, as before.
+    """
+    args = request.args
+    fields = [f for f in args.get('fields', '').split(',') if f] or list(default_fields)
+    unknown = [f for f in fields if f not in PROJECT_FIELDS]
+    if unknown:
+        return jsonify({'message': f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    order = args.get('order', 'id')
+    if order not in PROJECT_ORDERINGS:
+        return jsonify({'message': f"order must be one of {', '.join(PROJECT_ORDERINGS)}"}), 400
+    order_column = getattr(Project, order)
+
+    filters = list(criteria)
+    try:
+        if args.get('status'):
+            filters.append(Project.status.in_(args['status'].split(',')))
+        if args.get('manager_id'):
+            filters.append(Project.manager_id == int(args['manager_id']))
+        created_after = _parse_date_arg('created_after')
+        if created_after:
+            filters.append(Project.created_at >= created_after)
+        created_before = _parse_date_arg('created_before')
+        if created_before:
+            filters.append(Project.created_at < created_before)
+        start_after = _parse_date_arg('start_after')
+        if start_after:
+            filters.append(Project.start_date >= start_after)
+        end_before = _parse_date_arg('end_before')
+        if end_before:
+            filters.append(Project.end_date < end_before)
+
+        paginate = 'limit' in args or 'cursor' in args
+        limit = min(int(args.get('limit', app.config['PROJECT_PAGE_SIZE_MAX'])), app.config['PROJECT_PAGE_SIZE_MAX'])
+        if limit < 1:
+            raise ValueError('limit must be positive')
+        if args.get('cursor'):
+            last_value, last_id = decode_cursor(args['cursor'])
+            if order == 'id':
+                filters.append(Project.id > last_id)
+            else:
+                last_value = datetime.fromisoformat(last_value)
+                filters.append(db.or_(
+                    order_column > last_value,
+                    db.and_(order_column == last_value, Project.id > last_id),
+                ))
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'message': f'Invalid query parameter: {e}'}), 400
+
+    # Select plain columns, not ORM objects; the requested fields come first so rows
+    # zip straight into dicts, and the ordering columns are always fetched for the cursor
+    selected = list(dict.fromkeys(fields + ['id', order]))
+    stmt = db.select(*[getattr(Project, f) for f in selected]).where(*filters).order_by(order_column, Project.id)
+
+    # ?format=ndjson (or Accept: application/x-ndjson) and ?stream=1 stream the rows
+    # in chunks straight from the cursor instead of building the whole list first
+    ndjson = args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson'
+    if not paginate and (ndjson or args.get('stream') == '1'):
+        rows = db.session.execute(stmt.execution_options(yield_per=1000))
+        return stream_json((dict(zip(fields, row), **(extra or {})) for row in rows), ndjson=ndjson)
+
+    if paginate:
+        stmt = stmt.limit(limit + 1)
+    rows = db.session.execute(stmt).all()
+
+    next_cursor = None
+    if paginate and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        last_value = last[order]
+        next_cursor = encode_cursor([last_value.isoformat() if isinstance(last_value, datetime) else last_value, last['id']])
+
+    response = jsonify(rows_to_dicts(fields, rows, extra))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
 # Project routes
 @app.route('/projects', methods=['GET'])
+@cached_get('projects')
 def get_projects():
-    projects = Project.query.all()
-    return jsonify([
-        {
-            'id': project.id,
-            'name': project.name,
-            'description': project.description,
-            'location': project.location,
-            'latitude': project.latitude,
-            'longitude': project.longitude,
-            'status': project.status,
-            'progress': project.progress,
-            'start_date': project.start_date.isoformat() if project.start_date else None,
-            'end_date': project.end_date.isoformat() if project.end_date else None,
-            'budget': project.budget,
-            'manager_id': project.manager_id,
-            'created_at': project.created_at.isoformat()
-        } for project in projects
-    ])
+    return project_list_response()
 
 @app.route('/projects/<int:project_id>', methods=['GET'])
+@cached_get('projects')
 def get_project(project_id):
-    project = Project.query.get_or_404(project_id)
-    return jsonify({
-        'id': project.id,
-        'name': project.name,
-        'description': project.description,
-        'location': project.location,
-        'latitude': project.latitude,
-        'longitude': project.longitude,
-        'status': project.status,
-        'progress': project.progress,
-        'start_date': project.start_date.isoformat() if project.start_date else None,
-        'end_date': project.end_date.isoformat() if project.end_date else None,
-        'budget': project.budget,
-        'manager_id': project.manager_id,
-        'created_at': project.created_at.isoformat(),
-        'predicted_stage': project.predicted_stage,
-        'confidence': project.confidence,
-        'delay_probability': project.delay_probability,
-        'last_prediction_date': project.last_prediction_date.isoformat() if project.last_prediction_date else None
-    })
+    row = db.session.execute(
+        db.select(*[getattr(Project, f) for f in PROJECT_DETAIL_FIELDS]).where(Project.id == project_id)
+    ).first()
+    if row is None:
+        abort(404)
+    return jsonify(dict(zip(PROJECT_DETAIL_FIELDS, row)))
 
 @app.route('/projects', methods=['POST'])
 @jwt_required()
@@ -376,25 +851,18 @@ def create_project():
     }), 201
 
 @app.route('/projects/<int:project_id>/comments', methods=['GET'])
+@cached_get('projects', 'comments', 'users')
 def get_project_comments(project_id):
-    project = Project.query.get_or_404(project_id)
-    comments = Comment.query.filter_by(project_id=project_id).order_by(Comment.created_at).all()
-    
-    result = []
-    for comment in comments:
-        # Get the author information
-        author = User.query.get(comment.author_id)
-        author_name = author.username if author else 'Unknown User'
-        
-        result.append({
-            'id': comment.id,
-            'content': comment.content,
-            'author_id': comment.author_id,
-            'author_name': author_name,
-            'created_at': comment.created_at.isoformat()
-        })
-    
-    return jsonify(result)
+    if db.session.get(Project, project_id) is None:
+        abort(404)
+    # Authors are joined into the same query, so the thread length does not add round trips
+    rows = db.session.execute(
+        db.select(*comment_columns())
+        .outerjoin(Comment.author)
+        .where(Comment.project_id == project_id)
+        .order_by(Comment.created_at)
+    ).all()
+    return jsonify(rows_to_dicts(COMMENT_FIELDS, rows))
 
 @app.route('/projects/<int:project_id>/comments', methods=['POST'])
 @jwt_required()
@@ -413,68 +881,36 @@ def add_project_comment(project_id):
     db.session.add(new_comment)
     db.session.commit()
     
-    # Get the author information
-    author = User.query.get(new_comment.author_id)
-    author_name = author.username if author else 'Unknown User'
-    
-    return jsonify({
-        'id': new_comment.id,
-        'content': new_comment.content,
-        'author_id': new_comment.author_id,
-        'author_name': author_name,
-        'created_at': new_comment.created_at.isoformat()
-    }), 201
+    comment = model_to_dict(new_comment, COMMENT_FIELDS[:3] + ['created_at'])
+    comment['author_name'] = author_name(get_user(new_comment.author_id))
+    return jsonify(comment), 201
 
 # Official Dashboard endpoints
 @app.route('/projects/official', methods=['GET'])
 @jwt_required()
+@cached_get('projects', per_user=True)
 def get_official_projects():
     """Get projects assigned to the current official"""
     official_id = int(get_jwt_identity())
-    projects = Project.query.filter_by(manager_id=official_id).all()
-    
-    return jsonify([
-        {
-            'id': project.id,
-            'name': project.name,
-            'description': project.description,
-            'location': project.location,
-            'latitude': project.latitude,
-            'longitude': project.longitude,
-            'status': project.status,
-            'progress': project.progress,
-            'start_date': project.start_date.isoformat() if project.start_date else None,
-            'end_date': project.end_date.isoformat() if project.end_date else None,
-            'budget': project.budget,
-            'manager_id': project.manager_id,
-            'created_at': project.created_at.isoformat()
-        } for project in projects
-    ])
+    return project_list_response(Project.manager_id == official_id)
 
 @app.route('/projects/comments/unresolved', methods=['GET'])
 @jwt_required()
+@cached_get('projects', 'comments', 'users', per_user=True)
 def get_unresolved_comments():
     """Get unresolved comments for projects managed by the current official"""
     official_id = int(get_jwt_identity())
     
-    # Get projects managed by this official
-    official_projects = Project.query.filter_by(manager_id=official_id).all()
-    project_ids = [p.id for p in official_projects]
-    
-    # Get comments for these projects (assuming all comments are unresolved for now)
-    comments = Comment.query.filter(Comment.project_id.in_(project_ids)).order_by(Comment.created_at.desc()).all()
-    
-    return jsonify([
-        {
-            'id': comment.id,
-            'content': comment.content,
-            'author_id': comment.author_id,
-            'author_name': comment.author.username,
-            'project_id': comment.project_id,
-            'project_name': comment.project.name,
-            'created_at': comment.created_at.isoformat()
-        } for comment in comments
-    ])
+    # Get comments on projects managed by this official (assuming all comments are unresolved for now),
+    # with the project name and author joined into the same query
+    rows = db.session.execute(
+        db.select(*comment_columns(Comment.project_id, Project.name))
+        .join(Comment.project)
+        .outerjoin(Comment.author)
+        .where(Project.manager_id == official_id)
+        .order_by(Comment.created_at.desc())
+    ).all()
+    return jsonify(rows_to_dicts(UNRESOLVED_COMMENT_FIELDS, rows))
 
 @app.route('/projects/<int:project_id>/update', methods=['PUT'])
 @jwt_required()
@@ -484,7 +920,7 @@ def update_project(project_id):
     current_user_id = int(get_jwt_identity())
     
     # Get current user to check role
-    current_user = User.query.get(current_user_id)
+    current_user = get_user(current_user_id)
     
     # Check if user is the project manager or admin
     if project.manager_id != current_user_id and current_user.role != 'admin':
@@ -531,130 +967,612 @@ def update_project(project_id):
 
 # Additional endpoints for frontend compatibility
 @app.route('/projects/public', methods=['GET'])
+@cached_get('projects')
 def get_public_projects():
     """Get public projects for map display"""
-    projects = Project.query.all()
-    return jsonify([
-        {
-            'id': project.id,
-            'name': project.name,
-            'description': project.description,
-            'location': project.location,
-            'latitude': project.latitude,
-            'longitude': project.longitude,
-            'status': project.status,
-            'progress': project.progress,
-            'start_date': project.start_date.isoformat() if project.start_date else None,
-            'end_date': project.end_date.isoformat() if project.end_date else None,
-            'budget': project.budget,
-            'manager_id': project.manager_id,
-            'created_at': project.created_at.isoformat()
-        } for project in projects
-    ])
+    return project_list_response()
+
+@app.route('/projects/map', methods=['GET'])
+@cached_get('projects')
+def get_project_map():
+    """Compact map data for a bounding box: grid clusters at low zoom, points at high zoom
+
+    Query parameters: bbox=min_lng,min_lat,max_lng,max_lat and zoom (0-20).
+    Rows are returned as arrays described by ``fields`` to keep payloads small.
+    Points stop at MAP_MAX_POINTS; ``truncated`` says whether the viewport holds
+    more and ``total`` how many it holds.
+    """
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in request.args.get('bbox', '').split(','))
+        zoom = int(request.args.get('zoom', 0))
+        if not (min_lng <= max_lng and min_lat <= max_lat and 0 <= zoom <= 20):
+            raise ValueError
+    except ValueError:
+        return jsonify({'message': 'bbox must be min_lng,min_lat,max_lng,max_lat and zoom 0-20'}), 400
+    
+    # Served by the (latitude, longitude) index
+    in_bbox = (
+        Project.latitude.between(min_lat, max_lat),
+        Project.longitude.between(min_lng, max_lng),
+    )
+    
+    if zoom >= app.config['MAP_POINTS_MIN_ZOOM']:
+        max_points = app.config['MAP_MAX_POINTS']
+        # One row past the cap tells whether the viewport holds more points than are returned
+        rows = db.session.execute(
+            db.select(Project.id, Project.latitude, Project.longitude, Project.status, Project.progress)
+            .where(*in_bbox)
+            .order_by(Project.id)
+            .limit(max_points + 1)
+        ).all()
+        truncated = len(rows) > max_points
+        total = db.session.scalar(db.select(db.func.count(Project.id)).where(*in_bbox)) if truncated else len(rows)
+        return jsonify({
+            'type': 'points',
+            'fields': ['id', 'lat', 'lng', 'status', 'progress'],
+            'data': [list(row) for row in rows[:max_points]],
+            'truncated': truncated,
+            'total': total,
+        })
+    
+    # Four grid cells per map tile width at this zoom; latitude and longitude are
+    # shifted to be non-negative so integer truncation acts as floor
+    cell = 360.0 / (2 ** zoom) / 4
+    cell_x = db.cast((Project.longitude + 180) / cell, db.Integer)
+    cell_y = db.cast((Project.latitude + 90) / cell, db.Integer)
+    delayed = db.case(
+        (db.or_(Project.status == 'delayed', Project.delay_probability > 0.5), 1.0), else_=0.0
+    )
+    rows = db.session.execute(
+        db.select(
+            db.func.avg(Project.latitude),
+            db.func.avg(Project.longitude),
+            db.func.count(Project.id),
+            db.func.avg(Project.progress),
+            db.func.avg(delayed),
+        )
+        .where(*in_bbox)
+        .group_by(cell_x, cell_y)
+    ).all()
+    return jsonify({
+        'type': 'clusters',
+        'cell_degrees': cell,
+        'fields': ['lat', 'lng', 'count', 'avg_progress', 'delayed_share'],
+        'data': [
+            [round(lat, 5), round(lng, 5), count,
+             round(progress, 1) if progress is not None else None, round(share, 3)]
+            for lat, lng, count, progress, share in rows
+        ],
+    })
+
+@app.route('/stats', methods=['GET'])
+@cached_get('projects')
+def get_stats():
+    """Dashboard aggregates: counts, status breakdown, average progress, budget totals and delay risk
+
+    Pass manager_id=N for one official's projects; otherwise a per-manager breakdown is included.
+    """
+    try:
+        manager_id = int(request.args['manager_id']) if request.args.get('manager_id') else None
+    except ValueError:
+        return jsonify({'message': 'manager_id must be an integer'}), 400
+    return jsonify(project_stats.summary(manager_id))
 
 @app.route('/projects/all', methods=['GET'])
 @jwt_required()
+@cached_get('projects')
 def get_all_projects():
     """Get all projects for admin dashboard"""
-    projects = Project.query.all()
-    return jsonify([
-        {
-            'id': project.id,
-            'name': project.name,
-            'description': project.description,
-            'location': project.location,
-            'latitude': project.latitude,
-            'longitude': project.longitude,
-            'status': project.status,
-            'progress': project.progress,
-            'start_date': project.start_date.isoformat() if project.start_date else None,
-            'end_date': project.end_date.isoformat() if project.end_date else None,
-            'budget': project.budget,
-            'manager_id': project.manager_id,
-            'official_name': 'Unassigned',  # Will be fixed when relationships are properly set up
-            'created_at': project.created_at.isoformat()
-        } for project in projects
-    ])
+    # official_name will be fixed when relationships are properly set up
+    return project_list_response(extra={'official_name': 'Unassigned'})
 
 @app.route('/auth/users', methods=['GET'])
 @jwt_required()
+@cached_get('users')
 def get_all_users():
     """Get all users for admin dashboard"""
-    users = User.query.all()
-    return jsonify([
+    rows = db.session.execute(db.select(*[getattr(User, f) for f in USER_LIST_FIELDS])).all()
+    return jsonify(rows_to_dicts(USER_LIST_FIELDS, rows))
+
+# Project prediction pipeline shared by the single and bulk prediction endpoints
+SAMPLE_IMAGE_PATH = "data/images/s1.jpg"
+
+# Progress of the most recent bulk prediction run, polled via /projects/predict/bulk/status
+bulk_prediction_status = {'running': False, 'done': 0, 'total': 0, 'started_at': None, 'finished_at': None}
+# Held for the whole of a bulk run, so two requests cannot both pass the 'running' check
+bulk_prediction_lock = threading.Lock()
+
+class BulkPredictionRunning(RuntimeError):
+    pass
+
+@contextmanager
+def exclusive_bulk_prediction(wait=False):
+    """Hold the bulk prediction lock, or raise BulkPredictionRunning if it is taken and ``wait`` is False."""
+    if not bulk_prediction_lock.acquire(blocking=wait):
+        raise BulkPredictionRunning('A bulk prediction is already running')
+    try:
+        yield
+    finally:
+        bulk_prediction_lock.release()
+
+def project_image_path(project):
+    # For now, we'll use a placeholder image for every project
+    # In a real scenario, you'd have project images stored
+    return SAMPLE_IMAGE_PATH
+
+def project_tabular_inputs(project, now):
+    """Return (timeline_days, budget_utilized_percent) for a project."""
+    # Calculate timeline days
+    timeline_days = 0
+    if project.start_date:
+        timeline_days = (now - project.start_date).days
+    
+    # Calculate budget utilization (simplified - you might want to add actual budget tracking)
+    budget_utilized_percent = min(project.progress, 100) if project.progress else 0
+    return timeline_days, budget_utilized_percent
+
+def project_delay_features(projects, now):
+    """Tabular delay model features (tabular_delay.FEATURES), one row per project."""
+    rows = []
+    for project in projects:
+        timeline_days, budget_utilized_percent = project_tabular_inputs(project, now)
+        progress = project.progress or 0
+        rows.append((timeline_days, progress, budget_utilized_percent,
+                     schedule_slack(progress, project.start_date, project.end_date, now)))
+    return np.array(rows, dtype=np.float32).reshape(len(rows), 4)
+
+def tabular_delay_probabilities(projects, now):
+    """Delay probabilities from the tabular model, all projects in one vectorized call."""
+    try:
+        return [float(p) for p in registry.get('tabular_delay').predict(project_delay_features(projects, now))]
+    except Exception as e:
+        app.logger.warning(f"Tabular delay prediction failed for {len(projects)} projects: {e}")
+        # Last resort when the tabular model itself is unavailable
+        return [0.3 if project.status == 'delayed' else 0.1 for project in projects]
+
+def fallback_stage(project):
+    """(stage, confidence, progress) estimated from the recorded progress when no photo was classified."""
+    stage = min(5, max(0, int((project.progress or 0) / 20)))  # Convert progress to stage
+    conf = 0.8  # Mock confidence
+    return stage, conf, project.progress
+
+def read_image_file(path):
+    """Return (content hash, raw bytes) for an image file, or None if it cannot be read."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        app.logger.warning(f"Could not read project image {path}: {e}")
+        return None
+    return image_key(data), data
+
+def _predict_project_batch(projects, files, get_image, now, delay_model=DELAY_MODEL):
+    """Predict stage and delay for one batch of projects with one call per model."""
+    rows = []
+    for project in projects:
+        timeline_days, budget_utilized_percent = project_tabular_inputs(project, now)
+        file = files.get(project_image_path(project))
+        rows.append((project, file[0] if file else None, timeline_days, budget_utilized_percent))
+
+    # Vision: YOLO and the stage classifier run once over the distinct uncached photos
+    vision = {}
+    missing = []
+    for image_hash in dict.fromkeys(image_hash for _, image_hash, _, _ in rows if image_hash):
+        cached = vision_caches[delay_model].get(image_hash)
+        if cached is None:
+            missing.append(image_hash)
+        else:
+            vision[image_hash] = cached
+    if missing:
+        try:
+            vision.update(zip(missing, compute_vision(missing, [get_image(h) for h in missing], delay_model)))
+        except Exception as e:
+            app.logger.warning(f"Stage prediction failed for {len(missing)} images: {e}")
+
+    results = []
+    pending = {}
+    for project, image_hash, timeline_days, budget_utilized_percent in rows:
+        if image_hash in vision:
+            stage, conf, _ = vision[image_hash]
+            progress = stage_to_percent[stage]
+        else:
+            # Fallback to mock prediction based on project progress
+            stage, conf, progress = fallback_stage(project)
+
+        result = {
+            'project_id': project.id,
+            'predicted_stage': int(stage),
+            'confidence': float(conf),
+            'estimated_progress_percent': progress,
+            'delay_probability': None,
+            # Model the delay probability came from; its version is saved with the prediction
+            'delay_model': delay_model,
+            # Photo the stage came from, if any; saved so a replaced photo marks the project dirty
+            'image_hash': image_hash if image_hash in vision else None,
+        }
+        if image_hash:
+            key = delay_key(image_hash, timeline_days, progress or 0, budget_utilized_percent)
+            result['delay_probability'] = delay_caches[delay_model].get(key)
+            if result['delay_probability'] is None:
+                pending.setdefault(key, (image_hash, [timeline_days, progress or 0, budget_utilized_percent], []))[2].append(result)
+        results.append((project, result))
+
+    # Delay: one delay model call for every input not already cached
+    if pending:
+        try:
+            probs = compute_delay(
+                list(pending),
+                [image_hash for image_hash, _, _ in pending.values()],
+                [tabular for _, tabular, _ in pending.values()],
+                get_image,
+                delay_model,
+            )
+            for (_, _, waiting), prob in zip(pending.values(), probs):
+                for result in waiting:
+                    result['delay_probability'] = prob
+        except Exception as e:
+            app.logger.warning(f"Delay prediction failed for {len(pending)} inputs: {e}")
+
+    # Projects without a usable photo get the tabular model, in one call for the whole batch
+    unpredicted = [(project, result) for project, result in results if result['delay_probability'] is None]
+    if unpredicted:
+        probs = tabular_delay_probabilities([project for project, _ in unpredicted], now)
+        for (_, result), prob in zip(unpredicted, probs):
+            result.update(delay_probability=prob, delay_model='tabular')
+    return [result for _, result in results]
+
+def predict_projects_tabular(projects, now):
+    """Delay from the tabular model only; no photo is read and no stage is predicted.
+
+    ``predicted_stage`` is None, so saving the results leaves each project's
+    stage and confidence as they were.
+    """
+    return [
         {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'role': user.role,
-            'created_at': user.created_at.isoformat() if hasattr(user, 'created_at') else None
-        } for user in users
-    ])
+            'project_id': project.id,
+            'predicted_stage': None,
+            'confidence': None,
+            'estimated_progress_percent': None,
+            'delay_probability': prob,
+            'delay_model': 'tabular',
+            'image_hash': None,
+        }
+        for project, prob in zip(projects, tabular_delay_probabilities(projects, now))
+    ]
+
+def predict_projects(projects, batch_size=None, workers=None, on_progress=None, predictor='image',
+                     delay_model=DELAY_MODEL):
+    """Run the prediction pipeline over many projects.
+
+    Image files are read and decoded on a thread pool, one batch ahead of the
+    model calls, so decoding overlaps with inference. Each distinct photo is
+    read and decoded once no matter how many projects share it.
+    ``on_progress(done, total)`` is called after every batch. With
+    ``predictor='tabular'`` only the tabular delay model runs; otherwise
+    ``delay_model`` picks the hybrid or slim image delay model.
+    """
+    projects = list(projects)
+    batch_size = batch_size or app.config['BULK_PREDICT_BATCH_SIZE']
+    workers = workers or app.config['BULK_PREDICT_WORKERS']
+    now = datetime.utcnow()
+    results = []
+
+    if predictor == 'tabular':
+        results = predict_projects_tabular(projects, now)
+        if on_progress:
+            on_progress(len(results), len(projects))
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        paths = list(dict.fromkeys(project_image_path(p) for p in projects))
+        files = {path: file for path, file in zip(paths, pool.map(read_image_file, paths)) if file}
+        data_by_hash = {image_hash: data for image_hash, data in files.values()}
+        decoded = {}
+
+        def prefetch(batch):
+            for project in batch:
+                file = files.get(project_image_path(project))
+                if file and file[0] not in decoded:
+                    decoded[file[0]] = pool.submit(load_image, data_by_hash[file[0]])
+
+        def get_image(image_hash):
+            if image_hash not in decoded:
+                decoded[image_hash] = pool.submit(load_image, data_by_hash[image_hash])
+            return decoded[image_hash].result()
+
+        batches = [projects[i:i + batch_size] for i in range(0, len(projects), batch_size)]
+        if batches:
+            prefetch(batches[0])
+        for i, batch in enumerate(batches):
+            if i + 1 < len(batches):
+                prefetch(batches[i + 1])
+            results.extend(_predict_project_batch(batch, files, get_image, now, delay_model))
+            # Drop decoded pixels for photos the remaining batches no longer need
+            upcoming = {files[project_image_path(p)][0] for b in batches[i + 1:i + 2] for p in b
+                        if project_image_path(p) in files}
+            for image_hash in list(decoded):
+                if image_hash not in upcoming:
+                    del decoded[image_hash]
+            if on_progress:
+                on_progress(len(results), len(projects))
+    return results
+
+# Registry models behind each kind of delay prediction, for its model version
+PREDICTION_MODELS = dict(DELAY_MODEL_REGISTRY_NAMES, tabular=('tabular_delay',))
+
+def prediction_model_versions():
+    """Current model version of each delay predictor ('hybrid', 'slim', 'tabular').
+
+    Built from the registry's fingerprints of the files each model was loaded
+    from (the .tflite export under MODEL_BACKEND=tflite), so retraining or
+    re-exporting a model changes it. It never loads a model: one that is not
+    loaded yet is fingerprinted from its file on disk.
+    """
+    return {
+        kind: hashlib.sha1('|'.join(registry.fingerprint(name) for name in names).encode()).hexdigest()[:16]
+        for kind, names in PREDICTION_MODELS.items()
+    }
+
+def save_project_predictions(results, predicted_at=None):
+    """Write prediction results back to the Project rows in bulk UPDATEs.
+
+    ``predicted_at`` defaults to now; the scheduler passes the time it read the
+    projects, so edits made while it was predicting still count as changes.
+    Each row records the version of the delay model its probability came from.
+    Results without a ``predicted_stage`` (the tabular predictor) only update
+    the delay probability and leave the stage and confidence untouched.
+    """
+    if not results:
+        return
+    predicted_at = predicted_at or datetime.utcnow()
+    versions = prediction_model_versions()
+    with_stage, delay_only = [], []
+    for result in results:
+        row = {
+            'id': result['project_id'],
+            'delay_probability': result['delay_probability'],
+            'last_prediction_date': predicted_at,
+            'prediction_model_version': versions[result['delay_model']],
+            'prediction_image_hash': result.get('image_hash'),
+        }
+        if result['predicted_stage'] is None:
+            delay_only.append(row)
+        else:
+            row.update(predicted_stage=result['predicted_stage'], confidence=result['confidence'])
+            with_stage.append(row)
+    for rows in (with_stage, delay_only):
+        if rows:
+            db.session.execute(db.update(Project), rows)
+    db.session.commit()
+
+def select_projects_for_prediction(project_ids=None, stale_since=None):
+    """Projects by id, projects not predicted since ``stale_since``, or all projects."""
+    query = Project.query
+    if project_ids:
+        query = query.filter(Project.id.in_(project_ids))
+    elif stale_since:
+        query = query.filter(db.or_(
+            Project.last_prediction_date.is_(None),
+            Project.last_prediction_date < stale_since,
+        ))
+    return query.order_by(Project.id).all()
+
+def run_bulk_prediction(projects, batch_size=None, workers=None, on_progress=None, predictor='image',
+                        delay_model=DELAY_MODEL):
+    """Predict and save many projects, tracking progress in bulk_prediction_status."""
+    bulk_prediction_status.update(
+        running=True, done=0, total=len(projects), started_at=datetime.utcnow().isoformat(), finished_at=None
+    )
+
+    def progress(done, total):
+        bulk_prediction_status['done'] = done
+        app.logger.info(f"Bulk prediction: {done}/{total} projects")
+        if on_progress:
+            on_progress(done, total)
+
+    started = time.perf_counter()
+    try:
+        results = predict_projects(
+            projects, batch_size=batch_size, workers=workers, on_progress=progress, predictor=predictor,
+            delay_model=delay_model,
+        )
+        save_project_predictions(results)
+    finally:
+        bulk_prediction_status.update(running=False, finished_at=datetime.utcnow().isoformat())
+    return results, round(time.perf_counter() - started, 3)
+
+# 'image' runs the photo models; 'tabular' is the photo-free fast path, chosen per request
+PREDICTORS = ('image', 'tabular')
+
+def predictor_loaded(predictor, delay_model=DELAY_MODEL):
+    if predictor == 'tabular':
+        try:
+            registry.get('tabular_delay')
+        except RuntimeError:
+            return False
+        return True
+    return ai_models_loaded(delay_model)
+
+def unknown_predictor(predictor):
+    return jsonify({'error': f"Unknown predictor '{predictor}'; expected one of {', '.join(PREDICTORS)}"}), 400
 
 # AI Prediction endpoint for projects
 @app.route('/projects/<int:project_id>/predict', methods=['POST'])
 @jwt_required()
 def predict_project_ai(project_id):
     """Generate AI prediction for a project based on current data"""
-    project = Project.query.get_or_404(project_id)
+    Project.query.get_or_404(project_id)
+    predictor = request.args.get('predictor', 'image')
+    if predictor not in PREDICTORS:
+        return unknown_predictor(predictor)
+    delay_model = request.args.get('delay_model', DELAY_MODEL)
+    if delay_model not in DELAY_MODELS:
+        return unknown_delay_model(delay_model)
     
-    if not AI_MODEL_LOADED:
+    if wants_async():
+        return job_accepted(job_queue.submit(
+            'project', in_app_context(predict_and_save_project), project_id, predictor, delay_model,
+            owner=int(get_jwt_identity()),
+        ))
+    
+    if not predictor_loaded(predictor, delay_model):
         return jsonify({"error": "AI model not loaded"}), 500
     
     try:
-        # Calculate timeline days
-        timeline_days = 0
-        if project.start_date:
-            timeline_days = (datetime.utcnow() - project.start_date).days
-        
-        # Calculate budget utilization (simplified - you might want to add actual budget tracking)
-        budget_utilized_percent = min(project.progress, 100) if project.progress else 0
-        
-        # Use the existing AI prediction logic
-        from utils import preprocess_image
-        from progress_model import predict_stage, stage_to_percent
-        
-        # For now, we'll use a placeholder image or generate a mock prediction
-        # In a real scenario, you'd have project images stored
-        try:
-            # Try to use a sample image if available
-            sample_image_path = "data/images/s1.jpg"  # Use first available image
-            stage, conf = predict_stage(sample_image_path)
-            progress = stage_to_percent[stage]
-        except:
-            # Fallback to mock prediction based on project progress
-            stage = min(5, max(0, int(project.progress / 20)))  # Convert progress to stage
-            conf = 0.8  # Mock confidence
-            progress = project.progress
-        
-        # Prepare inputs for hybrid model
-        try:
-            img = preprocess_image(sample_image_path).reshape(1, 224, 224, 3)
-            tabular = np.array([[timeline_days, progress, budget_utilized_percent]])
-            delay_prob = model.predict([img, tabular])[0][0]
-        except:
-            # Fallback mock prediction
-            delay_prob = 0.3 if project.status == 'delayed' else 0.1
-        
-        # Update project with AI predictions
-        project.predicted_stage = int(stage)
-        project.confidence = float(conf)
-        project.delay_probability = float(delay_prob)
-        project.last_prediction_date = datetime.utcnow()
-        
-        db.session.commit()
-        
-        return jsonify({
-            "predicted_stage": int(stage),
-            "confidence": round(float(conf), 2),
-            "estimated_progress_percent": progress,
-            "delay_probability": round(float(delay_prob), 2),
-            "delayed": int(delay_prob > 0.5),
-            "message": "AI prediction generated successfully"
-        })
-        
+        return jsonify(predict_and_save_project(project_id, predictor, delay_model))
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": f"AI prediction failed: {str(e)}"}), 500
 
+def predict_and_save_project(project_id, predictor='image', delay_model=DELAY_MODEL):
+    if not predictor_loaded(predictor, delay_model):
+        raise RuntimeError("AI model not loaded")
+    
+    project = db.get_or_404(Project, project_id)
+    result = predict_projects([project], predictor=predictor, delay_model=delay_model)[0]
+    
+    # Update project with AI predictions
+    save_project_predictions([result])
+    
+    delay_prob = result['delay_probability']
+    stage, confidence = result['predicted_stage'], result['confidence']
+    if stage is None:
+        # The tabular predictor does not predict a stage; report the one on record (None if never predicted)
+        stage, confidence = project.predicted_stage, project.confidence
+    return {
+        "predicted_stage": stage,
+        "confidence": round(confidence, 2) if confidence is not None else None,
+        "estimated_progress_percent": result['estimated_progress_percent'],
+        "delay_probability": round(float(delay_prob), 2),
+        "delayed": int(delay_prob > 0.5),
+        "message": "AI prediction generated successfully"
+    }
+
+@app.route('/projects/predict/bulk', methods=['POST'])
+@jwt_required()
+def predict_projects_bulk():
+    """Refresh AI predictions for a list of projects, or all stale ones - admin only"""
+    current_user = get_user(int(get_jwt_identity()))
+    if not current_user or current_user.role != 'admin':
+        return jsonify({'message': 'Only admins can run bulk predictions'}), 403
+    
+    if bulk_prediction_status['running']:
+        return jsonify({'message': 'A bulk prediction is already running'}), 409
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        stale_since = datetime.fromisoformat(data['stale_since']) if data.get('stale_since') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    predictor = data.get('predictor') or request.args.get('predictor', 'image')
+    if predictor not in PREDICTORS:
+        return unknown_predictor(predictor)
+    delay_model = data.get('delay_model') or request.args.get('delay_model', DELAY_MODEL)
+    if delay_model not in DELAY_MODELS:
+        return unknown_delay_model(delay_model)
+    batch_size = data.get('batch_size')
+    if batch_size is not None and (type(batch_size) is not int or batch_size < 1):
+        return jsonify({'error': 'batch_size must be a positive integer'}), 400
+    
+    if wants_async():
+        # Queued bulk jobs wait for each other instead of running side by side
+        return job_accepted(job_queue.submit(
+            'bulk', in_app_context(bulk_prediction_job), data.get('project_ids'), stale_since, batch_size, predictor,
+            delay_model, wait=True, owner=current_user.id,
+        ))
+    
+    if not predictor_loaded(predictor, delay_model):
+        return jsonify({"error": "AI model not loaded"}), 500
+    
+    try:
+        summary = bulk_prediction_job(data.get('project_ids'), stale_since, batch_size, predictor, delay_model)
+    except BulkPredictionRunning as e:
+        return jsonify({'message': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Bulk prediction failed: {str(e)}"}), 500
+    
+    return jsonify(summary)
+
+def bulk_prediction_job(project_ids, stale_since, batch_size, predictor='image', delay_model=DELAY_MODEL, wait=False):
+    if not predictor_loaded(predictor, delay_model):
+        raise RuntimeError("AI model not loaded")
+    with exclusive_bulk_prediction(wait):
+        projects = select_projects_for_prediction(project_ids, stale_since)
+        results, seconds = run_bulk_prediction(
+            projects, batch_size=batch_size, predictor=predictor, delay_model=delay_model
+        )
+    return {
+        'count': len(results),
+        'seconds': seconds,
+        'results': results,
+        'message': 'AI predictions generated successfully'
+    }
+
+@app.route('/projects/predict/bulk/status', methods=['GET'])
+@jwt_required()
+def bulk_prediction_progress():
+    """Progress of the current or most recent bulk prediction run"""
+    return jsonify(bulk_prediction_status)
+
+# Re-predicts projects whose inputs, photo or models changed, in the background during idle time
+from prediction_scheduler import PredictionScheduler
+
+def scheduled_predictor():
+    # Only called when predicting, never from a status read, since it loads the models
+    predictor = app.config['PREDICTION_SCHEDULER_PREDICTOR']
+    # Without the photo models every image prediction would fall back to the tabular model anyway
+    return predictor if predictor_loaded(predictor) else 'tabular'
+
+prediction_scheduler = PredictionScheduler(
+    app, db, Project,
+    predict=lambda projects: predict_projects(projects, predictor=scheduled_predictor()),
+    save=lambda results, predicted_at: save_project_predictions(results, predicted_at=predicted_at),
+    # A prediction is current while the models it came from are, whichever predictor made it
+    model_versions=lambda: prediction_model_versions().values(),
+    image_path=project_image_path,
+    image_hash=lambda path: (read_image_file(path) or (None,))[0],
+    sla_seconds=app.config['PREDICTION_FRESHNESS_SLA'],
+    idle_seconds=app.config['PREDICTION_IDLE_SECONDS'],
+    interval=app.config['PREDICTION_SCHEDULER_INTERVAL'],
+    batch_size=app.config['PREDICTION_SCHEDULER_BATCH_SIZE'],
+)
+prediction_scheduler.install()
+
+@app.route('/predict/scheduler', methods=['GET'])
+@jwt_required()
+def prediction_scheduler_status():
+    """Dirty-project backlog plus counts and timings of recent re-prediction runs - admin only"""
+    current_user = get_user(int(get_jwt_identity()))
+    if not current_user or current_user.role != 'admin':
+        return jsonify({'message': 'Only admins can view the prediction scheduler'}), 403
+    return jsonify(dict(prediction_scheduler.metrics(), backlog=prediction_scheduler.backlog()))
+
+@app.route('/predict/scheduler/run', methods=['POST'])
+@jwt_required()
+def run_prediction_scheduler():
+    """Re-predict dirty projects now instead of waiting for idle time - admin only"""
+    current_user = get_user(int(get_jwt_identity()))
+    if not current_user or current_user.role != 'admin':
+        return jsonify({'message': 'Only admins can run the prediction scheduler'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify(prediction_scheduler.run('manual', limit=data.get('limit')))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Re-prediction failed: {str(e)}"}), 500
+
+STARTUP_SECONDS = round(time.perf_counter() - APP_IMPORT_STARTED, 3)
+print(f"App ready in {STARTUP_SECONDS}s")
+
+if app.config['MODEL_WARMUP']:
+    registry.warm_up(AI_MODELS)
+
+if app.config['PREDICTION_SCHEDULER']:
+    prediction_scheduler.start()
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
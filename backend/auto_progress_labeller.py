@@ -1,20 +1,145 @@
-import pandas as pd
+import argparse
+import csv
 import os
-from progress_model import predict_stage, stage_to_percent
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model_registry import registry
+from progress_model import get_stage_model, get_yolo_model, predict_stages, stage_to_percent
+from prediction_cache import image_key
+from utils import load_image
+
+
+def load_checkpoint(path):
+    """Labels already computed by an interrupted run, as {filename: percent}."""
+    if not os.path.exists(path):
+        return {}
+    done = pd.read_csv(path)
+    return dict(zip(done['image'], done['progress_percent']))
 
-df = pd.read_csv("../data/metadata.csv")
 
-updated_progress = []
-for fname in df['image']:
-    img_path = os.path.join("../data/images", fname)
+def decode_batch(paths):
+    """Decode a batch of images and hash their bytes, keeping the exception for any that fail."""
+    images = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            images.append((load_image(data), image_key(data)))
+        except Exception as e:
+            images.append(e)
+    return images
+
+
+def label_batch(names, images):
+    """Return the progress percent for each (image, hash) pair, 0 for images that fail.
+
+    Only per-image failures are absorbed; if the models themselves are not
+    loaded the error is raised, since labelling every image 0 would poison
+    the training data.
+    """
+    percents = [0] * len(images)  # fallback
+    valid = []
+    for i, img in enumerate(images):
+        if isinstance(img, Exception):
+            print(f"⚠️ Error for {names[i]}: {img}")
+        else:
+            valid.append(i)
+    if not valid:
+        return percents
+
     try:
-        stage, _ = predict_stage(img_path)
-        percent = stage_to_percent[stage]
+        stages = predict_stages([images[i][0] for i in valid], [images[i][1] for i in valid])
     except Exception as e:
-        print(f"⚠️ Error for {fname}: {e}")
-        percent = 0  # fallback
-    updated_progress.append(percent)
+        if not registry.is_ready('yolo', 'stage'):
+            raise
+        if len(valid) == 1:
+            print(f"⚠️ Error for {names[valid[0]]}: {e}")
+            return percents
+        # One bad image should not cost the whole batch; retry them one by one
+        for i in valid:
+            percents[i] = label_batch([names[i]], [images[i]])[0]
+        return percents
+
+    for i, (stage, _) in zip(valid, stages):
+        percents[i] = stage_to_percent[stage]
+    return percents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Label metadata rows with the predicted progress percent")
+    parser.add_argument('--csv', default="../data/metadata.csv")
+    parser.add_argument('--images', default="../data/images")
+    parser.add_argument('--output', default="../data/metadata_autolabeled.csv")
+    parser.add_argument('--checkpoint', default=None,
+                        help='Per-image results file used to resume (default: <output>.checkpoint)')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4, help='Threads decoding images ahead of the models')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='CSV rows streamed per write')
+    args = parser.parse_args()
+    checkpoint = args.checkpoint or args.output + ".checkpoint"
+
+    # Load both models up front: a missing model file must abort the run, not label every image 0
+    get_yolo_model()
+    get_stage_model()
+
+    # Every distinct image is labelled once, however many rows reference it
+    filenames = list(dict.fromkeys(pd.read_csv(args.csv, usecols=['image'])['image']))
+    labels = load_checkpoint(checkpoint)
+    todo = [fname for fname in filenames if fname not in labels]
+    print(f"{len(filenames)} distinct images, {len(filenames) - len(todo)} already labelled, {len(todo)} to go")
+
+    latencies = []
+    started = time.perf_counter()
+    batches = [todo[i:i + args.batch_size] for i in range(0, len(todo), args.batch_size)]
+    new_file = not os.path.exists(checkpoint)
+    with open(checkpoint, 'a', newline='') as f, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(['image', 'progress_percent'])
+
+        # Decoding runs up to `workers` batches ahead on the pool while the models,
+        # which are not safe to share across threads, run here one batch at a time
+        decoding = deque()
+        pending = iter(batches)
+        for batch in batches:
+            while len(decoding) < args.workers:
+                upcoming = next(pending, None)
+                if upcoming is None:
+                    break
+                decoding.append(pool.submit(decode_batch, [os.path.join(args.images, n) for n in upcoming]))
+            images = decoding.popleft().result()
+
+            batch_started = time.perf_counter()
+            percents = label_batch(batch, images)
+            latencies.extend([(time.perf_counter() - batch_started) / len(batch)] * len(batch))
+
+            for fname, percent in zip(batch, percents):
+                labels[fname] = percent
+                writer.writerow([fname, percent])
+            f.flush()
+            print(f"  labelled {len(labels)}/{len(filenames)} images", flush=True)
+    elapsed = time.perf_counter() - started
+
+    # Stream the metadata through in chunks instead of holding the whole DataFrame
+    tmp_output = args.output + ".tmp"
+    for i, chunk in enumerate(pd.read_csv(args.csv, chunksize=args.chunk_size)):
+        chunk['progress_percent'] = chunk['image'].map(labels)
+        chunk.to_csv(tmp_output, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    os.replace(tmp_output, args.output)
+    os.remove(checkpoint)
+
+    print(f"✅ Created: {args.output}")
+    if todo:
+        latencies = np.array(latencies) * 1000
+        print(f"Labelled {len(todo)} images in {elapsed:.1f}s ({len(todo) / elapsed:.1f} images/s); "
+              f"per-image latency mean {latencies.mean():.1f} ms, "
+              f"p50 {np.percentile(latencies, 50):.1f} ms, p95 {np.percentile(latencies, 95):.1f} ms")
+
 
-df['progress_percent'] = updated_progress
-df.to_csv("../data/metadata_autolabeled.csv", index=False)
-print("✅ Created: data/metadata_autolabeled.csv")
+if __name__ == "__main__":
+    main()
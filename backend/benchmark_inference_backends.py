@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from export_models import MODELS
+from inference_backend import QUANTIZATIONS, load_model, tflite_path
+
+VARIANTS = ('keras',) + QUANTIZATIONS
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(variant, batch_sizes, runs):
+    """Load both models with one backend and time predict_on_batch; runs in a fresh process."""
+    before = rss_mb()
+    started = time.perf_counter()
+    models = {}
+    for name, (h5_path, input_names) in MODELS.items():
+        if variant == 'keras':
+            models[name] = load_model(h5_path, backend='keras')
+        else:
+            models[name] = load_model(h5_path, input_names=input_names, backend='tflite', quantization=variant)
+    load_seconds = time.perf_counter() - started
+    loaded = rss_mb()
+
+    rng = np.random.default_rng(0)
+    latency = {}
+    for batch_size in batch_sizes:
+        images = rng.random((batch_size, 224, 224, 3), dtype=np.float32)
+        tabular = rng.random((batch_size, 3), dtype=np.float32) * 100
+        for name, model in models.items():
+            inputs = [images, tabular] if name == 'delay' else images
+            for _ in range(3):
+                model.predict_on_batch(inputs)
+            times = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                model.predict_on_batch(inputs)
+                times.append((time.perf_counter() - started) * 1000)
+            latency[f"{name}@{batch_size}"] = (float(np.percentile(times, 50)), float(np.percentile(times, 95)))
+
+    return {
+        'variant': variant,
+        'load_seconds': load_seconds,
+        'rss_before_mb': before,
+        'rss_loaded_mb': loaded,
+        'rss_after_mb': rss_mb(),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'latency_ms': latency,
+    }
+
+
+def file_size_mb(variant):
+    paths = [h5 if variant == 'keras' else tflite_path(h5, variant) for h5, _ in MODELS.values()]
+    return sum(os.path.getsize(p) for p in paths) / 1e6 if all(os.path.exists(p) for p in paths) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and memory of Keras vs quantized TFLite models")
+    parser.add_argument('--variants', default=','.join(VARIANTS))
+    parser.add_argument('--batch-sizes', default="1,8")
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--variant', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+
+    if args.variant:
+        print(json.dumps(measure(args.variant, batch_sizes, args.runs)))
+        return
+
+    # One process per variant so memory numbers are not polluted by the previous backend
+    for variant in args.variants.split(','):
+        size = file_size_mb(variant)
+        if size is None:
+            print(f"{variant:<8} model files missing; run export_models.py")
+            continue
+        out = subprocess.run(
+            [sys.executable, __file__, '--variant', variant, '--batch-sizes', args.batch_sizes,
+             '--runs', str(args.runs)],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            print(f"{variant:<8} failed: {out.stderr.strip().splitlines()[-1] if out.stderr.strip() else out.returncode}")
+            continue
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        timings = "  ".join(
+            f"{key} p50 {p50:.1f} / p95 {p95:.1f} ms" for key, (p50, p95) in result['latency_ms'].items()
+        )
+        print(f"{variant:<8} files {size:6.1f} MB  load {result['load_seconds']:5.2f}s  "
+              f"RSS +{result['rss_loaded_mb'] - result['rss_before_mb']:6.1f} MB (peak {result['peak_rss_mb']:.0f} MB)  "
+              f"{timings}")
+
+
+if __name__ == "__main__":
+    main()
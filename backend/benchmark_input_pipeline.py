@@ -0,0 +1,59 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline import TABULAR_COLUMNS, make_dataset
+from image_store import open_image_store
+from utils import preprocess_image
+
+
+def consume(dataset, epochs):
+    """Iterate the dataset for ``epochs`` epochs and return samples/sec, first epoch included."""
+    samples = 0
+    started = time.perf_counter()
+    for _ in range(epochs):
+        for (images, _), _ in dataset:
+            samples += len(images)
+    return samples / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare training input pipelines in samples/sec")
+    parser.add_argument('--csv', default="../data/metadata_autolabeled.csv")
+    parser.add_argument('--images', default="../data/images")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--epochs', type=int, default=3)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    print(f"{len(df)} rows, batch size {args.batch_size}")
+
+    # Current loader: decode everything into one float64 array, then slice shuffled batches
+    started = time.perf_counter()
+    images = np.array([preprocess_image(os.path.join(args.images, fname)) for fname in df['image']])
+    tabular = df[TABULAR_COLUMNS].values
+    for _ in range(args.epochs):
+        order = np.random.permutation(len(df))
+        for start in range(0, len(df), args.batch_size):
+            batch = order[start:start + args.batch_size]
+            _ = images[batch], tabular[batch]
+    rate = len(df) * args.epochs / (time.perf_counter() - started)
+    print(f"in-memory numpy:       {rate:8.1f} samples/s, {images.nbytes / 1e6:.0f} MB resident")
+    del images
+
+    files = make_dataset(df, args.images, batch_size=args.batch_size, shuffle=True)
+    print(f"tf.data decode:        {consume(files, args.epochs):8.1f} samples/s")
+
+    cached = make_dataset(df, args.images, batch_size=args.batch_size, shuffle=True, cache="")
+    print(f"tf.data decode+cache:  {consume(cached, args.epochs):8.1f} samples/s")
+
+    store = open_image_store(args.images, df['image'])
+    mapped = make_dataset(df, args.images, batch_size=args.batch_size, shuffle=True, store=store)
+    print(f"tf.data image store:   {consume(mapped, args.epochs):8.1f} samples/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+# Seed a throwaway database so the benchmark never touches instance/nirmaan.db
+os.environ.setdefault('DATABASE_URI', 'sqlite://')
+
+from app_updated import app, db, Project
+from serializers import JSON_BACKEND, PROJECT_LIST_FIELDS, dumps, rows_to_dicts, stream_json
+
+
+def seed_projects(count):
+    now = datetime.utcnow()
+    db.session.execute(db.insert(Project), [
+        {
+            'name': f"Project {i}", 'description': "Benchmark project " * 4, 'location': "Pune, Maharashtra",
+            'latitude': 18.5 + i * 1e-4, 'longitude': 73.8 + i * 1e-4, 'status': 'in_progress',
+            'progress': i % 100, 'start_date': now - timedelta(days=i % 400),
+            'end_date': now + timedelta(days=i % 300), 'budget': 1e7 + i, 'manager_id': 2,
+        }
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def legacy_serialize(projects):
+    # The per-handler dict literal this module replaced, encoded by the stdlib
+    return json.dumps([
+        {
+            'id': project.id,
+            'name': project.name,
+            'description': project.description,
+            'location': project.location,
+            'latitude': project.latitude,
+            'longitude': project.longitude,
+            'status': project.status,
+            'progress': project.progress,
+            'start_date': project.start_date.isoformat() if project.start_date else None,
+            'end_date': project.end_date.isoformat() if project.end_date else None,
+            'budget': project.budget,
+            'manager_id': project.manager_id,
+            'created_at': project.created_at.isoformat()
+        } for project in projects
+    ]).encode()
+
+
+def timed(label, fn, repeat, per):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<34} {best * 1000 * per:8.1f} ms per 10k projects  ({len(body) / 1e6:.1f} MB)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time project list serialization per 10k projects")
+    parser.add_argument('--projects', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with app.test_request_context():
+        seed_projects(args.projects)
+        per = 10000 / db.session.scalar(db.select(db.func.count(Project.id)))
+        print(f"JSON backend: {JSON_BACKEND}")
+
+        columns = [getattr(Project, f) for f in PROJECT_LIST_FIELDS]
+        baseline = timed("ORM objects + isoformat + json", lambda: legacy_serialize(Project.query.all()),
+                         args.repeat, per)
+        rows = db.session.execute(db.select(*columns)).all()
+        timed("column tuples, encode only", lambda: dumps(rows_to_dicts(PROJECT_LIST_FIELDS, rows)),
+              args.repeat, per)
+        fast = timed("column tuples + serializer",
+                     lambda: dumps(rows_to_dicts(PROJECT_LIST_FIELDS, db.session.execute(db.select(*columns)))),
+                     args.repeat, per)
+        timed("chunked NDJSON stream", lambda: b''.join(stream_json(
+            (dict(zip(PROJECT_LIST_FIELDS, row)) for row in db.session.execute(db.select(*columns))),
+            ndjson=True).response), args.repeat, per)
+        print(f"serializer is {baseline / fast:.1f}x faster end to end")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from sqlite_profile import current_pragmas, engine_options, install_pragmas
+
+SCHEMA = (
+    "CREATE TABLE projects (id INTEGER PRIMARY KEY, name VARCHAR(100), progress INTEGER, updated_at DATETIME)",
+    "CREATE TABLE comments (id INTEGER PRIMARY KEY, content TEXT, author_id INTEGER, project_id INTEGER, "
+    "created_at DATETIME)",
+    "CREATE INDEX ix_comments_project_created ON comments (project_id, created_at)",
+)
+
+
+def make_engine(path, tuned):
+    uri = f"sqlite:///{path}"
+    engine = create_engine(uri, **(engine_options(uri) if tuned else {}))
+    if tuned:
+        install_pragmas(engine)
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO projects (id, name, progress) VALUES (:id, :name, 0)"),
+                     [{'id': i, 'name': f"Project {i}"} for i in range(1, 51)])
+    return engine
+
+
+def run(engine, writers, readers, writes_per_thread):
+    """Writers post a comment and touch its project, as add_project_comment and update_project do."""
+    counts = {'writes': 0, 'reads': 0, 'locked': 0}
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def write(worker):
+        for i in range(writes_per_thread):
+            project_id = (worker * writes_per_thread + i) % 50 + 1
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(
+                        "INSERT INTO comments (content, author_id, project_id, created_at) "
+                        "VALUES (:c, :a, :p, CURRENT_TIMESTAMP)"
+                    ), {'c': f"Comment {i}", 'a': worker, 'p': project_id})
+                    conn.execute(text(
+                        "UPDATE projects SET progress = progress + 1, updated_at = CURRENT_TIMESTAMP WHERE id = :p"
+                    ), {'p': project_id})
+                key = 'writes'
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                key = 'locked'
+            with lock:
+                counts[key] += 1
+
+    def read(worker):
+        while not done.is_set():
+            with engine.connect() as conn:
+                conn.execute(text(
+                    "SELECT id, content, created_at FROM comments WHERE project_id = :p ORDER BY created_at"
+                ), {'p': worker % 50 + 1}).all()
+            with lock:
+                counts['reads'] += 1
+
+    reader_threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    writer_threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    for thread in reader_threads:
+        thread.start()
+    started = time.perf_counter()
+    for thread in writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+    return counts, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent comment/project writes: default SQLite vs tuned profile")
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writes', type=int, default=200, help="transactions per writer thread")
+    args = parser.parse_args()
+
+    for name, tuned in (('default', False), ('tuned', True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = make_engine(os.path.join(tmp, 'bench.db'), tuned)
+            raw = engine.raw_connection()
+            pragmas = current_pragmas(raw.driver_connection, ('journal_mode', 'synchronous'))
+            raw.close()
+
+            counts, seconds = run(engine, args.writers, args.readers, args.writes)
+            engine.dispose()
+        print(f"{name:<8} journal={pragmas['journal_mode']:<7} synchronous={pragmas['synchronous']}  "
+              f"{counts['writes'] / seconds:8.0f} writes/s  {counts['reads'] / seconds:8.0f} reads/s  "
+              f"{counts['locked']} 'database is locked' errors  ({seconds:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
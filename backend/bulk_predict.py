@@ -0,0 +1,53 @@
+import argparse
+import sys
+from datetime import datetime
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Refresh AI predictions for many projects in one run")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--ids', type=int, nargs='+', help='Project IDs to re-predict')
+    group.add_argument('--stale-since', type=datetime.fromisoformat,
+                       help='Re-predict projects not predicted since this ISO timestamp')
+    group.add_argument('--all', action='store_true', help='Re-predict every project')
+    parser.add_argument('--batch-size', type=positive_int, help='Projects per model call')
+    parser.add_argument('--workers', type=positive_int, help='Threads used to read and decode images')
+    parser.add_argument('--predictor', choices=('image', 'tabular'), default='image',
+                        help='tabular skips the photo models and only runs the tabular delay model')
+    parser.add_argument('--delay-model', choices=('hybrid', 'slim'),
+                        help='image delay model (default: DELAY_MODEL)')
+    args = parser.parse_args()
+
+    # Lazy import so --help does not have to set up the app
+    from app_updated import DELAY_MODEL, app, predictor_loaded, run_bulk_prediction, select_projects_for_prediction
+
+    delay_model = args.delay_model or DELAY_MODEL
+    with app.app_context():
+        if not predictor_loaded(args.predictor, delay_model):
+            print('AI models could not be loaded', file=sys.stderr)
+            return 1
+
+        projects = select_projects_for_prediction(args.ids, args.stale_since)
+        print(f"Predicting {len(projects)} projects")
+
+        def progress(done, total):
+            print(f"  {done}/{total} projects ({done * 100 // max(total, 1)}%)", flush=True)
+
+        results, seconds = run_bulk_prediction(
+            projects, batch_size=args.batch_size, workers=args.workers, on_progress=progress,
+            predictor=args.predictor, delay_model=delay_model,
+        )
+        rate = len(results) / seconds if seconds else 0.0
+        print(f"✅ Updated {len(results)} projects in {seconds:.2f}s ({rate:.1f} projects/s)")
+        return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from export_models import MODELS, stage_samples, tabular_samples
+from inference_backend import QUANTIZATIONS, load_model, tflite_path
+from utils import preprocess_images
+
+
+def predict(model, inputs, batch_size):
+    outputs = []
+    for start in range(0, len(inputs[0]), batch_size):
+        outputs.append(np.asarray(model.predict_on_batch([x[start:start + batch_size] for x in inputs])))
+    return np.concatenate(outputs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare quantized TFLite models with the Keras originals")
+    parser.add_argument('--limit', type=int, default=None, help="check at most this many stage_data images")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--min-agreement', type=float, default=0.98,
+                        help="fail if a variant agrees with Keras on fewer predictions than this")
+    args = parser.parse_args()
+
+    samples = stage_samples(limit=args.limit)
+    paths, labels = zip(*samples)
+    labels = np.array(labels)
+    images = preprocess_images(paths, dtype=np.float32)
+    tabular = tabular_samples(len(images))
+    print(f"{len(images)} stage_data images")
+
+    failed = False
+    for name, (h5_path, input_names) in MODELS.items():
+        inputs = [images, tabular] if name == 'delay' else [images]
+        reference = predict(load_model(h5_path, backend='keras'), inputs, args.batch_size)
+        if name == 'stage':
+            reference_labels = reference.argmax(axis=1)
+            print(f"\n{name}: keras accuracy {np.mean(reference_labels == labels):.3f}")
+        else:
+            reference_labels = reference[:, 0] > 0.5
+            print(f"\n{name}: keras predicts delayed for {np.mean(reference_labels):.1%} of inputs")
+
+        for quantization in QUANTIZATIONS:
+            if not os.path.exists(tflite_path(h5_path, quantization)):
+                print(f"  {quantization:<8} not exported; run export_models.py")
+                continue
+            model = load_model(h5_path, input_names=input_names, backend='tflite', quantization=quantization)
+            output = predict(model, inputs, args.batch_size)
+            predicted = output.argmax(axis=1) if name == 'stage' else output[:, 0] > 0.5
+            agreement = np.mean(predicted == reference_labels)
+            diff = np.abs(output - reference)
+            line = (f"  {quantization:<8} agreement {agreement:.3f}  "
+                    f"max |diff| {diff.max():.4f}  mean |diff| {diff.mean():.5f}")
+            if name == 'stage':
+                line += f"  accuracy {np.mean(predicted == labels):.3f}"
+            print(line)
+            failed |= agreement < args.min_agreement
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+from data_pipeline import TABULAR_COLUMNS, split_metadata
+from hybrid_model import stage_embedding_model
+from inference_backend import load_model
+from train_slim_delay_model import DATA_DIR, load_split
+from utils import preprocess_images
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STAGE_PATH = os.path.join(BASE_DIR, "progress_stage_model.h5")
+HYBRID_PATH = os.path.join(BASE_DIR, "delay_model.h5")
+SLIM_PATH = os.path.join(BASE_DIR, "delay_head_model.h5")
+
+
+def latency_ms(fn, runs):
+    for _ in range(3):
+        fn()
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return float(np.percentile(times, 50)), float(np.percentile(times, 95))
+
+
+def scores(probs, labels):
+    predicted = probs > 0.5
+    auc = roc_auc_score(labels, probs) if len(set(labels)) > 1 else float('nan')
+    return float(np.mean(predicted == labels)), auc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size, latency and accuracy of the hybrid vs slim delay models")
+    parser.add_argument('--csv', default=os.path.join(DATA_DIR, "metadata_autolabeled.csv"))
+    parser.add_argument('--images', default=os.path.join(DATA_DIR, "images"))
+    parser.add_argument('--batch-sizes', default="1,8")
+    parser.add_argument('--runs', type=int, default=30)
+    args = parser.parse_args()
+
+    stage = load_model(STAGE_PATH, backend='keras')
+    stage_embed = stage_embedding_model(stage)
+    hybrid = load_model(HYBRID_PATH, backend='keras')
+    slim = load_model(SLIM_PATH, backend='keras')
+
+    # Accuracy on the held-out split both training scripts leave untouched
+    _, _, test_df = split_metadata(pd.read_csv(args.csv))
+    test_images = preprocess_images([os.path.join(args.images, name) for name in test_df['image']])
+    test_tab = test_df[TABULAR_COLUMNS].to_numpy(dtype=np.float32)
+    labels = test_df['delayed'].to_numpy()
+    hybrid_scores = scores(np.asarray(hybrid.predict([test_images, test_tab], verbose=0))[:, 0], labels)
+    _, _, (test_emb, slim_tab, slim_labels) = load_split(args.csv, args.images)
+    slim_scores = scores(np.asarray(slim.predict([test_emb, slim_tab], verbose=0))[:, 0], slim_labels)
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for name, model, path, acc in (('hybrid', hybrid, HYBRID_PATH, hybrid_scores),
+                                   ('slim', slim, SLIM_PATH, slim_scores)):
+        timings = {}
+        for batch_size in (int(b) for b in args.batch_sizes.split(',')):
+            images = rng.random((batch_size, 224, 224, 3), dtype=np.float32)
+            tabular = rng.random((batch_size, 3), dtype=np.float32) * 100
+            if name == 'hybrid':
+                # Stage classifier, then the delay model encodes the photo again
+                head = lambda: model.predict_on_batch([images, tabular])
+                total = lambda: (stage.predict_on_batch(images), model.predict_on_batch([images, tabular]))
+            else:
+                # One stage pass yields the embedding; the head only sees vectors
+                embeddings = np.asarray(stage_embed.predict_on_batch(images)[1])
+                head = lambda: model.predict_on_batch([embeddings, tabular])
+                total = lambda: model.predict_on_batch([np.asarray(stage_embed.predict_on_batch(images)[1]), tabular])
+            timings[batch_size] = (latency_ms(head, args.runs), latency_ms(total, args.runs))
+        rows.append((name, model.count_params(), os.path.getsize(path) / 1e6, acc, timings))
+
+    print(f"{len(labels)} test rows\n")
+    for name, params, size, (accuracy, auc), timings in rows:
+        print(f"{name:<7} params {params:>10,}  file {size:6.2f} MB  accuracy {accuracy:.3f}  AUC {auc:.3f}")
+        for batch_size, ((head_p50, head_p95), (total_p50, total_p95)) in timings.items():
+            print(f"        batch {batch_size:<3} delay model p50 {head_p50:7.2f} / p95 {head_p95:7.2f} ms   "
+                  f"stage + delay p50 {total_p50:7.2f} / p95 {total_p95:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
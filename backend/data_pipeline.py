@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+
+from utils import IMAGE_SIZE
+
+TABULAR_COLUMNS = ['timeline_days', 'progress_percent', 'budget_utilized_percent']
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def split_metadata(df, test_size=0.2, validation_split=0.2, random_state=42):
+    """Split metadata rows into train/validation/test the way train_model.py always has.
+
+    The test split is random; validation is the last ``validation_split`` of the
+    training rows, matching Keras' ``validation_split``.
+    """
+    train_df, test_df = train_test_split(df, test_size=test_size, random_state=random_state)
+    split = int(len(train_df) * (1 - validation_split))
+    return train_df.iloc[:split], train_df.iloc[split:], test_df
+
+
+def decode_image(path):
+    """Read, decode and resize one image inside the graph, scaled to [0, 1] like preprocess_image."""
+    raw = tf.io.read_file(path)
+    img = tf.io.decode_image(raw, channels=3, expand_animations=False)
+    img = tf.image.resize(img, (IMAGE_SIZE[1], IMAGE_SIZE[0]), method='bicubic', antialias=True)
+    return tf.clip_by_value(img / 255.0, 0.0, 1.0)
+
+
+def make_dataset(df, image_dir, batch_size=32, shuffle=False, store=None, cache=None,
+                 shuffle_buffer=1024, seed=42):
+    """Stream ``((image, tabular), delayed)`` batches for ``hybrid_model.build_model``.
+
+    Only filenames and the small tabular columns are held in memory; pixels are
+    produced per batch. With ``store`` (an ``image_store.ImageStore``) pixels
+    are gathered from the memory-mapped store. Otherwise JPEGs are decoded on
+    all cores by ``tf.data``; pass ``cache`` (a file path, or ``""`` for memory)
+    to keep decoded images after the first epoch.
+    """
+    tabular = df[TABULAR_COLUMNS].values.astype(np.float32)
+    labels = df['delayed'].values.astype(np.float32)
+
+    if store is not None:
+        ds = tf.data.Dataset.from_tensor_slices((store.rows(df['image']), tabular, labels))
+        if shuffle:
+            ds = ds.shuffle(len(df), seed=seed, reshuffle_each_iteration=True)
+        ds = ds.batch(batch_size)
+
+        def gather(rows, tab, label):
+            images = tf.numpy_function(store.batch, [rows], tf.float32)
+            images.set_shape((None, IMAGE_SIZE[1], IMAGE_SIZE[0], 3))
+            return (images, tab), label
+
+        return ds.map(gather, num_parallel_calls=AUTOTUNE).prefetch(AUTOTUNE)
+
+    paths = [os.path.join(image_dir, fname) for fname in df['image']]
+    ds = tf.data.Dataset.from_tensor_slices((paths, tabular, labels))
+    if shuffle and cache is None:
+        # Shuffling filenames is free, so shuffle the whole epoch before decoding
+        ds = ds.shuffle(len(df), seed=seed, reshuffle_each_iteration=True)
+
+    ds = ds.map(
+        lambda path, tab, label: ((decode_image(path), tab), label),
+        num_parallel_calls=AUTOTUNE,
+        deterministic=not shuffle,
+    )
+    if cache is not None:
+        # Cached elements are decoded images, so shuffle within a bounded buffer afterwards
+        ds = ds.cache(cache)
+        if shuffle:
+            ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    return ds.batch(batch_size).prefetch(AUTOTUNE)
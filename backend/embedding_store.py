@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from image_store import _fingerprint
+from prediction_cache import image_key
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_DIR = "../data/cache/embedding_store"
+STAGE_MODEL_PATH = os.path.join(BASE_DIR, "progress_stage_model.h5")
+ARRAY_FILE = "embeddings.npy"
+INDEX_FILE = "index.json"
+
+
+def _content_hash(path):
+    with open(path, "rb") as f:
+        return image_key(f.read())
+
+
+def _embed(paths, batch_size):
+    # Imported here so opening a fresh store never loads TensorFlow or YOLO
+    from progress_model import embed_images
+    return embed_images(paths, batch_size=batch_size)
+
+
+class EmbeddingStore:
+    """Stage-model embeddings of each distinct photo in a float16 ``.npy`` file.
+
+    Rows are keyed by content hash, so files with identical bytes share one
+    row; ``index`` maps each source filename to its row. The stage model's
+    fingerprint is recorded, and a retrained model invalidates every row.
+    """
+
+    def __init__(self, store_dir):
+        with open(os.path.join(store_dir, INDEX_FILE)) as f:
+            meta = json.load(f)
+        self.store_dir = store_dir
+        self.image_dir = meta['image_dir']
+        self.model = meta['model']
+        self.hashes = meta['hashes']
+        self.index = meta['files']
+        self.sources = meta['sources']
+        self.array = np.load(os.path.join(store_dir, ARRAY_FILE), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.hashes)
+
+    @property
+    def dim(self):
+        return self.array.shape[1]
+
+    def lookup(self, filenames):
+        """float32 embeddings for ``filenames``, one row per name (repeats allowed)."""
+        rows = np.array([self.index[fname] for fname in filenames], dtype=np.int64)
+        return np.asarray(self.array[rows], dtype=np.float32)
+
+    def by_hash(self):
+        return {image_hash: row for row, image_hash in enumerate(self.hashes)}
+
+    def is_fresh(self, image_dir, filenames, model_path=STAGE_MODEL_PATH):
+        """True if the store covers ``filenames`` with the current stage model and unchanged files."""
+        if os.path.abspath(image_dir) != self.image_dir or self.model != _fingerprint(model_path):
+            return False
+        for fname in set(filenames):
+            if fname not in self.index:
+                return False
+            path = os.path.join(image_dir, fname)
+            if not os.path.exists(path) or _fingerprint(path) != self.sources[fname]:
+                return False
+        return True
+
+
+def build_embedding_store(image_dir, filenames, store_dir=DEFAULT_STORE_DIR, model_path=STAGE_MODEL_PATH,
+                          batch_size=32, previous=None, embed=_embed):
+    """Embed every distinct image once and write the embeddings to ``store_dir``.
+
+    Rows of ``previous`` (an older store built with the same stage model) are
+    copied by content hash, so only new or edited photos go through the model.
+    """
+    files = sorted(set(filenames))
+    hashes = {fname: _content_hash(os.path.join(image_dir, fname)) for fname in files}
+    unique = list(dict.fromkeys(hashes[fname] for fname in files))
+
+    model = _fingerprint(model_path)
+    reusable = previous.by_hash() if previous is not None and previous.model == model else {}
+    missing = [image_hash for image_hash in unique if image_hash not in reusable]
+    path_of = {}
+    for fname in files:
+        path_of.setdefault(hashes[fname], os.path.join(image_dir, fname))
+    computed = dict(zip(missing, embed([path_of[image_hash] for image_hash in missing], batch_size))) \
+        if missing else {}
+
+    if computed:
+        dim = len(next(iter(computed.values())))
+    elif previous is not None:
+        dim = previous.dim
+    else:
+        dim = 0
+    os.makedirs(store_dir, exist_ok=True)
+
+    # Write to temporary names first so a crashed build never looks valid
+    array_tmp = os.path.join(store_dir, ARRAY_FILE + ".tmp")
+    index_tmp = os.path.join(store_dir, INDEX_FILE + ".tmp")
+    array = np.lib.format.open_memmap(array_tmp, mode='w+', dtype=np.float16, shape=(len(unique), dim))
+    for row, image_hash in enumerate(unique):
+        array[row] = computed[image_hash] if image_hash in computed else previous.array[reusable[image_hash]]
+    array.flush()
+    del array
+
+    row_of = {image_hash: row for row, image_hash in enumerate(unique)}
+    with open(index_tmp, 'w') as f:
+        json.dump({
+            'image_dir': os.path.abspath(image_dir),
+            'model': model,
+            'hashes': unique,
+            'files': {fname: row_of[hashes[fname]] for fname in files},
+            'sources': {fname: _fingerprint(os.path.join(image_dir, fname)) for fname in files},
+        }, f)
+    if previous is not None:
+        # Release the old memory map before its file is replaced
+        previous.array = None
+    os.replace(array_tmp, os.path.join(store_dir, ARRAY_FILE))
+    os.replace(index_tmp, os.path.join(store_dir, INDEX_FILE))
+    print(f"Embedded {len(computed)} images, reused {len(unique) - len(computed)}")
+    return EmbeddingStore(store_dir)
+
+
+def open_embedding_store(image_dir, filenames, store_dir=DEFAULT_STORE_DIR, model_path=STAGE_MODEL_PATH,
+                         batch_size=32, embed=_embed):
+    """Open the store, first embedding any photo that is new, edited or from an older stage model."""
+    filenames = list(filenames)
+    previous = None
+    if os.path.exists(os.path.join(store_dir, INDEX_FILE)):
+        try:
+            previous = EmbeddingStore(store_dir)
+            if previous.is_fresh(image_dir, filenames, model_path):
+                return previous
+        except (OSError, ValueError, KeyError):
+            previous = None
+        print("Embedding store is stale, updating")
+    return build_embedding_store(image_dir, filenames, store_dir, model_path, batch_size, previous, embed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute stage-model embeddings for delay-model training")
+    parser.add_argument('--csv', default="../data/metadata_autolabeled.csv")
+    parser.add_argument('--images', default="../data/images")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    import pandas as pd
+    filenames = pd.read_csv(args.csv)['image']
+    store = open_embedding_store(args.images, filenames, args.store, batch_size=args.batch_size)
+    print(f"✅ {len(store)} embeddings of size {store.dim} ({store.array.nbytes / 1e6:.1f} MB) in {args.store}")
+
+
+if __name__ == "__main__":
+    main()
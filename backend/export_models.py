@@ -0,0 +1,102 @@
+import argparse
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+from inference_backend import QUANTIZATIONS, tflite_path
+from utils import preprocess_images
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "..", "data")
+
+# h5 path and Keras input names (needed to order multi-input TFLite models) of each served model
+MODELS = {
+    'stage': (os.path.join(BASE_DIR, "progress_stage_model.h5"), None),
+    'delay': (os.path.join(BASE_DIR, "delay_model.h5"), ('image_input', 'tabular_input')),
+}
+
+
+def stage_samples(stage_dir=os.path.join(DATA_DIR, "stage_data"), limit=None, seed=42):
+    """(path, stage) pairs from the stage_<n> folders used to train the stage model."""
+    samples = []
+    for folder in sorted(os.listdir(stage_dir)):
+        if not folder.startswith("stage_"):
+            continue
+        label = int(folder.split("_")[1])
+        folder_path = os.path.join(stage_dir, folder)
+        samples += [(os.path.join(folder_path, name), label) for name in sorted(os.listdir(folder_path))]
+    if limit and len(samples) > limit:
+        samples = random.Random(seed).sample(samples, limit)
+    return samples
+
+
+def tabular_samples(count, csv=os.path.join(DATA_DIR, "metadata_autolabeled.csv"), seed=42):
+    """``count`` rows of delay-model tabular inputs, cycling through the labelled metadata."""
+    df = pd.read_csv(csv)[['timeline_days', 'progress_percent', 'budget_utilized_percent']]
+    rows = df.sample(frac=1, random_state=seed).to_numpy(dtype=np.float32)
+    return rows[np.arange(count) % len(rows)]
+
+
+def representative_dataset(name, images, tabular):
+    """Calibration inputs for full-integer quantization, one sample at a time."""
+    def generate():
+        for i in range(len(images)):
+            if name == 'delay':
+                yield [images[i:i + 1], tabular[i:i + 1]]
+            else:
+                yield [images[i:i + 1]]
+    return generate
+
+
+def convert(model, quantization, dataset=None):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        # Integer kernels throughout; inputs and outputs stay float so callers are unchanged
+        converter.representative_dataset = dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    # 'dynamic': int8 weights, activations quantized on the fly
+    return converter.convert()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the Keras models as quantized TFLite files")
+    parser.add_argument('--models', default=','.join(MODELS))
+    parser.add_argument('--quantizations', default=','.join(QUANTIZATIONS))
+    parser.add_argument('--calibration-images', type=int, default=200,
+                        help="stage_data images used to calibrate int8 activations")
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    quantizations = args.quantizations.split(',')
+    unknown = set(quantizations) - set(QUANTIZATIONS)
+    if unknown:
+        parser.error(f"unknown quantization: {', '.join(sorted(unknown))}")
+
+    images = tabular = None
+    if 'int8' in quantizations:
+        paths = [path for path, _ in stage_samples(limit=args.calibration_images)]
+        images = preprocess_images(paths, dtype=np.float32)
+        tabular = tabular_samples(len(paths))
+
+    for name in args.models.split(','):
+        h5_path, _ = MODELS[name]
+        model = load_model(h5_path)
+        print(f"{name}: {h5_path} ({os.path.getsize(h5_path) / 1e6:.1f} MB)")
+        for quantization in quantizations:
+            dataset = representative_dataset(name, images, tabular) if quantization == 'int8' else None
+            out = tflite_path(h5_path, quantization)
+            with open(out, 'wb') as f:
+                f.write(convert(model, quantization, dataset))
+            print(f"  {quantization:<8} -> {out} ({os.path.getsize(out) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
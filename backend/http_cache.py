@@ -0,0 +1,127 @@
+"""Conditional GET support for the read endpoints.
+
+Every write to a tracked table bumps that table's row in ``table_versions``
+(created by migration 3) inside the same transaction, whether it goes through
+a session flush or an ORM bulk ``update()``/``insert()``/``delete()``. A read
+endpoint's ETag is derived from the versions of the tables it reads plus the
+request itself, so checking it costs one primary-key lookup and a matching
+``If-None-Match`` is answered with 304 before any query or serialization runs.
+
+Because the versions live in the database they stay correct across restarts
+and across several server processes. Rendered bodies are additionally kept in
+an in-process cache keyed by the ETag, which is cleared after any commit that
+bumped a version.
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, request
+from sqlalchemy import bindparam, event, text
+from werkzeug.http import is_resource_modified
+
+TRACKED_TABLES = ('projects', 'comments', 'users')
+
+_BUMP = text(
+    "UPDATE table_versions SET version = version + 1, updated_at = :now WHERE name IN :names"
+).bindparams(bindparam('names', expanding=True))
+_SELECT = text(
+    "SELECT name, version, updated_at FROM table_versions WHERE name IN :names"
+).bindparams(bindparam('names', expanding=True))
+
+
+class TableVersions:
+    """Per-table write counters kept in the ``table_versions`` table."""
+
+    def __init__(self, db, tables=TRACKED_TABLES, on_change=None):
+        self.db = db
+        self.tables = frozenset(tables)
+        self.on_change = on_change
+
+    def install(self):
+        session = self.db.session
+        event.listen(session, 'after_flush', self._after_flush)
+        event.listen(session, 'do_orm_execute', self._do_orm_execute)
+        event.listen(session, 'after_commit', self._after_commit)
+        event.listen(session, 'after_rollback', self._after_rollback)
+
+    def _bump(self, session, names):
+        names = sorted(self.tables.intersection(names))
+        if names:
+            session.connection().execute(_BUMP, {'now': datetime.utcnow().isoformat(' '), 'names': names})
+            session.info.setdefault('bumped_tables', set()).update(names)
+
+    def _after_flush(self, session, flush_context):
+        # new/dirty/deleted still describe what this flush wrote
+        changed = [*session.new, *session.deleted, *(obj for obj in session.dirty if session.is_modified(obj))]
+        self._bump(session, {obj.__table__.name for obj in changed if hasattr(obj, '__table__')})
+
+    def _do_orm_execute(self, state):
+        if state.is_update or state.is_insert or state.is_delete:
+            table = getattr(state.statement, 'table', None)
+            if table is not None:
+                self._bump(state.session, {table.name})
+
+    def _after_commit(self, session):
+        bumped = session.info.pop('bumped_tables', None)
+        if bumped and self.on_change:
+            self.on_change(bumped)
+
+    def _after_rollback(self, session):
+        session.info.pop('bumped_tables', None)
+
+    def current(self, tables):
+        """Return ({table: version}, last modified datetime) for ``tables``."""
+        rows = self.db.session.execute(_SELECT, {'names': sorted(tables)}).all()
+        versions = {name: version for name, version, _ in rows}
+        # Stored as ISO text, which sorts chronologically
+        last_modified = max((updated_at for _, _, updated_at in rows if updated_at), default=None)
+        return versions, datetime.fromisoformat(last_modified) if last_modified else None
+
+
+def conditional_get(versions, cache, tables, identity=None):
+    """Decorator adding ETag/Last-Modified validation and a response cache to a GET view.
+
+    ``identity`` returns what, besides the URL, the response depends on (the
+    JWT user for per-user endpoints); it is folded into the ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            current, last_modified = versions.current(tables)
+            who = identity() if identity else None
+            etag = hashlib.sha1(
+                f"{sorted(current.items())}|{request.full_path}|{who}|{request.accept_mimetypes}".encode()
+            ).hexdigest()
+            if last_modified is not None:
+                last_modified = last_modified.replace(microsecond=0)
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+                return _validators(response, etag, last_modified, who)
+
+            cached = cache.get(etag)
+            if cached is not None:
+                body, status, headers = cached
+                response = current_app.response_class(body, status=status, headers=headers)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    headers = [(k, v) for k, v in response.headers if k.lower() != 'content-length']
+                    cache.set(etag, (response.get_data(), response.status_code, headers))
+                elif response.status_code != 200:
+                    return response
+            return _validators(response, etag, last_modified, who)
+        return wrapper
+    return decorator
+
+
+def _validators(response, etag, last_modified, who):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Let browsers keep the body but revalidate on every use
+    response.headers['Cache-Control'] = 'private, no-cache' if who is not None else 'no-cache'
+    if who is not None:
+        response.vary.add('Authorization')
+    return response
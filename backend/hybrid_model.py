@@ -1,5 +1,7 @@
 from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Input, Dense, Conv2D, MaxPooling2D, Flatten, concatenate
+from tensorflow.keras.layers import (
+    Input, Dense, Conv2D, MaxPooling2D, Flatten, GlobalAveragePooling2D, Dropout, Normalization, concatenate,
+)
 from tensorflow.keras.optimizers import Adam
 
 def build_model():
@@ -19,4 +21,38 @@ def build_model():
 
     model = Model(inputs=[img_input, tab_input], outputs=z)
     model.compile(optimizer=Adam(0.001), loss='binary_crossentropy', metrics=['accuracy'])
-    return model;
\ No newline at end of file
+    return model;
+
+def stage_embedding_model(stage_model):
+    """The stage classifier with its pooled MobileNetV2 features as a second output.
+
+    One forward pass gives both the stage probabilities and the embedding the
+    slim delay head consumes, so a photo is only encoded once per request.
+    """
+    pooled = next(layer for layer in stage_model.layers if isinstance(layer, GlobalAveragePooling2D))
+    return Model(inputs=stage_model.input, outputs=[stage_model.output, pooled.output])
+
+def build_slim_model(embedding_dim=1280, tabular=None):
+    """Delay head over a stage-model embedding and the tabular inputs.
+
+    Replaces the flattened 54x54x64 conv map of ``build_model`` with the
+    already computed embedding, leaving a small MLP to train. Pass the training
+    ``tabular`` rows to fit the normalization of days and percentages.
+    """
+    emb_input = Input(shape=(embedding_dim,), name="embedding_input")
+    x = Dropout(0.2)(emb_input)
+    x = Dense(32, activation='relu')(x)
+
+    tab_input = Input(shape=(3,), name="tabular_input")
+    norm = Normalization(name="tabular_norm")
+    if tabular is not None:
+        norm.adapt(tabular)
+    y = Dense(16, activation='relu')(norm(tab_input))
+
+    combined = concatenate([x, y])
+    z = Dense(16, activation='relu')(combined)
+    z = Dense(1, activation='sigmoid')(z)
+
+    model = Model(inputs=[emb_input, tab_input], outputs=z)
+    model.compile(optimizer=Adam(0.001), loss='binary_crossentropy', metrics=['accuracy'])
+    return model
@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from utils import IMAGE_SIZE, preprocess_images
+
+DEFAULT_STORE_DIR = "../data/cache/image_store"
+ARRAY_FILE = "images.npy"
+INDEX_FILE = "index.json"
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class ImageStore:
+    """Preprocessed images kept in a uint8 ``.npy`` file and read through a memory map.
+
+    ``index`` maps each source filename to its row, so rows are only paged in
+    when a batch actually touches them.
+    """
+
+    def __init__(self, store_dir):
+        with open(os.path.join(store_dir, INDEX_FILE)) as f:
+            meta = json.load(f)
+        self.store_dir = store_dir
+        self.image_dir = meta['image_dir']
+        self.index = {fname: row for row, fname in enumerate(meta['files'])}
+        self.sources = meta['sources']
+        self.array = np.load(os.path.join(store_dir, ARRAY_FILE), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.index)
+
+    def rows(self, filenames):
+        return np.array([self.index[fname] for fname in filenames], dtype=np.int64)
+
+    def batch(self, rows, dtype=np.float32):
+        """Gather rows and scale them to [0, 1] the way ``preprocess_image`` does."""
+        rows = np.asarray(rows)
+        # Fancy indexing needs sorted reads to stay sequential on disk
+        order = np.argsort(rows)
+        pixels = np.empty((len(rows),) + self.array.shape[1:], dtype=np.uint8)
+        pixels[order] = self.array[rows[order]]
+        return pixels.astype(dtype) / dtype(255.0)
+
+    def is_fresh(self, image_dir, filenames):
+        """True if the store covers ``filenames`` and none of the source files changed."""
+        if os.path.abspath(image_dir) != self.image_dir:
+            return False
+        for fname in set(filenames):
+            if fname not in self.index:
+                return False
+            path = os.path.join(image_dir, fname)
+            if not os.path.exists(path) or _fingerprint(path) != self.sources[fname]:
+                return False
+        return True
+
+
+def build_image_store(image_dir, filenames, store_dir=DEFAULT_STORE_DIR, chunk_size=256):
+    """Decode every distinct image once and write the uint8 pixels to a memory-mapped store."""
+    files = sorted(set(filenames))
+    os.makedirs(store_dir, exist_ok=True)
+
+    # Write to temporary names first so a crashed build never looks valid
+    array_tmp = os.path.join(store_dir, ARRAY_FILE + ".tmp")
+    index_tmp = os.path.join(store_dir, INDEX_FILE + ".tmp")
+    array = np.lib.format.open_memmap(
+        array_tmp, mode='w+', dtype=np.uint8, shape=(len(files), IMAGE_SIZE[1], IMAGE_SIZE[0], 3)
+    )
+    for start in range(0, len(files), chunk_size):
+        chunk = files[start:start + chunk_size]
+        array[start:start + len(chunk)] = preprocess_images(
+            [os.path.join(image_dir, fname) for fname in chunk], dtype=np.uint8
+        )
+    array.flush()
+    del array
+
+    with open(index_tmp, 'w') as f:
+        json.dump({
+            'image_dir': os.path.abspath(image_dir),
+            'files': files,
+            'sources': {fname: _fingerprint(os.path.join(image_dir, fname)) for fname in files},
+        }, f)
+    os.replace(array_tmp, os.path.join(store_dir, ARRAY_FILE))
+    os.replace(index_tmp, os.path.join(store_dir, INDEX_FILE))
+    return ImageStore(store_dir)
+
+
+def open_image_store(image_dir, filenames, store_dir=DEFAULT_STORE_DIR):
+    """Open the store, rebuilding it first if it is missing or any source image changed."""
+    filenames = list(filenames)
+    if os.path.exists(os.path.join(store_dir, INDEX_FILE)):
+        try:
+            store = ImageStore(store_dir)
+            if store.is_fresh(image_dir, filenames):
+                return store
+        except (OSError, ValueError, KeyError):
+            pass
+        print("Image store is stale, rebuilding")
+    return build_image_store(image_dir, filenames, store_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped preprocessed image store")
+    parser.add_argument('--csv', default="../data/metadata_autolabeled.csv")
+    parser.add_argument('--images', default="../data/images")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    args = parser.parse_args()
+
+    import pandas as pd
+    filenames = pd.read_csv(args.csv)['image']
+    store = build_image_store(args.images, filenames, args.store)
+    print(f"✅ Stored {len(store)} images ({store.array.nbytes / 1e6:.0f} MB) in {args.store}")
+
+
+if __name__ == "__main__":
+    main()
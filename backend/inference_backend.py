@@ -0,0 +1,137 @@
+"""Pluggable inference backend for the Keras models: full Keras or quantized TFLite.
+
+``MODEL_BACKEND=keras`` (the default) loads the ``.h5`` files as before.
+``MODEL_BACKEND=tflite`` loads the ``<name>_<MODEL_QUANTIZATION>.tflite`` file
+written next to it by ``export_models.py`` and runs it through the small
+``tflite_runtime`` package when installed (falling back to ``tf.lite``), so a
+CPU box does not need full TensorFlow just to serve predictions.
+
+Both kinds of model expose ``predict_on_batch``, taking one array or a list of
+arrays in the Keras input order, so callers do not care which one they got.
+"""
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'keras')
+MODEL_QUANTIZATION = os.environ.get('MODEL_QUANTIZATION', 'dynamic')
+TFLITE_THREADS = int(os.environ.get('TFLITE_THREADS', os.cpu_count() or 1))
+
+BACKENDS = ('keras', 'tflite')
+QUANTIZATIONS = ('float16', 'dynamic', 'int8')
+
+
+def tflite_path(h5_path, quantization=None):
+    root, _ = os.path.splitext(h5_path)
+    return f"{root}_{quantization or MODEL_QUANTIZATION}.tflite"
+
+
+def model_file(h5_path, backend=None, quantization=None):
+    """The file ``load_model`` reads for a model with the given backend."""
+    if (backend or MODEL_BACKEND) == 'keras':
+        return h5_path
+    return tflite_path(h5_path, quantization)
+
+
+def model_fingerprint(*paths):
+    """Short hash of the size and mtime of model files; changes when any of them is retrained or re-exported."""
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{os.path.basename(path)}:missing")
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:12]
+
+
+def backend_imports(backend=None):
+    """Heavy modules a backend imports, for the model registry's load timings."""
+    if (backend or MODEL_BACKEND) == 'keras':
+        return ('tensorflow',)
+    return ()
+
+
+def _interpreter_class():
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    return Interpreter
+
+
+class TFLiteModel:
+    """A TFLite model with the Keras ``predict_on_batch`` interface.
+
+    The interpreter is resized whenever the batch size changes and is guarded
+    by a lock, since one interpreter must not run on two threads at once.
+    Quantized (int8/uint8) inputs and outputs are converted with the scale and
+    zero point stored in the model, so callers always pass and get floats.
+    """
+
+    def __init__(self, path, input_names=None, num_threads=None):
+        self.path = path
+        self.interpreter = _interpreter_class()(model_path=path, num_threads=num_threads or TFLITE_THREADS)
+        self.interpreter.allocate_tensors()
+        self._lock = threading.Lock()
+        self._batch_size = None
+
+        inputs = self.interpreter.get_input_details()
+        if input_names:
+            # Converted models name inputs e.g. "serving_default_image_input:0"; match on the Keras name
+            order = [next(i for i, d in enumerate(inputs) if name in d['name']) for name in input_names]
+            inputs = [inputs[i] for i in order]
+        self._inputs = inputs
+        self._output = self.interpreter.get_output_details()[0]
+
+    def _resize(self, batch_size):
+        for detail in self._inputs:
+            self.interpreter.resize_tensor_input(detail['index'], [batch_size, *detail['shape'][1:]])
+        self.interpreter.allocate_tensors()
+        self._inputs = [
+            next(d for d in self.interpreter.get_input_details() if d['index'] == detail['index'])
+            for detail in self._inputs
+        ]
+        self._output = next(d for d in self.interpreter.get_output_details() if d['index'] == self._output['index'])
+        self._batch_size = batch_size
+
+    def predict_on_batch(self, inputs):
+        if not isinstance(inputs, (list, tuple)):
+            inputs = [inputs]
+        arrays = [np.asarray(x) for x in inputs]
+        with self._lock:
+            if arrays[0].shape[0] != self._batch_size:
+                self._resize(arrays[0].shape[0])
+            for detail, array in zip(self._inputs, arrays):
+                self.interpreter.set_tensor(detail['index'], _quantize(array, detail))
+            self.interpreter.invoke()
+            return _dequantize(self.interpreter.get_tensor(self._output['index']), self._output)
+
+
+def _quantize(array, detail):
+    dtype = detail['dtype']
+    if np.issubdtype(dtype, np.integer):
+        scale, zero_point = detail['quantization']
+        info = np.iinfo(dtype)
+        return np.clip(np.round(array / scale + zero_point), info.min, info.max).astype(dtype)
+    return array.astype(dtype, copy=False)
+
+
+def _dequantize(array, detail):
+    if np.issubdtype(detail['dtype'], np.integer):
+        scale, zero_point = detail['quantization']
+        return (array.astype(np.float32) - zero_point) * scale
+    return array
+
+
+def load_model(h5_path, input_names=None, backend=None, quantization=None):
+    """Load a model for inference with the configured backend."""
+    backend = backend or MODEL_BACKEND
+    if backend == 'keras':
+        from tensorflow.keras.models import load_model as load_keras_model
+        return load_keras_model(h5_path)
+    if backend == 'tflite':
+        return TFLiteModel(tflite_path(h5_path, quantization), input_names=input_names)
+    raise ValueError(f"Unknown MODEL_BACKEND '{backend}'; expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class BatchingQueue:
+    """Coalesce concurrent inference requests into batched model calls.
+
+    Callers submit one item at a time and get back their own result. A single
+    worker thread collects items until either ``max_batch_size`` items are
+    waiting or ``max_wait_ms`` has passed since the first one arrived, then
+    hands the whole batch to ``batch_fn``, which must return one result per item
+    in the same order.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=8, max_wait_ms=5.0, name="inference"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000.0
+        self.name = name
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._stopped = False
+
+        # Metrics
+        self._batches = 0
+        self._items = 0
+        self._max_depth = 0
+        self._batch_sizes = {}
+        self._busy_seconds = 0.0
+        self._wait_seconds = 0.0
+
+    def submit(self, item):
+        """Queue a single item and return a Future for its result."""
+        future = Future()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError(f"{self.name} queue has been stopped")
+            self._ensure_worker()
+            self._pending.append((item, future, time.perf_counter()))
+            self._max_depth = max(self._max_depth, len(self._pending))
+            self._cond.notify()
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Submit an item and block until its result is ready."""
+        return self.submit(item).result(timeout=timeout)
+
+    def stop(self):
+        """Stop the worker thread once the already queued items are served."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join()
+
+    def metrics(self):
+        with self._cond:
+            return {
+                'name': self.name,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'queue_depth': len(self._pending),
+                'max_queue_depth': self._max_depth,
+                'batches': self._batches,
+                'items': self._items,
+                'avg_batch_size': round(self._items / self._batches, 2) if self._batches else 0.0,
+                'batch_size_histogram': {str(k): v for k, v in sorted(self._batch_sizes.items())},
+                'avg_queue_wait_ms': round(self._wait_seconds * 1000.0 / self._items, 2) if self._items else 0.0,
+                'avg_batch_ms': round(self._busy_seconds * 1000.0 / self._batches, 2) if self._batches else 0.0,
+            }
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+            self._worker.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                if self._stopped:
+                    return []
+                self._cond.wait()
+
+            # Hold the batch open until it is full or the first item has waited long enough
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size and not self._stopped:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            size = min(len(self._pending), self.max_batch_size)
+            return [self._pending.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name} batch returned {len(results)} results for {len(items)} items"
+                    )
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+            finished = time.perf_counter()
+
+            with self._cond:
+                self._batches += 1
+                self._items += len(batch)
+                self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+                self._busy_seconds += finished - started
+                self._wait_seconds += sum(started - queued_at for _, _, queued_at in batch)
@@ -0,0 +1,191 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from serializers import dumps
+
+JOB_FIELDS = ('id', 'kind', 'owner', 'status', 'submitted_at', 'started_at', 'finished_at', 'result', 'error')
+
+
+class JobQueue:
+    """In-process background job runner with status polling and timing metrics.
+
+    ``submit`` returns a job id immediately and runs the callable on one of
+    ``workers`` threads, which share the models already loaded in this process.
+    Job records (status, timestamps, JSON result or error) are kept for the
+    last ``max_jobs`` jobs. When ``persist_path`` is set they are also written
+    to SQLite, so any process serving the same app can answer a status poll
+    and finished results survive a restart. Each job records the ``owner``
+    who submitted it so that callers can restrict who may read its result.
+    """
+
+    def __init__(self, name, workers=2, max_jobs=1000, persist_path=None):
+        self.name = name
+        self.workers = int(workers)
+        self.max_jobs = int(max_jobs)
+        self.persist_path = persist_path
+
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{name}-job")
+        self._events = {}
+
+        # Metrics
+        self._counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+        self._max_queued = 0
+        self._timings = {}
+
+        if persist_path:
+            os.makedirs(os.path.dirname(os.path.abspath(persist_path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self._table} (id TEXT PRIMARY KEY, kind TEXT NOT NULL, "
+                    "owner INTEGER, status TEXT NOT NULL, submitted_at REAL NOT NULL, started_at REAL, "
+                    "finished_at REAL, result TEXT, error TEXT)"
+                )
+                # Stores written before jobs had an owner
+                columns = {row[1] for row in conn.execute(f"PRAGMA table_info({self._table})")}
+                if 'owner' not in columns:
+                    conn.execute(f"ALTER TABLE {self._table} ADD COLUMN owner INTEGER")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{self._table}_submitted ON {self._table} (submitted_at)")
+
+    @property
+    def _table(self):
+        return f"jobs_{self.name}"
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.persist_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, kind, fn, *args, owner=None, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` on behalf of ``owner`` and return the new job's id."""
+        job = dict.fromkeys(JOB_FIELDS)
+        job.update(id=uuid.uuid4().hex, kind=kind, owner=owner, status='queued', submitted_at=time.time())
+        with self._lock:
+            self._jobs[job['id']] = job
+            self._events[job['id']] = threading.Event()
+            self._counts['queued'] += 1
+            self._max_queued = max(self._max_queued, self._counts['queued'])
+            while len(self._jobs) > self.max_jobs and self._forget_oldest():
+                pass
+        self._save(job)
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job['id']
+
+    def _forget_oldest(self):
+        for job_id, job in self._jobs.items():
+            if job['status'] in ('done', 'failed'):
+                del self._jobs[job_id]
+                self._events.pop(job_id, None)
+                return True
+        # Everything is still pending; keep it rather than lose track of live jobs
+        return False
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            job.update(status='running', started_at=time.time())
+            self._counts['queued'] -= 1
+            self._counts['running'] += 1
+        self._save(job)
+        try:
+            result, error, status = fn(*args, **kwargs), None, 'done'
+        except Exception as e:
+            result, error, status = None, str(e), 'failed'
+
+        with self._lock:
+            job.update(status=status, finished_at=time.time(), result=result, error=error)
+            self._counts['running'] -= 1
+            self._counts[status] += 1
+            timing = self._timings.setdefault(job['kind'], {'jobs': 0, 'failed': 0, 'wait': 0.0, 'run': 0.0, 'max_run': 0.0})
+            run_seconds = job['finished_at'] - job['started_at']
+            timing['jobs'] += 1
+            timing['failed'] += status == 'failed'
+            timing['wait'] += job['started_at'] - job['submitted_at']
+            timing['run'] += run_seconds
+            timing['max_run'] = max(timing['max_run'], run_seconds)
+            event = self._events.get(job['id'])
+        self._save(job)
+        if event:
+            event.set()
+
+    def _save(self, job):
+        if not self.persist_path:
+            return
+        with self._lock:
+            row = [job[f] for f in JOB_FIELDS]
+        row[JOB_FIELDS.index('result')] = None if job['result'] is None else dumps(job['result']).decode()
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} ({', '.join(JOB_FIELDS)}) VALUES ({', '.join('?' * len(JOB_FIELDS))})",
+                row,
+            )
+            if job['status'] == 'queued':
+                conn.execute(
+                    f"DELETE FROM {self._table} WHERE id NOT IN "
+                    f"(SELECT id FROM {self._table} ORDER BY submitted_at DESC LIMIT ?)",
+                    (self.max_jobs,),
+                )
+
+    def get(self, job_id):
+        """Return the job record with timings in seconds, or None for an unknown id."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            job = dict(job) if job is not None else None
+        if job is None and self.persist_path:
+            with self._connect() as conn:
+                row = conn.execute(
+                    f"SELECT {', '.join(JOB_FIELDS)} FROM {self._table} WHERE id = ?", (job_id,)
+                ).fetchone()
+            if row is not None:
+                job = dict(zip(JOB_FIELDS, row))
+                job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        if job is None:
+            return None
+
+        now = time.time()
+        started, finished = job['started_at'], job['finished_at']
+        job['queue_seconds'] = round((started or now) - job['submitted_at'], 3)
+        job['run_seconds'] = round((finished or now) - started, 3) if started else None
+        return job
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes (or ``timeout`` passes) and return its record."""
+        with self._lock:
+            event = self._events.get(job_id)
+        if event is not None:
+            event.wait(timeout)
+        return self.get(job_id)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'workers': self.workers,
+                **self._counts,
+                'max_queued': self._max_queued,
+                'persistent': bool(self.persist_path),
+                'by_kind': {
+                    kind: {
+                        'jobs': t['jobs'],
+                        'failed': t['failed'],
+                        'avg_queue_seconds': round(t['wait'] / t['jobs'], 4),
+                        'avg_run_seconds': round(t['run'] / t['jobs'], 4),
+                        'max_run_seconds': round(t['max_run'], 4),
+                    }
+                    for kind, t in self._timings.items()
+                },
+            }
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
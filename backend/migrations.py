@@ -0,0 +1,111 @@
+"""Versioned schema migrations, applied at startup instead of dropping and recreating tables.
+
+Each migration runs once, in order, inside its own transaction, and is recorded
+in the ``schema_migrations`` table. Migration 1 creates any missing tables from
+the current models, so a fresh database ends up fully built by it; later
+migrations must therefore be idempotent (create indexes with ``checkfirst``,
+add columns only if they are missing) so they are no-ops on such a database
+and real upgrades on an existing one.
+"""
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+def create_indexes(db, conn, table, names):
+    """Create the named indexes declared on a model's table, skipping ones that exist."""
+    for index in db.metadata.tables[table].indexes:
+        if index.name in names:
+            index.create(conn, checkfirst=True)
+
+
+def add_column(conn, table, name, ddl):
+    """Add a column unless the table already has it."""
+    if name not in {column['name'] for column in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+@migration(1, 'Create base tables')
+def create_base_tables(db, conn):
+    db.metadata.create_all(conn, checkfirst=True)
+
+
+@migration(2, 'Add indexes for hot project and comment queries')
+def add_hot_query_indexes(db, conn):
+    create_indexes(db, conn, 'projects', {
+        'ix_projects_lat_lng', 'ix_projects_manager_status', 'ix_projects_status',
+        'ix_projects_created_at', 'ix_projects_last_prediction_date',
+    })
+    create_indexes(db, conn, 'comments', {'ix_comments_project_created', 'ix_comments_author_id'})
+
+
+@migration(3, 'Add per-table write counters for HTTP caching')
+def add_table_versions(db, conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS table_versions "
+        "(name VARCHAR(50) PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0, updated_at VARCHAR(32))"
+    ))
+    now = datetime.utcnow().isoformat(' ')
+    for table in ('projects', 'comments', 'users'):
+        conn.execute(text("INSERT OR IGNORE INTO table_versions (name, version, updated_at) VALUES (:n, 0, :t)"),
+                     {'n': table, 't': now})
+
+
+@migration(4, 'Add project_stats summary table for dashboard aggregates')
+def add_project_stats(db, conn):
+    from project_stats import CREATE_TABLE, rebuild
+    conn.execute(text(CREATE_TABLE))
+    rebuild(conn)
+
+
+@migration(5, 'Add dirty tracking columns for scheduled re-prediction')
+def add_prediction_tracking(db, conn):
+    add_column(conn, 'projects', 'inputs_changed_at', 'DATETIME')
+    add_column(conn, 'projects', 'prediction_model_version', 'VARCHAR(40)')
+    add_column(conn, 'projects', 'prediction_image_hash', 'VARCHAR(64)')
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations "
+        "(version INTEGER PRIMARY KEY, description VARCHAR(200) NOT NULL, applied_at DATETIME NOT NULL)"
+    ))
+
+
+def applied_versions(db):
+    with db.engine.begin() as conn:
+        _ensure_version_table(conn)
+        return [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+
+
+def run_migrations(db):
+    """Apply every pending migration; returns the versions that were applied."""
+    applied = set(applied_versions(db))
+    newly_applied = []
+    for version, description, fn in MIGRATIONS:
+        if version in applied:
+            continue
+        with db.engine.begin() as conn:
+            fn(db, conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {'v': version, 'd': description, 't': datetime.utcnow()},
+            )
+        print(f"Applied migration {version}: {description}")
+        newly_applied.append(version)
+    return newly_applied
+
+
+def schema_version(db):
+    versions = applied_versions(db)
+    return versions[-1] if versions else 0
@@ -0,0 +1,152 @@
+import importlib
+import threading
+import time
+from functools import partial
+
+from inference_backend import model_fingerprint
+
+
+def _apply(fn, args, kwargs, model):
+    return fn(model, *args, **kwargs)
+
+
+class ModelRegistry:
+    """Load ML models on first use instead of at import time.
+
+    Each model is registered with a loader function and the heavy framework
+    modules it needs (``tensorflow``, ``ultralytics``). Nothing is imported
+    until the model is first requested, either by ``get`` or by a background
+    ``warm_up`` thread, so importing the app stays cheap for routes and
+    scripts that never touch the models.
+
+    Models registered with the ``files`` they are read from also get a
+    ``fingerprint`` of those files, taken when the model is loaded, so callers
+    can tell which version of a model produced a result.
+
+    After ``use_model_server`` the models live in another process (see
+    ``model_server``): loading only asks that process to load them, and
+    ``get`` returns stand-ins whose method calls run there.
+    """
+
+    NOT_LOADED = 'not_loaded'
+    LOADING = 'loading'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def register(self, name, loader, imports=(), files=()):
+        with self._lock:
+            self._models[name] = {
+                'loader': loader,
+                'imports': tuple(imports),
+                'files': tuple(files),
+                'fingerprint': None,
+                'lock': threading.Lock(),
+                'state': self.NOT_LOADED,
+                'model': None,
+                'error': None,
+                'import_seconds': None,
+                'load_seconds': None,
+            }
+
+    def use_model_server(self, client):
+        """Serve every model from the model process behind ``client`` instead of loading it here."""
+        self._server = client
+
+    def get(self, name):
+        """Return the loaded model, loading it first if needed.
+
+        Raises RuntimeError if the model failed to load; the failure is kept so
+        later calls fail fast instead of retrying an expensive import.
+        """
+        entry = self._models[name]
+        if entry['state'] == self.READY:
+            return entry['model']
+
+        with entry['lock']:
+            if entry['state'] == self.NOT_LOADED:
+                self._load(name, entry)
+
+        if entry['state'] != self.READY:
+            raise RuntimeError(f"Model '{name}' could not be loaded: {entry['error']}")
+        return entry['model']
+
+    def _load(self, name, entry):
+        entry['state'] = self.LOADING
+        try:
+            started = time.perf_counter()
+            if self._server is None:
+                for module in entry['imports']:
+                    importlib.import_module(module)
+            imported = time.perf_counter()
+            entry['model'] = entry['loader']() if self._server is None else self._server.load(name)
+            loaded = time.perf_counter()
+            # After loading: a loader may write the file it then reads (e.g. a model trained on first use)
+            entry['fingerprint'] = model_fingerprint(*entry['files'])
+        except Exception as e:
+            print(f"Warning: model '{name}' could not be loaded: {e}")
+            entry['error'] = str(e)
+            entry['state'] = self.FAILED
+        else:
+            entry['import_seconds'] = round(imported - started, 3)
+            entry['load_seconds'] = round(loaded - imported, 3)
+            entry['state'] = self.READY
+
+    def run(self, name, fn, *args, **kwargs):
+        """Return ``fn(model, *args, **kwargs)``, run wherever the model lives.
+
+        ``fn`` must be a module-level function so it can be sent to the model
+        process; use this when the model's own return value is large or not
+        picklable and only part of it is needed.
+        """
+        model = self.get(name)
+        if self._server is None:
+            return fn(model, *args, **kwargs)
+        return self._server.call(name, partial(_apply, fn, args, kwargs))
+
+    def fingerprint(self, name):
+        """Fingerprint of a model's files as loaded, or as on disk now if it is not loaded; never loads it."""
+        entry = self._models[name]
+        if entry['state'] == self.READY:
+            return entry['fingerprint']
+        return model_fingerprint(*entry['files'])
+
+    def is_ready(self, *names):
+        names = names or tuple(self._models)
+        return all(self._models[name]['state'] == self.READY for name in names)
+
+    def warm_up(self, names=None, background=True):
+        """Load the given models (default: all), optionally on a daemon thread."""
+        names = list(names or self._models)
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except RuntimeError:
+                    pass
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name='model-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        return {
+            name: {
+                'state': entry['state'],
+                'import_seconds': entry['import_seconds'],
+                'load_seconds': entry['load_seconds'],
+                'fingerprint': entry['fingerprint'],
+                'error': entry['error'],
+            } for name, entry in self._models.items()
+        }
+
+
+registry = ModelRegistry()
@@ -0,0 +1,146 @@
+"""Serve the registry's models from one process to others over a local socket.
+
+``serve.py`` forks a single model process that owns TensorFlow, YOLO and the
+delay models; the web workers hold no model weights and send each model call
+to it instead. A worker's registry is switched to the model process with
+``registry.use_model_server(ModelClient(path))``: ``registry.get`` then returns
+a ``RemoteModel`` whose method calls (``predict_on_batch``, ``predict``) run
+in the model process, and ``registry.run(name, fn, ...)`` ships a module-level
+function there to run against the model, for calls whose result is not
+worth sending back as-is (e.g. YOLO results reduced to boxes).
+
+Requests and replies are length-prefixed pickles, so only trusted local
+processes may connect; the socket is a Unix socket created by ``serve.py``.
+"""
+import os
+import pickle
+import socket
+import struct
+import threading
+from operator import methodcaller
+
+_HEADER = struct.Struct('!Q')
+
+
+def send_message(sock, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(min(size - len(buf), 1 << 20))
+        if not chunk:
+            raise EOFError("model server connection closed")
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_message(sock):
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return pickle.loads(_recv_exactly(sock, size))
+
+
+def listen(path):
+    """Bind the model server's Unix socket; connections queue until the server accepts."""
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen(128)
+    return sock
+
+
+class ModelServer:
+    """Answer model calls from other processes, one thread per connection.
+
+    A request is ``(name, fn)``: the named model is loaded through the
+    registry if needed and the reply is ``fn(model)``, or None when ``fn`` is
+    None (a load request). Exceptions are sent back and re-raised by the
+    client.
+    """
+
+    def __init__(self, registry, sock):
+        self.registry = registry
+        self.sock = sock
+
+    def serve_forever(self):
+        while True:
+            conn, _ = self.sock.accept()
+            threading.Thread(target=self._handle, args=(conn,), name='model-conn', daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    name, fn = recv_message(conn)
+                except (EOFError, OSError):
+                    return
+                try:
+                    model = self.registry.get(name)
+                    reply = ('ok', fn(model) if fn is not None else None)
+                except Exception as e:
+                    reply = ('error', e)
+                try:
+                    send_message(conn, reply)
+                except (pickle.PicklingError, TypeError, AttributeError) as e:
+                    send_message(conn, ('error', RuntimeError(f"Unpicklable reply from model '{name}': {e}")))
+                except OSError:
+                    return
+
+
+class ModelClient:
+    """Connection to the model process; each thread gets its own socket."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    def call(self, name, fn=None):
+        try:
+            conn = self._connection()
+            send_message(conn, (name, fn))
+            status, value = recv_message(conn)
+        except (EOFError, OSError) as e:
+            # The model process went away; reconnect on the next call
+            conn = getattr(self._local, 'conn', None)
+            self._local.conn = None
+            if conn is not None:
+                conn.close()
+            raise RuntimeError(f"Model server unavailable: {e}") from e
+        if status == 'error':
+            raise value
+        return value
+
+    def load(self, name):
+        """Load a model in the model process and return a stand-in for it."""
+        self.call(name)
+        return RemoteModel(self, name)
+
+
+class RemoteModel:
+    """Stand-in for a model held by the model process; method calls run there."""
+
+    def __init__(self, client, name):
+        self._client = client
+        self._name = name
+
+    def __getattr__(self, method):
+        if method.startswith('__'):
+            raise AttributeError(method)
+
+        def call(*args, **kwargs):
+            return self._client.call(self._name, methodcaller(method, *args, **kwargs))
+        return call
+
+    def __repr__(self):
+        return f"RemoteModel({self._name!r})"
@@ -4,6 +4,17 @@ from datetime import datetime
 def create_project_models(db):
     class Project(db.Model):
         __tablename__ = 'projects'
+        __table_args__ = (
+            # Bounding-box lookups for the map endpoint
+            db.Index('ix_projects_lat_lng', 'latitude', 'longitude'),
+            # Official dashboard: projects by manager, optionally filtered by status
+            db.Index('ix_projects_manager_status', 'manager_id', 'status'),
+            db.Index('ix_projects_status', 'status'),
+            # Keyset pagination ordered by created_at
+            db.Index('ix_projects_created_at', 'created_at', 'id'),
+            # Stale prediction lookups for bulk refreshes
+            db.Index('ix_projects_last_prediction_date', 'last_prediction_date'),
+        )
         
         id = db.Column(db.Integer, primary_key=True)
         name = db.Column(db.String(100), nullable=False)
@@ -25,6 +36,11 @@ def create_project_models(db):
         confidence = db.Column(db.Float)  # 0-1 confidence score
         delay_probability = db.Column(db.Float)  # 0-1 delay probability
         last_prediction_date = db.Column(db.DateTime)
+        # Re-prediction scheduling: when the inputs last changed, and the models and photo
+        # the current prediction came from
+        inputs_changed_at = db.Column(db.DateTime)
+        prediction_model_version = db.Column(db.String(40))
+        prediction_image_hash = db.Column(db.String(64))
         
         # Relationships will be defined after all models are loaded
         
@@ -33,6 +49,11 @@ def create_project_models(db):
 
     class Comment(db.Model):
         __tablename__ = 'comments'
+        __table_args__ = (
+            # Comment threads are always read per project in created_at order
+            db.Index('ix_comments_project_created', 'project_id', 'created_at'),
+            db.Index('ix_comments_author_id', 'author_id'),
+        )
         
         id = db.Column(db.Integer, primary_key=True)
         content = db.Column(db.Text, nullable=False)
@@ -41,6 +62,10 @@ def create_project_models(db):
         created_at = db.Column(db.DateTime, default=datetime.utcnow)
         updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
         
+        # Lazy by default; list endpoints eager-load these explicitly
+        author = db.relationship('User')
+        project = db.relationship('Project', backref=db.backref('comments', lazy='dynamic'))
+        
         def __repr__(self):
             return f'<Comment {self.id}>'
     
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def image_key(data):
+    """Content hash of raw image bytes, used as the cache key for vision results."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def delay_key(image_hash, timeline_days, progress_percent, budget_utilized_percent):
+    """Cache key for the hybrid delay model: the image plus the tabular inputs it sees."""
+    return f"{image_hash}:{float(timeline_days):g}:{float(progress_percent):g}:{float(budget_utilized_percent):g}"
+
+
+class PredictionCache:
+    """Size-bounded LRU cache with per-entry TTL and an optional SQLite disk tier.
+
+    The in-memory tier holds at most ``max_entries`` values and evicts the least
+    recently used one first. When ``persist_path`` is set every write is also
+    stored on disk, so a restarted process can refill its memory tier on
+    demand. Entries older than ``ttl_seconds`` are treated as misses in both
+    tiers (``ttl_seconds=None`` disables expiry).
+    """
+
+    def __init__(self, name, max_entries=1024, ttl_seconds=3600, persist_path=None, max_disk_entries=None):
+        self.name = name
+        self.max_entries = int(max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self.max_disk_entries = max_disk_entries or self.max_entries * 10
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expired = 0
+
+        if persist_path:
+            os.makedirs(os.path.dirname(os.path.abspath(persist_path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self._table} "
+                    "(key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL)"
+                )
+                conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{self._table}_stored_at ON {self._table} (stored_at)")
+
+    @property
+    def _table(self):
+        return f"cache_{self.name}"
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.persist_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _is_expired(self, stored_at, now):
+        return self.ttl_seconds is not None and now - stored_at > self.ttl_seconds
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if not self._is_expired(stored_at, now):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._expired += 1
+
+        if self.persist_path:
+            with self._connect() as conn:
+                row = conn.execute(
+                    f"SELECT value, stored_at FROM {self._table} WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None and not self._is_expired(row[1], now):
+                value = pickle.loads(row[0])
+                with self._lock:
+                    self._disk_hits += 1
+                    self._store(key, value, row[1])
+                return value
+
+        with self._lock:
+            self._misses += 1
+        return default
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+
+        if self.persist_path:
+            with self._connect() as conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self._table} (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now),
+                )
+                self._prune_disk(conn, now)
+
+    def _store(self, key, value, stored_at):
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _prune_disk(self, conn, now):
+        if self.ttl_seconds is not None:
+            conn.execute(f"DELETE FROM {self._table} WHERE stored_at < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            f"DELETE FROM {self._table} WHERE key NOT IN "
+            f"(SELECT key FROM {self._table} ORDER BY stored_at DESC LIMIT ?)",
+            (self.max_disk_entries,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.persist_path:
+            with self._connect() as conn:
+                conn.execute(f"DELETE FROM {self._table}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'persistent': bool(self.persist_path),
+                'hits': self._hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expired': self._expired,
+                'hit_rate': round((self._hits + self._disk_hits) / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,312 @@
+"""Incremental re-prediction of projects whose prediction is out of date.
+
+A project is dirty when it was never predicted, when its prediction inputs
+changed after its last prediction, or when the model version it was
+predicted with is no longer current. Every predictor (image delay models and
+the tabular one) has its own current version, so a prediction made with any
+of them stays fresh until that predictor's models change. ``install`` stamps ``inputs_changed_at`` on every flush that
+creates a project or changes one of ``INPUT_COLUMNS``; ``check_images`` does
+the same for projects whose photo no longer matches the one they were
+predicted on.
+
+A background thread re-predicts dirty projects in batches while the process
+is idle (no request in flight for ``idle_seconds``). Projects that have
+waited longer than the freshness SLA are re-predicted even under traffic.
+Each run records its trigger, counts and timings for ``metrics``.
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect
+
+# Project columns the predictors read; changing any of them makes the prediction stale
+INPUT_COLUMNS = ('progress', 'status', 'start_date', 'end_date')
+
+
+class PredictionScheduler:
+    def __init__(self, app, db, project_model, predict, save, model_versions, image_path=None, image_hash=None,
+                 sla_seconds=3600, idle_seconds=10, interval=30, batch_size=32, max_runs=50):
+        self.app = app
+        self.db = db
+        self.Project = project_model
+        self.predict = predict              # predict(projects) -> results
+        self.save = save                    # save(results, predicted_at)
+        self.model_versions = model_versions  # model_versions() -> current versions; must not load models
+        self.image_path = image_path        # image_path(project) -> path or None
+        self.image_hash = image_hash        # image_hash(path) -> content hash or None
+        self.sla = timedelta(seconds=sla_seconds)
+        self.idle_seconds = idle_seconds
+        self.interval = interval
+        self.batch_size = int(batch_size)
+
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._in_flight = 0
+        self._last_request = time.monotonic()
+        self._runs = deque(maxlen=max_runs)
+        self._totals = {'runs': 0, 'predicted': 0, 'failed': 0, 'seconds': 0.0}
+        self._versions = None
+        self._versions_seen_at = None
+        self._images = {}  # photo path -> (size/mtime fingerprint, content hash)
+        self._thread = None
+        self._stop = threading.Event()
+
+    # Dirty tracking
+
+    def install(self):
+        event.listen(self.db.session, 'before_flush', self._before_flush)
+        self.app.before_request(self._request_started)
+        self.app.teardown_request(self._request_finished)
+
+    def _before_flush(self, session, flush_context, instances):
+        now = datetime.utcnow()
+        for obj in session.new:
+            if isinstance(obj, self.Project):
+                obj.inputs_changed_at = now
+        for obj in session.dirty:
+            if isinstance(obj, self.Project) and any(
+                inspect(obj).attrs[column].history.has_changes() for column in INPUT_COLUMNS
+            ):
+                obj.inputs_changed_at = now
+
+    def mark_dirty(self, project_ids):
+        """Mark projects for re-prediction, e.g. after their photo was replaced."""
+        if project_ids:
+            now = datetime.utcnow()
+            self.db.session.execute(self.db.update(self.Project),
+                                    [{'id': project_id, 'inputs_changed_at': now} for project_id in project_ids])
+            self.db.session.commit()
+
+    def _changed_photo(self, path):
+        """The photo's new content hash if it changed since the last check, else None."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        fingerprint = (stat.st_size, stat.st_mtime_ns)
+        known_fingerprint, known_hash = self._images.get(path, (None, None))
+        if fingerprint == known_fingerprint:
+            return None
+        current = self.image_hash(path)
+        self._images[path] = (fingerprint, current)
+        return current if current != known_hash else None
+
+    def check_images(self):
+        """Mark projects whose photo changed since their last prediction; returns how many."""
+        if not self.image_path or not self.image_hash:
+            return 0
+        Project = self.Project
+        if not self._images:
+            # First check: learn every photo in use, catching changes made while we were down
+            for project in Project.query.filter(Project.prediction_image_hash.isnot(None)):
+                self._images.setdefault(self.image_path(project), (None, None))
+        changed = {}
+        for path in list(self._images):
+            current = self._changed_photo(path)
+            if current is not None:
+                changed[path] = current
+        if not changed:
+            return 0
+        stale = []
+        for project in Project.query.filter(Project.prediction_image_hash.isnot(None)):
+            current = changed.get(self.image_path(project))
+            if current is not None and project.prediction_image_hash != current:
+                stale.append(project.id)
+        self.mark_dirty(stale)
+        return len(stale)
+
+    def _clauses(self, versions):
+        Project = self.Project
+        changed = self.db.func.coalesce(Project.inputs_changed_at, Project.created_at)
+        stale_inputs = self.db.or_(Project.last_prediction_date.is_(None), changed > Project.last_prediction_date)
+        stale_model = self.db.or_(
+            Project.prediction_model_version.is_(None), Project.prediction_model_version.notin_(versions)
+        )
+        return changed, stale_inputs, stale_model
+
+    def _current_versions(self):
+        versions = sorted(set(self.model_versions()))
+        if versions != self._versions:
+            self._versions, self._versions_seen_at = versions, datetime.utcnow()
+        return versions
+
+    def _dirty_query(self, versions, overdue_before=None):
+        changed, stale_inputs, stale_model = self._clauses(versions)
+        if overdue_before is None:
+            condition = self.db.or_(stale_inputs, stale_model)
+        else:
+            condition = self.db.and_(stale_inputs, changed < overdue_before)
+            if self._versions_seen_at < overdue_before:
+                condition = self.db.or_(condition, stale_model)
+        return self.db.select(self.Project.id).where(condition).order_by(changed, self.Project.id)
+
+    def backlog(self):
+        """Dirty project counts by reason and how long the oldest one has waited."""
+        versions = self._current_versions()
+        changed, stale_inputs, stale_model = self._clauses(versions)
+        Project, func = self.Project, self.db.func
+        never, inputs, model, oldest = self.db.session.execute(self.db.select(
+            func.count().filter(Project.last_prediction_date.is_(None)),
+            func.count().filter(Project.last_prediction_date.isnot(None), stale_inputs),
+            func.count().filter(self.db.not_(stale_inputs), stale_model),
+            func.min(changed).filter(stale_inputs),
+        )).one()
+        if model and (oldest is None or self._versions_seen_at < oldest):
+            oldest = self._versions_seen_at
+        return {
+            'dirty': never + inputs + model,
+            'never_predicted': never,
+            'inputs_changed': inputs,
+            'model_changed': model,
+            'oldest_wait_seconds': round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else None,
+        }
+
+    # Idle detection
+
+    def _request_started(self):
+        with self._lock:
+            self._in_flight += 1
+            self._last_request = time.monotonic()
+
+    def _request_finished(self, exc=None):
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._last_request = time.monotonic()
+
+    def is_idle(self):
+        with self._lock:
+            return self._in_flight == 0 and time.monotonic() - self._last_request >= self.idle_seconds
+
+    # Runs
+
+    def run(self, trigger='manual', limit=None):
+        """Re-predict dirty projects in batches and return the run record.
+
+        Idle runs stop as soon as a request arrives; SLA runs only take
+        projects that have waited longer than the SLA.
+        """
+        with self._run_lock:
+            return self._run(trigger, limit)
+
+    def _run(self, trigger, limit):
+        started = time.perf_counter()
+        record = {
+            'trigger': trigger, 'started_at': datetime.utcnow().isoformat(), 'finished_at': None,
+            'model_versions': self._current_versions(), 'batches': 0, 'predicted': 0, 'failed': 0,
+            'stopped_early': False, 'select_seconds': 0.0, 'predict_seconds': 0.0, 'save_seconds': 0.0,
+        }
+        record.update(backlog=self.backlog())
+        overdue_before = datetime.utcnow() - self.sla if trigger == 'sla' else None
+        # Projects handled in this run; a project edited meanwhile waits for the next run
+        seen = set()
+        try:
+            while True:
+                size = self.batch_size
+                if limit is not None:
+                    size = min(size, limit - record['predicted'] - record['failed'])
+                    if size <= 0:
+                        break
+                if trigger == 'idle' and record['batches'] and not self.is_idle():
+                    record['stopped_early'] = True
+                    break
+                t = time.perf_counter()
+                read_at = datetime.utcnow()
+                query = self._dirty_query(record['model_versions'], overdue_before)
+                if seen:
+                    query = query.where(self.Project.id.notin_(seen))
+                ids = self.db.session.execute(query.limit(size)).scalars().all()
+                projects = self.Project.query.filter(self.Project.id.in_(ids)).order_by(self.Project.id).all() \
+                    if ids else []
+                record['select_seconds'] += time.perf_counter() - t
+                if not projects:
+                    break
+                seen.update(ids)
+
+                t = time.perf_counter()
+                try:
+                    results = self.predict(projects)
+                except Exception as e:
+                    self.app.logger.warning(f"Re-prediction failed for {len(projects)} projects: {e}")
+                    self.db.session.rollback()
+                    record['failed'] += len(projects)
+                    continue
+                finally:
+                    record['predict_seconds'] += time.perf_counter() - t
+
+                t = time.perf_counter()
+                try:
+                    # Stamped with the time the inputs were read, so edits made meanwhile stay dirty
+                    self.save(results, read_at)
+                except Exception:
+                    self.db.session.rollback()
+                    raise
+                record['save_seconds'] += time.perf_counter() - t
+                record['batches'] += 1
+                record['predicted'] += len(results)
+                if self.image_path:
+                    by_id = {project.id: project for project in projects}
+                    for result in results:
+                        if result.get('image_hash'):
+                            # Watch this photo from now on; it was just predicted as-is
+                            path = self.image_path(by_id[result['project_id']])
+                            self._images.setdefault(path, (None, result['image_hash']))
+        finally:
+            record['finished_at'] = datetime.utcnow().isoformat()
+            record['seconds'] = round(time.perf_counter() - started, 4)
+            for key in ('select_seconds', 'predict_seconds', 'save_seconds'):
+                record[key] = round(record[key], 4)
+            with self._lock:
+                if record['predicted'] or record['failed'] or trigger == 'manual':
+                    self._runs.append(record)
+                self._totals['runs'] += 1
+                self._totals['predicted'] += record['predicted']
+                self._totals['failed'] += record['failed']
+                self._totals['seconds'] += record['seconds']
+        return record
+
+    def tick(self):
+        """One scheduling decision: catch photo changes, then run if idle or the SLA is breached."""
+        self.check_images()
+        backlog = self.backlog()
+        if not backlog['dirty']:
+            return None
+        if self.is_idle():
+            return self.run('idle')
+        if backlog['oldest_wait_seconds'] is not None and backlog['oldest_wait_seconds'] >= self.sla.total_seconds():
+            return self.run('sla')
+        return None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.tick()
+            except Exception as e:
+                self.app.logger.warning(f"Prediction scheduler tick failed: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='prediction-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def metrics(self):
+        with self._lock:
+            runs = list(self._runs)
+            totals = dict(self._totals, seconds=round(self._totals['seconds'], 3))
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'sla_seconds': self.sla.total_seconds(),
+            'idle_seconds': self.idle_seconds,
+            'interval_seconds': self.interval,
+            'batch_size': self.batch_size,
+            'model_versions': self._versions,
+            'totals': totals,
+            'runs': runs,
+        }
@@ -1,34 +1,168 @@
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
-from ultralytics import YOLO
-from PIL import Image
+import hashlib
 import numpy as np
 import os
 
+from inference_backend import backend_imports, load_model, model_file
+from model_registry import registry
+from prediction_cache import image_key
+from roi_index import RoiIndex
+from utils import load_image
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STAGE_MODEL_PATH = os.path.join(BASE_DIR, "progress_stage_model.h5")
+YOLO_MODEL_PATH = os.path.join(BASE_DIR, "yolov8n.pt")
+
+# Models are loaded on first use through the registry so that importing this
+# module does not pull in TensorFlow or ultralytics
+def _load_stage_model():
+    # Keras or a quantized TFLite export, depending on MODEL_BACKEND
+    return load_model(STAGE_MODEL_PATH)
+
+def _load_stage_embedding_model():
+    # Stage probabilities plus pooled features for the slim delay head; built from the Keras
+    # file because the TFLite exports only carry the stage output
+    from hybrid_model import stage_embedding_model
+    return stage_embedding_model(load_model(STAGE_MODEL_PATH, backend='keras'))
+
+def _load_yolo_model():
+    from ultralytics import YOLO
+    return YOLO(YOLO_MODEL_PATH)
+
+registry.register('stage', _load_stage_model, imports=backend_imports(), files=(model_file(STAGE_MODEL_PATH),))
+registry.register('stage_embedding', _load_stage_embedding_model, imports=('tensorflow',), files=(STAGE_MODEL_PATH,))
+registry.register('yolo', _load_yolo_model, imports=('ultralytics',), files=(YOLO_MODEL_PATH,))
+
+# Building boxes are remembered per image hash so no photo goes through YOLO twice;
+# set ROI_INDEX_PATH to an empty string to disable the index
+ROI_INDEX_PATH = os.environ.get(
+    'ROI_INDEX_PATH', os.path.join(BASE_DIR, "..", "data", "cache", "roi_index.sqlite")
+)
+# Boxes are keyed by the fingerprint of the YOLO weights as loaded, so replaced or
+# retrained weights never reuse boxes found by the old ones
+roi_index = RoiIndex(ROI_INDEX_PATH, model_key=lambda: registry.fingerprint('yolo')) if ROI_INDEX_PATH else None
+
+def get_stage_model():
+    return registry.get('stage')
 
-# Load models
-stage_model = load_model(os.path.join(BASE_DIR, "progress_stage_model.h5"))
-yolo_model = YOLO(os.path.join(BASE_DIR, "yolov8n.pt"))
+def get_yolo_model():
+    return registry.get('yolo')
 
 # Stage mapping
 stage_to_percent = {0: 10, 1: 25, 2: 50, 3: 70, 4: 90, 5: 100}
 
-def extract_building_roi(image_path):
-    results = yolo_model(image_path)[0]
+BUILDING_LABELS = ["building", "house", "construction", "skyscraper"]
+
+def find_building_box(results):
+    """Return the first building box in a YOLO result, or None if there is none."""
     for box in results.boxes:
         cls = int(box.cls[0])
         label = results.names[cls]
-        if label.lower() in ["building", "house", "construction", "skyscraper"]:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            img = Image.open(image_path).convert("RGB")
-            return img.crop((x1, y1, x2, y2))
-    return Image.open(image_path).convert("RGB")
-
-def predict_stage(img_path):
-    roi = extract_building_roi(img_path)
-    roi = roi.resize((224, 224))
-    img_array = np.expand_dims(np.array(roi) / 255.0, axis=0)
-    pred = stage_model.predict(img_array)
-    stage = np.argmax(pred)
-    return stage, pred[0][stage]
+        if label.lower() in BUILDING_LABELS:
+            return tuple(map(int, box.xyxy[0]))
+    return None
+
+def building_boxes(yolo_model, images):
+    """Run YOLO once over decoded images and keep only each one's building box.
+
+    Called through ``registry.run`` so that, when the models live in the
+    model process, only the boxes are sent back.
+    """
+    return [find_building_box(r) for r in yolo_model(images, verbose=False)]
+
+def crop_roi(img, box):
+    return img.crop(box) if box else img
+
+def _decode_with_hash(source):
+    """Decode one image and return it with its content hash.
+
+    Paths and bytes are hashed on their encoded bytes, matching the prediction
+    cache keys; decoded images and arrays are hashed on their pixels.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            source = f.read()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return load_image(source), image_key(bytes(source))
+    img = load_image(source)
+    digest = hashlib.sha256(f"{img.size}".encode())
+    digest.update(img.tobytes())
+    return img, digest.hexdigest()
+
+def detect_building_boxes(images, image_hashes):
+    """Return the building box for each decoded image.
+
+    Boxes already in the ROI index are reused; the remaining distinct photos go
+    through YOLO together in a single call and are added to the index.
+    """
+    boxes = roi_index.get_many(image_hashes) if roi_index else {}
+    missing = {}
+    for img, image_hash in zip(images, image_hashes):
+        if image_hash not in boxes:
+            missing.setdefault(image_hash, img)
+    if missing:
+        found = dict(zip(missing, registry.run('yolo', building_boxes, list(missing.values()))))
+        if roi_index:
+            roi_index.put_many(found)
+        boxes.update(found)
+    return [boxes[image_hash] for image_hash in image_hashes]
+
+def extract_building_rois(images, image_hashes=None):
+    """Crop the building out of each image, running YOLO at most once per batch.
+
+    Accepts paths, raw bytes, PIL images or uint8 arrays; each image is
+    decoded exactly once and the crop is taken from those same pixels. Pass
+    ``image_hashes`` when the caller already hashed the encoded bytes.
+    """
+    images = list(images)
+    if not images:
+        return []
+    if image_hashes is None:
+        images, image_hashes = zip(*[_decode_with_hash(img) for img in images])
+    else:
+        images = [load_image(img) for img in images]
+    boxes = detect_building_boxes(images, list(image_hashes))
+    return [crop_roi(img, box) for img, box in zip(images, boxes)]
+
+def extract_building_roi(image):
+    return extract_building_rois([image])[0]
+
+def _roi_batch(rois):
+    return np.stack([np.array(roi.resize((224, 224))) / 255.0 for roi in rois])
+
+def _stages(pred):
+    stages = np.argmax(pred, axis=1)
+    return [(stage, pred[i][stage]) for i, stage in enumerate(stages)]
+
+def classify_rois(rois):
+    """Predict (stage, confidence) for already cropped ROIs with one classifier call."""
+    if not rois:
+        return []
+    pred = get_stage_model().predict_on_batch(_roi_batch(rois))
+    return _stages(np.asarray(pred))
+
+def classify_and_embed_rois(rois):
+    """Predict (stage, confidence) and the pooled stage-model embedding of each ROI.
+
+    Both come from the same forward pass, so the slim delay head adds no
+    second image encoding.
+    """
+    if not rois:
+        return [], None
+    pred, embeddings = registry.get('stage_embedding').predict_on_batch(_roi_batch(rois))
+    return _stages(np.asarray(pred)), np.asarray(embeddings, dtype=np.float32)
+
+def embed_images(images, batch_size=32):
+    """Pooled embeddings of the building crop of each image, as served to the slim delay head."""
+    images = list(images)
+    embeddings = []
+    for start in range(0, len(images), batch_size):
+        _, batch = classify_and_embed_rois(extract_building_rois(images[start:start + batch_size]))
+        embeddings.append(batch)
+    return np.concatenate(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32)
+
+def predict_stages(images, image_hashes=None):
+    """Predict (stage, confidence) for a batch of images."""
+    return classify_rois(extract_building_rois(images, image_hashes))
+
+def predict_stage(image):
+    return predict_stages([image])[0]
@@ -0,0 +1,194 @@
+"""Dashboard aggregates kept in a small summary table instead of recomputed per request.
+
+``project_stats`` (created by migration 4) has one row per (manager, status)
+holding running counts and sums. It is updated by deltas in the same
+transaction as the project writes:
+
+- session flushes (create_project, update_project) subtract each changed
+  project's old contribution and add its new one, using attribute history;
+- ORM bulk updates by primary key (save_project_predictions, used by
+  predict_project_ai and bulk runs) read the affected rows' old values first;
+- any other bulk statement on projects rebuilds the table with one GROUP BY
+  just before commit.
+
+``/stats`` then only aggregates these few rows, again in SQL.
+"""
+from sqlalchemy import bindparam, event, inspect, text
+
+# Delay probability above which a project counts as at risk, as in /projects/<id>/predict
+AT_RISK_PROBABILITY = 0.5
+
+TRACKED_COLUMNS = ('manager_id', 'status', 'progress', 'budget', 'delay_probability')
+SUM_COLUMNS = ('projects', 'progress_sum', 'progress_count', 'budget_sum', 'predicted', 'delay_sum', 'at_risk')
+
+CREATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS project_stats ("
+    "manager_id INTEGER NOT NULL, status VARCHAR(20) NOT NULL, "
+    "projects INTEGER NOT NULL DEFAULT 0, progress_sum FLOAT NOT NULL DEFAULT 0, "
+    "progress_count INTEGER NOT NULL DEFAULT 0, budget_sum FLOAT NOT NULL DEFAULT 0, "
+    "predicted INTEGER NOT NULL DEFAULT 0, delay_sum FLOAT NOT NULL DEFAULT 0, "
+    "at_risk INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (manager_id, status))"
+)
+_REBUILD = (
+    "DELETE FROM project_stats",
+    f"""INSERT INTO project_stats (manager_id, status, {', '.join(SUM_COLUMNS)})
+    SELECT COALESCE(manager_id, 0), COALESCE(status, ''), COUNT(*),
+           COALESCE(SUM(progress), 0), COUNT(progress), COALESCE(SUM(budget), 0),
+           COUNT(delay_probability), COALESCE(SUM(delay_probability), 0),
+           SUM(CASE WHEN delay_probability > {AT_RISK_PROBABILITY} THEN 1 ELSE 0 END)
+    FROM projects GROUP BY COALESCE(manager_id, 0), COALESCE(status, '')""",
+)
+_APPLY = text(
+    f"""INSERT INTO project_stats (manager_id, status, {', '.join(SUM_COLUMNS)})
+    VALUES (:manager_id, :status, {', '.join(':' + c for c in SUM_COLUMNS)})
+    ON CONFLICT (manager_id, status) DO UPDATE SET
+    {', '.join(f'{c} = {c} + excluded.{c}' for c in SUM_COLUMNS)}"""
+)
+_PRUNE = text("DELETE FROM project_stats WHERE projects <= 0")
+
+
+def rebuild(conn):
+    for statement in _REBUILD:
+        conn.execute(text(statement))
+
+
+def contribution(values, sign=1):
+    """The summary row key and sums one project adds (sign=1) or removes (sign=-1)."""
+    manager_id, status, progress, budget, delay = (values.get(c) for c in TRACKED_COLUMNS)
+    key = (manager_id or 0, status or '')
+    return key, (
+        sign,
+        sign * (progress or 0),
+        sign * (progress is not None),
+        sign * (budget or 0),
+        sign * (delay is not None),
+        sign * (delay or 0),
+        sign * (delay is not None and delay > AT_RISK_PROBABILITY),
+    )
+
+
+class ProjectStats:
+    def __init__(self, db, project_model):
+        self.db = db
+        self.Project = project_model
+
+    def install(self):
+        session = self.db.session
+        event.listen(session, 'after_flush', self._after_flush)
+        event.listen(session, 'do_orm_execute', self._do_orm_execute)
+        event.listen(session, 'before_commit', self._before_commit)
+        event.listen(session, 'after_rollback', self._after_rollback)
+
+    def _apply(self, conn, changes):
+        deltas = {}
+        for values, sign in changes:
+            key, sums = contribution(values, sign)
+            current = deltas.get(key, (0,) * len(SUM_COLUMNS))
+            deltas[key] = tuple(a + b for a, b in zip(current, sums))
+        rows = [
+            dict(zip(SUM_COLUMNS, sums), manager_id=key[0], status=key[1])
+            for key, sums in deltas.items() if any(sums)
+        ]
+        if rows:
+            conn.execute(_APPLY, rows)
+            conn.execute(_PRUNE)
+
+    def _after_flush(self, session, flush_context):
+        # Attribute history still holds the pre-flush values here
+        changes = []
+        for obj in session.new:
+            if isinstance(obj, self.Project):
+                changes.append(({c: getattr(obj, c) for c in TRACKED_COLUMNS}, 1))
+        for obj in session.deleted:
+            if isinstance(obj, self.Project):
+                changes.append((self._old_values(obj), -1))
+        for obj in session.dirty:
+            if isinstance(obj, self.Project) and session.is_modified(obj):
+                old = self._old_values(obj)
+                new = {c: getattr(obj, c) for c in TRACKED_COLUMNS}
+                if old != new:
+                    changes += [(old, -1), (new, 1)]
+        if changes:
+            self._apply(session.connection(), changes)
+
+    @staticmethod
+    def _old_values(obj):
+        values = {}
+        for column in TRACKED_COLUMNS:
+            history = inspect(obj).attrs[column].history
+            old = history.deleted or history.unchanged
+            values[column] = old[0] if old else None
+        return values
+
+    def _do_orm_execute(self, state):
+        if not (state.is_update or state.is_insert or state.is_delete):
+            return
+        table = getattr(state.statement, 'table', None)
+        if table is None or table.name != self.Project.__tablename__:
+            return
+        params = state.parameters
+        if state.is_update and isinstance(params, list) and state.statement.whereclause is None:
+            # Bulk UPDATE by primary key: each dict names the row and its new values
+            self._apply_bulk_update(state.session, params)
+        else:
+            state.session.info['rebuild_project_stats'] = True
+
+    def _apply_bulk_update(self, session, params):
+        ids = [p['id'] for p in params]
+        Project = self.Project
+        old_rows = {
+            row.id: dict(row._mapping)
+            for row in session.connection().execute(
+                self.db.select(Project.id, *[getattr(Project, c) for c in TRACKED_COLUMNS])
+                .where(Project.id.in_(bindparam('ids', expanding=True))),
+                {'ids': ids},
+            )
+        }
+        changes = []
+        for p in params:
+            old = old_rows.get(p['id'])
+            if old is None:
+                continue
+            old.pop('id', None)
+            new = {c: p.get(c, old[c]) for c in TRACKED_COLUMNS}
+            if new != old:
+                changes += [(old, -1), (new, 1)]
+        self._apply(session.connection(), changes)
+
+    def _before_commit(self, session):
+        if session.info.pop('rebuild_project_stats', False):
+            rebuild(session.connection())
+
+    def _after_rollback(self, session):
+        session.info.pop('rebuild_project_stats', None)
+
+    def summary(self, manager_id=None):
+        """Counts, status breakdown, averages, budget totals and delay risk, from the summary rows."""
+        where = "WHERE manager_id = :manager_id" if manager_id is not None else ""
+        sums = ', '.join(f'SUM({c})' for c in SUM_COLUMNS)
+        by_status = self.db.session.execute(
+            text(f"SELECT status, {sums} FROM project_stats {where} GROUP BY status ORDER BY status"),
+            {'manager_id': manager_id},
+        ).all()
+        stats = _aggregate([sum(row[i + 1] for row in by_status) for i in range(len(SUM_COLUMNS))])
+        stats['by_status'] = {row[0]: _aggregate(row[1:]) for row in by_status}
+        if manager_id is None:
+            by_manager = self.db.session.execute(
+                text(f"SELECT manager_id, {sums} FROM project_stats GROUP BY manager_id ORDER BY manager_id")
+            ).all()
+            stats['by_manager'] = [{'manager_id': row[0] or None, **_aggregate(row[1:])} for row in by_manager]
+        return stats
+
+
+def _aggregate(sums):
+    projects, progress_sum, progress_count, budget_sum, predicted, delay_sum, at_risk = sums
+    return {
+        'projects': int(projects),
+        'average_progress': round(progress_sum / progress_count, 1) if progress_count else None,
+        'total_budget': budget_sum,
+        'delay_risk': {
+            'predicted': int(predicted),
+            'at_risk': int(at_risk),
+            'average_probability': round(delay_sum / predicted, 3) if predicted else None,
+        },
+    }
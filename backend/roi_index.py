@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class RoiIndex:
+    """Building bounding boxes from YOLO, persisted in SQLite and keyed by image hash.
+
+    A stored box of ``None`` means YOLO found no building and the whole image
+    is used, which is still a result worth remembering. Boxes are also keyed by
+    the detector's version: ``model_key()`` returns it (e.g. a fingerprint of
+    the YOLO weights) and is asked on every lookup and write, so replacing or
+    retraining the weights does not reuse stale boxes.
+    """
+
+    def __init__(self, path, model_key):
+        self.path = path
+        self.model_key = model_key
+        self._ready = False
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @contextmanager
+    def _connect(self):
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    with sqlite3.connect(self.path, timeout=5) as conn:
+                        conn.execute(
+                            "CREATE TABLE IF NOT EXISTS rois (image_hash TEXT NOT NULL, model TEXT NOT NULL, "
+                            "x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER, PRIMARY KEY (image_hash, model))"
+                        )
+                    self._ready = True
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, image_hashes):
+        """Return {image_hash: box or None} for the hashes already in the index."""
+        image_hashes = list(dict.fromkeys(image_hashes))
+        boxes = {}
+        model = self.model_key()
+        with self._connect() as conn:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(image_hashes), 500):
+                chunk = image_hashes[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT image_hash, x1, y1, x2, y2 FROM rois WHERE model = ? "
+                    f"AND image_hash IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk],
+                ).fetchall()
+                for image_hash, *box in rows:
+                    boxes[image_hash] = None if box[0] is None else tuple(box)
+        with self._lock:
+            self._hits += len(boxes)
+            self._misses += len(image_hashes) - len(boxes)
+        return boxes
+
+    def put_many(self, boxes):
+        model = self.model_key()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO rois (image_hash, model, x1, y1, x2, y2) VALUES (?, ?, ?, ?, ?, ?)",
+                [(image_hash, model, *(box or (None,) * 4)) for image_hash, box in boxes.items()],
+            )
+
+    def stats(self):
+        with self._lock:
+            return {'path': self.path, 'model': self.model_key(), 'hits': self._hits, 'misses': self._misses}
@@ -0,0 +1,109 @@
+import json
+from datetime import date
+
+from flask import Response, stream_with_context
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib encoder is used without it
+    orjson = None
+
+JSON_BACKEND = 'orjson' if orjson else 'json'
+
+# Field lists shared by every endpoint that returns these models
+PROJECT_LIST_FIELDS = [
+    'id', 'name', 'description', 'location', 'latitude', 'longitude', 'status', 'progress',
+    'start_date', 'end_date', 'budget', 'manager_id', 'created_at'
+]
+PROJECT_PREDICTION_FIELDS = ['predicted_stage', 'confidence', 'delay_probability', 'last_prediction_date']
+PROJECT_DETAIL_FIELDS = PROJECT_LIST_FIELDS + PROJECT_PREDICTION_FIELDS
+PROJECT_FIELDS = PROJECT_LIST_FIELDS + ['updated_at'] + PROJECT_PREDICTION_FIELDS
+COMMENT_FIELDS = ['id', 'content', 'author_id', 'author_name', 'created_at']
+UNRESOLVED_COMMENT_FIELDS = ['id', 'content', 'author_id', 'author_name', 'project_id', 'project_name', 'created_at']
+USER_FIELDS = ['id', 'username', 'email', 'role']
+USER_LIST_FIELDS = USER_FIELDS + ['created_at']
+
+
+def _default(obj):
+    # Dates go out as ISO 8601, numpy scalars and arrays as plain numbers/lists
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj):
+        """Encode to JSON bytes; naive datetimes come out exactly like ``isoformat()``."""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    loads = orjson.loads
+else:
+    def dumps(obj):
+        """Encode to JSON bytes; naive datetimes come out exactly like ``isoformat()``."""
+        return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False).encode()
+
+    loads = json.loads
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson when installed, the stdlib otherwise.
+
+    Datetimes are written as ISO 8601 by the encoder, so handlers can pass
+    column values straight through instead of calling ``isoformat()`` per row.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype='application/json')
+
+
+def rows_to_dicts(fields, rows, extra=None):
+    """Build dicts from column tuples whose leading values are ``fields``, in order."""
+    if extra:
+        return [dict(zip(fields, row), **extra) for row in rows]
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def model_to_dict(obj, fields):
+    return {field: getattr(obj, field) for field in fields}
+
+
+def stream_json(items, ndjson=False, chunk_size=500):
+    """Stream an iterable of dicts as a chunked JSON array, or as NDJSON.
+
+    Items are encoded ``chunk_size`` at a time, so a large listing never has to
+    exist in memory as one Python list or one encoded body.
+    """
+    def generate():
+        chunk = []
+        first = True
+        for item in items:
+            chunk.append(dumps(item))
+            if len(chunk) >= chunk_size:
+                yield _join(chunk, ndjson, first)
+                first = False
+                chunk = []
+        if chunk or first:
+            yield _join(chunk, ndjson, first)
+        if not ndjson:
+            yield b']'
+
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+def _join(chunk, ndjson, first):
+    if ndjson:
+        return b''.join(line + b'\n' for line in chunk)
+    return (b'[' if first else b',') + b','.join(chunk)
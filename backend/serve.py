@@ -0,0 +1,240 @@
+"""Production entry point: pre-forked workers accepting on one shared socket.
+
+The parent imports the app (running migrations once) and then forks
+``--workers`` children that all accept on the same listening socket. The
+imported code and app state are shared copy-on-write; ``gc.freeze()`` keeps
+the collector from touching (and so copying) those pages. Each worker serves
+requests on a pool of ``--threads`` threads; the parent only supervises and
+restarts children that die.
+
+The models are never loaded in the parent: TensorFlow and torch create
+thread pools and sessions that do not survive a fork, so a child inheriting
+a loaded model can hang on its first prediction. Instead the parent forks
+one model process that loads them once and answers the workers' model calls
+over a local Unix socket (see ``model_server``), so there is a single copy
+of the weights however many workers run. ``--models-per-worker`` loads a copy
+in every worker instead, the layout to compare against; ``--memory-report``
+(or SIGUSR1 to the parent) prints RSS, PSS and unique memory per process.
+
+The prediction scheduler, if enabled, runs in worker 0 only and judges
+idleness by that worker's own requests.
+
+    python serve.py --workers 4 --threads 8 --memory-report 30
+"""
+import argparse
+import gc
+import os
+import signal
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server handling each connection on a fixed-size thread pool."""
+
+    multithread = True
+    daemon_threads = True
+
+    def __init__(self, *args, threads=8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def memory_usage(pid):
+    """RSS, PSS and unique (USS) memory of a process in MB, from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[0].endswith(':'):
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0) / 1024,
+        'pss': fields.get('Pss', 0) / 1024,
+        'uss': (fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)) / 1024,
+    }
+
+
+def print_memory_report(parent_pid, children):
+    """Print memory per process; ``children`` maps pid -> role (``'models'`` or a worker slot)."""
+    print(f"{'process':<22}{'RSS MB':>10}{'PSS MB':>10}{'USS MB':>10}")
+    totals = {'rss': 0.0, 'pss': 0.0, 'uss': 0.0}
+    labels = [('parent', parent_pid)] + [
+        (f"models {pid}" if role == 'models' else f"worker {role} ({pid})", pid)
+        for pid, role in sorted(children.items(), key=lambda item: str(item[1]))
+    ]
+    for label, pid in labels:
+        try:
+            usage = memory_usage(pid)
+        except OSError:
+            print(f"{label:<22}{'unavailable':>30}")
+            continue
+        for key in totals:
+            totals[key] += usage[key]
+        print(f"{label:<22}{usage['rss']:>10.1f}{usage['pss']:>10.1f}{usage['uss']:>10.1f}")
+    # Summed RSS counts shared pages once per process; summed PSS is the real footprint
+    print(f"{'total':<22}{totals['rss']:>10.1f}{totals['pss']:>10.1f}{totals['uss']:>10.1f}")
+    sys.stdout.flush()
+
+
+def reset_signals():
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+
+
+def run_model_server(http_sock, model_sock):
+    reset_signals()
+    http_sock.close()
+    from app_updated import AI_MODELS
+    from model_registry import registry
+    from model_server import ModelServer
+    # Loaded here, after the fork, and only here
+    registry.warm_up(AI_MODELS)
+    try:
+        ModelServer(registry, model_sock).serve_forever()
+    finally:
+        os._exit(0)
+
+
+def run_worker(app, sock, threads, model_sock=None, scheduler=False):
+    reset_signals()
+    from app_updated import AI_MODELS, prediction_scheduler
+    from model_registry import registry
+    if model_sock is not None:
+        from model_server import ModelClient
+        path = model_sock.getsockname()
+        model_sock.close()
+        registry.use_model_server(ModelClient(path))
+    # Per worker: either this worker's own copy of the models, or the model process loading them
+    registry.warm_up(AI_MODELS)
+    if scheduler:
+        # Started after the fork: threads do not survive one, and only this worker runs it
+        prediction_scheduler.start()
+
+    host, port = sock.getsockname()[:2]
+    server = PooledWSGIServer(host, port, app, fd=sock.fileno(), threads=threads)
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API with pre-forked workers")
+    parser.add_argument('--host', default=os.environ.get('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_WORKERS', os.cpu_count() or 2)))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 8)),
+                        help="request threads per worker")
+    parser.add_argument('--models-per-worker', action='store_true',
+                        help="load the models in every worker instead of one model process (for comparison)")
+    parser.add_argument('--memory-report', type=float, default=0, metavar='SECONDS',
+                        help="print per-process memory this long after startup")
+    args = parser.parse_args()
+
+    # Nothing may start before the fork: a warm-up thread would load the models here, and the
+    # scheduler's thread would not survive the fork (and would load them too); both start in a child
+    os.environ['MODEL_WARMUP'] = '0'
+    scheduler = os.environ.get('PREDICTION_SCHEDULER', '0') == '1'
+    os.environ['PREDICTION_SCHEDULER'] = '0'
+    from app_updated import app, db
+
+    # Children must open their own database connections
+    with app.app_context():
+        db.engine.dispose()
+
+    sock = socket.create_server((args.host, args.port), backlog=128)
+    sock.set_inheritable(True)
+    model_sock = model_dir = None
+    if not args.models_per_worker:
+        from model_server import listen
+        # Bound before any child starts, so workers' calls queue until the model process accepts
+        model_dir = tempfile.mkdtemp(prefix='nirmaan-models-')
+        model_sock = listen(os.path.join(model_dir, 'models.sock'))
+
+    # Move everything allocated so far out of the collector's reach so that
+    # collections in the workers do not write to (and copy) shared pages
+    gc.freeze()
+
+    children = {}  # pid -> (role, started); role is 'models' or the worker's slot
+    stopping = False
+
+    def spawn(role):
+        pid = os.fork()
+        if pid == 0:
+            if role == 'models':
+                run_model_server(sock, model_sock)
+            run_worker(app, sock, args.threads, model_sock, scheduler=scheduler and role == 0)
+        children[pid] = (role, time.time())
+
+    def roles():
+        return {pid: role for pid, (role, _) in children.items()}
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGUSR1, lambda signum, frame: print_memory_report(os.getpid(), roles()))
+
+    if model_sock is not None:
+        spawn('models')
+    for slot in range(args.workers):
+        spawn(slot)
+    models = 'per worker' if model_sock is None else 'in one model process'
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers x {args.threads} threads, "
+          f"models {models}")
+    sys.stdout.flush()
+
+    report_at = time.time() + args.memory_report if args.memory_report else None
+    while children:
+        if report_at and time.time() >= report_at:
+            print_memory_report(os.getpid(), roles())
+            report_at = None
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.5)
+            continue
+        role, started = children.pop(pid, (None, None))
+        if started is not None and not stopping:
+            print(f"{'Model process' if role == 'models' else f'Worker {role}'} ({pid}) exited "
+                  f"with status {status}; restarting")
+            # Avoid a tight restart loop when children die on startup
+            if time.time() - started < 1:
+                time.sleep(1)
+            spawn(role)
+    sock.close()
+    if model_sock is not None:
+        model_sock.close()
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
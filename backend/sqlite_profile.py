@@ -0,0 +1,69 @@
+"""SQLite performance profile: WAL journal, busy timeout and tuned pragmas on every connection.
+
+With the default rollback journal a writer has to wait for every reader to
+finish and readers block while a write commits, so concurrent comment posts
+and project updates end up failing with "database is locked". In WAL mode
+readers never block the single writer (or each other), busy_timeout makes a
+second writer wait for the lock instead of failing, and synchronous=NORMAL
+only fsyncs at checkpoints, which is still safe against corruption in WAL
+mode (a power loss can drop the last commits, not damage the file).
+"""
+from sqlalchemy import event
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 256 * 1024 * 1024,  # bytes of the file read through memory mapping
+    'cache_size': -64 * 1024,  # negative means KiB: 64 MB page cache per connection
+    'temp_store': 'MEMORY',
+}
+
+
+def is_file_database(uri):
+    """True for sqlite URIs backed by a file; in-memory databases gain nothing from the profile."""
+    if not uri.startswith('sqlite'):
+        return False
+    path = uri.split(':///', 1)[1] if ':///' in uri else ''
+    return bool(path) and path != ':memory:' and 'mode=memory' not in path
+
+
+def engine_options(uri, pool_size=10, max_overflow=10, busy_timeout_ms=DEFAULT_PRAGMAS['busy_timeout']):
+    """SQLALCHEMY_ENGINE_OPTIONS for a file SQLite database shared by many request threads.
+
+    A QueuePool keeps connections (and their warm page caches and mmap) open
+    between requests; size it to at least the number of request threads.
+    """
+    if not is_file_database(uri):
+        return {}
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': 30,
+        'connect_args': {'timeout': busy_timeout_ms / 1000, 'check_same_thread': False},
+    }
+
+
+def install_pragmas(engine, pragmas=None):
+    """Set ``pragmas`` on every new DBAPI connection of ``engine``."""
+    pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+    return set_pragmas
+
+
+def current_pragmas(connection, names=DEFAULT_PRAGMAS):
+    """Read back the effective pragma values on a DBAPI connection."""
+    cursor = connection.cursor()
+    try:
+        return {name: cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
+    finally:
+        cursor.close()
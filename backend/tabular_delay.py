@@ -0,0 +1,124 @@
+"""Tabular-only delay predictor: a fast path that needs no photo and no TensorFlow.
+
+A scikit-learn gradient-boosted trees model over timeline, progress, budget
+utilization and schedule slack, trained from ``metadata_autolabeled.csv``.
+``predict`` takes one feature row per project, so thousands of projects are
+scored in a single vectorized call.
+
+Schedule slack is progress minus the share of the planned schedule already
+elapsed (``start_date``..``end_date``). The labelled CSV has no planned
+durations unless it carries a ``planned_days`` column; a feature with no
+values in the training data is left out of the fitted model, and projects
+without dates get NaN slack, which the trees handle natively.
+
+Training is an explicit step, ``python tabular_delay.py``; the app only
+loads the saved model, so pandas is only imported by training.
+"""
+import argparse
+import os
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "..", "data")
+TRAINING_CSV = os.path.join(DATA_DIR, "metadata_autolabeled.csv")
+MODEL_PATH = os.environ.get('TABULAR_DELAY_MODEL_PATH', os.path.join(BASE_DIR, "tabular_delay_model.joblib"))
+
+FEATURES = ('timeline_days', 'progress_percent', 'budget_utilized_percent', 'schedule_slack')
+
+
+def schedule_slack(progress_percent, start_date, end_date, now):
+    """Progress ahead (+) or behind (-) the elapsed share of the planned schedule, in percent."""
+    if not start_date or not end_date or end_date <= start_date:
+        return np.nan
+    elapsed = (now - start_date) / (end_date - start_date)
+    return float(progress_percent) - min(max(elapsed, 0.0), 1.0) * 100
+
+
+def metadata_features(df):
+    """Feature matrix for labelled metadata rows; slack needs a ``planned_days`` column."""
+    features = df[list(FEATURES[:3])].to_numpy(dtype=np.float32)
+    slack = np.full((len(df), 1), np.nan, dtype=np.float32)
+    if 'planned_days' in df:
+        elapsed = np.clip(df['timeline_days'] / df['planned_days'], 0, 1) * 100
+        slack[:, 0] = df['progress_percent'] - elapsed
+    return np.hstack([features, slack])
+
+
+def split(df, test_size=0.2, random_state=42):
+    # Same held-out rows as data_pipeline.split_metadata, without importing TensorFlow
+    from sklearn.model_selection import train_test_split
+    return train_test_split(df, test_size=test_size, random_state=random_state)
+
+
+def read_training_csv(csv=TRAINING_CSV):
+    import pandas as pd
+    return pd.read_csv(csv)
+
+
+def train(df):
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    features = metadata_features(df)
+    columns = [i for i in range(len(FEATURES)) if not np.isnan(features[:, i]).all()]
+    model = HistGradientBoostingClassifier(max_iter=200, learning_rate=0.05, max_leaf_nodes=15, random_state=42)
+    model.fit(features[:, columns], df['delayed'].to_numpy())
+    return TabularDelayModel(model, [FEATURES[i] for i in columns])
+
+
+class TabularDelayModel:
+    """Wraps the fitted classifier; ``predict`` returns P(delayed) per row of ``FEATURES``."""
+
+    def __init__(self, model, features=FEATURES):
+        self.model = model
+        self.features = list(features)
+        self._columns = [FEATURES.index(name) for name in self.features]
+
+    def predict(self, features):
+        features = np.asarray(features, dtype=np.float32).reshape(-1, len(FEATURES))
+        if not len(features):
+            return np.empty(0)
+        return self.model.predict_proba(features[:, self._columns])[:, 1]
+
+    def save(self, path=MODEL_PATH):
+        import joblib
+        joblib.dump({'model': self.model, 'features': self.features}, path)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        import joblib
+        saved = joblib.load(path)
+        return cls(saved['model'], saved['features'])
+
+
+def load_tabular_model(path=MODEL_PATH):
+    """Load the saved model; it is trained beforehand, never on a prediction request."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No tabular delay model at {path}; train it with `python tabular_delay.py`")
+    return TabularDelayModel.load(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the tabular-only delay predictor")
+    parser.add_argument('--csv', default=TRAINING_CSV)
+    parser.add_argument('--output', default=MODEL_PATH)
+    args = parser.parse_args()
+
+    from sklearn.metrics import roc_auc_score
+
+    df = read_training_csv(args.csv)
+    train_df, test_df = split(df)
+    model = train(train_df)
+    probs = model.predict(metadata_features(test_df))
+    labels = test_df['delayed'].to_numpy()
+    print(f"{len(train_df)} train / {len(test_df)} test rows, features {', '.join(model.features)}")
+    print(f"Test accuracy {np.mean((probs > 0.5) == labels):.3f}  AUC {roc_auc_score(labels, probs):.3f}")
+
+    # The saved model is refit on every labelled row
+    model = train(df)
+    model.save(args.output)
+    print(f"✅ Model saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,29 @@
 import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-from hybrid_model import build_model
-from utils import preprocess_image
 import os
+from hybrid_model import build_model
+from data_pipeline import make_dataset, split_metadata
+from image_store import open_image_store
 
-# Load CSV
-df = pd.read_csv("../data/metadata_autolabeled.csv")
+# TRAIN_INPUT=store reads pixels from the memory-mapped image store (rebuilt when a
+# source image changes); TRAIN_INPUT=files decodes the JPEGs inside the tf.data pipeline;
+# TRAIN_INPUT=embeddings trains the slim delay head on precomputed stage-model embeddings
+# instead, which never touches pixels once the embedding store is built
+TRAIN_INPUT = os.environ.get('TRAIN_INPUT', 'store')
 
+if TRAIN_INPUT == 'embeddings':
+    from train_slim_delay_model import main
+    main()
+    raise SystemExit
 
-X_tabular = df[['timeline_days', 'progress_percent', 'budget_utilized_percent']].values
-y = df['delayed'].values
-X_images = np.array([
-    preprocess_image(os.path.join("../data/images", fname)) for fname in df['image']
-])
+# Load CSV
+df = pd.read_csv("../data/metadata_autolabeled.csv")
+train_df, val_df, test_df = split_metadata(df)
 
-X_img_train, X_img_test, X_tab_train, X_tab_test, y_train, y_test = train_test_split(
-    X_images, X_tabular, y, test_size=0.2, random_state=42
-)
+store = open_image_store("../data/images", df['image']) if TRAIN_INPUT == 'store' else None
+train_ds = make_dataset(train_df, "../data/images", batch_size=4, shuffle=True, store=store)
+val_ds = make_dataset(val_df, "../data/images", batch_size=4, store=store)
 
 model = build_model()
-model.fit([X_img_train, X_tab_train], y_train, epochs=10, batch_size=4, validation_split=0.2)
+model.fit(train_ds, validation_data=val_ds, epochs=10)
 model.save("backend/delay_model.h5")
 print("✅ Model saved to backend/delay_model.h5")
@@ -0,0 +1,60 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline import TABULAR_COLUMNS, split_metadata
+from embedding_store import open_embedding_store
+from hybrid_model import build_slim_model
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "..", "data")
+STORE_DIR = os.path.join(DATA_DIR, "cache", "embedding_store")
+
+
+def load_split(csv, image_dir, store_dir=STORE_DIR):
+    """(embeddings, tabular, labels) for the train/validation/test splits train_model.py uses.
+
+    Embeddings come from the embedding store, which only runs the stage model
+    on photos it has not seen; retraining the head never touches pixels.
+    """
+    df = pd.read_csv(csv)
+    store = open_embedding_store(image_dir, df['image'], store_dir)
+    splits = []
+    for part in split_metadata(df):
+        splits.append((
+            store.lookup(part['image']),
+            part[TABULAR_COLUMNS].to_numpy(dtype=np.float32),
+            part['delayed'].to_numpy(dtype=np.float32),
+        ))
+    return splits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the slim delay head on stage-model embeddings")
+    parser.add_argument('--csv', default=os.path.join(DATA_DIR, "metadata_autolabeled.csv"))
+    parser.add_argument('--images', default=os.path.join(DATA_DIR, "images"))
+    parser.add_argument('--store', default=STORE_DIR, help="embedding store directory")
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--output', default=os.path.join(BASE_DIR, "delay_head_model.h5"))
+    args = parser.parse_args()
+
+    (train_emb, train_tab, train_y), (val_emb, val_tab, val_y), (test_emb, test_tab, test_y) = \
+        load_split(args.csv, args.images, args.store)
+    print(f"{len(train_y)} train / {len(val_y)} validation / {len(test_y)} test rows, "
+          f"embedding size {train_emb.shape[1]}")
+
+    model = build_slim_model(embedding_dim=train_emb.shape[1], tabular=train_tab)
+    model.fit([train_emb, train_tab], train_y, validation_data=([val_emb, val_tab], val_y),
+              epochs=args.epochs, batch_size=args.batch_size)
+    _, accuracy = model.evaluate([test_emb, test_tab], test_y, verbose=0)
+    print(f"Test accuracy {accuracy:.3f}")
+
+    model.save(args.output)
+    print(f"✅ Model saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,60 @@
 from PIL import Image
 import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
+IMAGE_SIZE = (224, 224)
+
+def load_image(source):
+    """Decode a path, raw bytes, PIL image or uint8 array into a single RGB PIL image."""
+    if isinstance(source, Image.Image):
+        return source if source.mode == "RGB" else source.convert("RGB")
+    if isinstance(source, np.ndarray):
+        return Image.fromarray(source).convert("RGB")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return Image.open(BytesIO(source)).convert("RGB")
+    return Image.open(source).convert("RGB")
+
 def preprocess_image(path_or_bytes):
-    if isinstance(path_or_bytes, bytes):
-        img = Image.open(BytesIO(path_or_bytes)).convert("RGB")
-    else:
-        img = Image.open(path_or_bytes).convert("RGB")
-    img = img.resize((224, 224))
-    return np.array(img) / 255.0
\ No newline at end of file
+    img = load_image(path_or_bytes)
+    img = img.resize(IMAGE_SIZE)
+    return np.array(img) / 255.0
+
+def _decode_resized(source):
+    return np.asarray(load_image(source).resize(IMAGE_SIZE), dtype=np.uint8)
+
+def preprocess_images(sources, dtype=np.float32, workers=None):
+    """Preprocess many images into one (N, 224, 224, 3) array.
+
+    Each distinct path or byte string is decoded only once, even when it is
+    listed many times, and decoding runs on a thread pool writing straight
+    into a preallocated array. With ``dtype=np.uint8`` the raw pixels are
+    returned and the /255 scaling is left to the caller.
+    """
+    sources = list(sources)
+    out = np.empty((len(sources), IMAGE_SIZE[1], IMAGE_SIZE[0], 3), dtype=dtype)
+    scale = not np.issubdtype(out.dtype, np.integer)
+
+    # Map each distinct source to every row that uses it
+    rows = {}
+    for i, source in enumerate(sources):
+        key = bytes(source) if isinstance(source, (bytearray, memoryview)) else source
+        rows.setdefault(key, []).append(i)
+
+    def fill(item):
+        source, indices = item
+        pixels = _decode_resized(source)
+        first = out[indices[0]]
+        if scale:
+            np.divide(pixels, 255.0, out=first, casting='unsafe')
+        else:
+            first[...] = pixels
+        for i in indices[1:]:
+            out[i] = first
+
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        # Consume the iterator so decode errors are raised here
+        for _ in pool.map(fill, rows.items()):
+            pass
+    return out
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Bulk prediction test
+Only one bulk run at a time, batch_size must be a positive integer, and job results are only
+readable by their owner or an admin
+"""
+
+import os
+import sys
+import tempfile
+
+# Run against a throwaway in-memory database
+os.environ['DATABASE_URI'] = 'sqlite://'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from flask_jwt_extended import create_access_token
+from app_updated import app, bulk_prediction_lock, job_queue, registry
+from tabular_delay import load_tabular_model, read_training_csv, train
+
+# The tabular predictor needs no TensorFlow; train it into a temporary file
+MODEL_PATH = os.path.join(tempfile.mkdtemp(), 'tabular_delay_model.joblib')
+train(read_training_csv()).save(MODEL_PATH)
+registry.register(
+    'tabular_delay', lambda: load_tabular_model(MODEL_PATH), imports=('sklearn',), files=(MODEL_PATH,)
+)
+
+
+def auth(user_id):
+    with app.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity=str(user_id))}"}
+
+
+def bulk(body, user_id=1, query=''):
+    return app.test_client().post(
+        f'/projects/predict/bulk{query}', json=dict(body, predictor='tabular'), headers=auth(user_id)
+    )
+
+
+def test_batch_size_is_validated():
+    for batch_size in ('8', 0, -3, 2.5, True):
+        response = bulk({'batch_size': batch_size})
+        assert response.status_code == 400, batch_size
+    response = bulk({'batch_size': 2})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['count'] == 3
+
+
+def test_only_one_bulk_run_at_a_time():
+    # A run holding the lock, as a concurrent request would after passing the status check
+    with bulk_prediction_lock:
+        response = bulk({})
+    assert response.status_code == 409
+    assert bulk({}).status_code == 200
+
+
+def test_async_bulk_jobs_wait_for_each_other():
+    with bulk_prediction_lock:
+        job_ids = [bulk({}, query='?async=1').get_json()['job_id'] for _ in range(2)]
+        assert all(job_queue.get(job_id)['status'] != 'done' for job_id in job_ids)
+    for job_id in job_ids:
+        job = job_queue.wait(job_id, timeout=30)
+        assert job['status'] == 'done', job['error']
+        assert job['result']['count'] == 3
+
+
+def test_jobs_are_private_to_their_owner():
+    client = app.test_client()
+    response = client.post('/projects/1/predict?predictor=tabular&async=1', headers=auth(2))
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    job_queue.wait(job_id, timeout=30)
+
+    assert client.get(f'/jobs/{job_id}').status_code == 401
+    assert client.get(f'/jobs/{job_id}', headers=auth(4)).status_code == 403
+    assert client.get(f'/jobs/{job_id}', headers=auth(2)).get_json()['status'] == 'done'
+    # Admins can read every job
+    assert client.get(f'/jobs/{job_id}', headers=auth(1)).status_code == 200
+
+
+if __name__ == "__main__":
+    test_batch_size_is_validated()
+    test_only_one_bulk_run_at_a_time()
+    test_async_bulk_jobs_wait_for_each_other()
+    test_jobs_are_private_to_their_owner()
+    print("✅ Bulk predictions are validated and run one at a time")
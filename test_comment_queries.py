@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Query-count regression test for the comment listing endpoints
+Listing a project's comments must not issue one extra query per comment (N+1)
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+# Run against a throwaway in-memory database
+os.environ['DATABASE_URI'] = 'sqlite://'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from app_updated import app, db, User, Comment
+
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements executed inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def add_comments(project_id, count):
+    """Add comments from several different authors to a project"""
+    authors = [user.id for user in User.query.all()]
+    for i in range(count):
+        db.session.add(Comment(content=f"Comment {i}", author_id=authors[i % len(authors)], project_id=project_id))
+    db.session.commit()
+
+
+def queries_for(client, url, headers=None):
+    with count_queries() as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements), response.get_json()
+
+
+def test_project_comments_constant_queries():
+    client = app.test_client()
+    with app.app_context():
+        add_comments(1, 3)
+        few, comments = queries_for(client, '/projects/1/comments')
+        assert len(comments) == 3
+        assert all(comment['author_name'] != 'Unknown User' for comment in comments)
+
+        add_comments(1, 60)
+        many, comments = queries_for(client, '/projects/1/comments')
+        assert len(comments) == 63
+
+    assert few == many, f"{few} queries for 3 comments but {many} for 63"
+
+
+def test_unresolved_comments_constant_queries():
+    client = app.test_client()
+    with app.app_context():
+        # Projects 2 and 3 are managed by user 3 in the sample data
+        headers = {'Authorization': f"Bearer {create_access_token(identity='3')}"}
+        add_comments(2, 2)
+        few, comments = queries_for(client, '/projects/comments/unresolved', headers)
+        assert comments and all(comment['project_name'] for comment in comments)
+
+        add_comments(3, 40)
+        many, comments = queries_for(client, '/projects/comments/unresolved', headers)
+        assert {comment['project_id'] for comment in comments} == {2, 3}
+
+    assert few == many, f"{few} queries before adding comments but {many} after"
+
+
+if __name__ == "__main__":
+    test_project_comments_constant_queries()
+    test_unresolved_comments_constant_queries()
+    print("✅ Comment endpoints issue a constant number of queries")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Incremental rebuild test for the delay-model embedding store
+Each distinct photo goes through the stage model once; later opens only embed new or edited photos
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from embedding_store import open_embedding_store
+
+
+class FakeEmbedder:
+    """Stands in for the stage model: a photo's embedding is derived from its bytes."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def __call__(self, paths, batch_size):
+        self.embedded.extend(os.path.basename(path) for path in paths)
+        return np.stack([np.full(8, len(open(path, 'rb').read()), dtype=np.float32) for path in paths])
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_store_embeds_each_photo_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        images, store_dir, model = os.path.join(tmp, 'images'), os.path.join(tmp, 'store'), os.path.join(tmp, 'm.h5')
+        os.makedirs(images)
+        write(model, b'weights')
+        write(os.path.join(images, 'a.jpg'), b'a' * 10)
+        write(os.path.join(images, 'b.jpg'), b'b' * 20)
+        write(os.path.join(images, 'copy_of_a.jpg'), b'a' * 10)
+        names = ['a.jpg', 'b.jpg', 'a.jpg', 'copy_of_a.jpg']
+
+        embed = FakeEmbedder()
+        store = open_embedding_store(images, names, store_dir, model, embed=embed)
+        # Identical bytes under two names share a row
+        assert sorted(embed.embedded) == ['a.jpg', 'b.jpg'] and len(store) == 2
+        assert store.lookup(names)[:, 0].tolist() == [10, 20, 10, 10]
+        assert store.lookup(names).dtype == np.float32
+
+        embed = FakeEmbedder()
+        open_embedding_store(images, names, store_dir, model, embed=embed)
+        assert embed.embedded == []
+
+        # Only the edited photo and the new one go through the model again
+        write(os.path.join(images, 'b.jpg'), b'b' * 30)
+        write(os.path.join(images, 'c.jpg'), b'c' * 40)
+        embed = FakeEmbedder()
+        store = open_embedding_store(images, names + ['c.jpg'], store_dir, model, embed=embed)
+        assert sorted(embed.embedded) == ['b.jpg', 'c.jpg']
+        assert store.lookup(['a.jpg', 'b.jpg', 'c.jpg'])[:, 0].tolist() == [10, 30, 40]
+
+        # A retrained stage model invalidates every embedding
+        write(model, b'new weights')
+        embed = FakeEmbedder()
+        open_embedding_store(images, names, store_dir, model, embed=embed)
+        assert sorted(embed.embedded) == ['a.jpg', 'b.jpg']
+
+
+if __name__ == "__main__":
+    test_store_embeds_each_photo_once()
+    print("✅ Embedding store only embeds new or changed photos")
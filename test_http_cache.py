@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Conditional GET test for the read endpoints
+Unchanged data must be answered with 304 and no body; writes must change the ETag
+"""
+
+import os
+import sys
+
+# Run against a throwaway in-memory database
+os.environ['DATABASE_URI'] = 'sqlite://'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from flask_jwt_extended import create_access_token
+from app_updated import app, db, Project, response_cache
+
+
+def auth(user_id):
+    with app.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity=str(user_id))}"}
+
+
+def revalidate(client, url, headers=None):
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200 and first.headers.get('ETag'), first.get_data(as_text=True)
+    second = client.get(url, headers={**(headers or {}), 'If-None-Match': first.headers['ETag']})
+    return first, second
+
+
+def test_unchanged_lists_return_304():
+    client = app.test_client()
+    for url, headers in [
+        ('/projects', None), ('/projects/1', None), ('/projects/1/comments', None),
+        ('/auth/users', auth(1)), ('/projects/official', auth(2)),
+    ]:
+        first, second = revalidate(client, url, headers)
+        assert second.status_code == 304, url
+        assert second.get_data() == b''
+        assert second.headers['ETag'] == first.headers['ETag']
+
+
+def test_writes_change_etag():
+    client = app.test_client()
+    first = client.get('/projects/1')
+
+    # Official 2 manages project 1 in the sample data
+    response = client.put('/projects/1/update', json={'progress': 80}, headers=auth(2))
+    assert response.status_code == 200
+    second = client.get('/projects/1', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200 and second.get_json()['progress'] == 80
+
+    comments = client.get('/projects/3/comments')
+    client.post('/projects/3/comments', json={'content': 'Looks good'}, headers=auth(1))
+    after = client.get('/projects/3/comments', headers={'If-None-Match': comments.headers['ETag']})
+    assert after.status_code == 200 and after.get_json()[-1]['content'] == 'Looks good'
+
+
+def test_bulk_updates_change_etag():
+    client = app.test_client()
+    first = client.get('/projects?fields=id,progress')
+    with app.app_context():
+        db.session.execute(db.update(Project), [{'id': 2, 'progress': 42}])
+        db.session.commit()
+    second = client.get('/projects?fields=id,progress', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert {'id': 2, 'progress': 42} in second.get_json()
+
+
+def test_etag_is_per_user():
+    client = app.test_client()
+    first = client.get('/projects/official', headers=auth(2))
+    other = client.get('/projects/official', headers={**auth(3), 'If-None-Match': first.headers['ETag']})
+    assert other.status_code == 200
+    assert other.headers['ETag'] != first.headers['ETag']
+
+
+def test_responses_are_cached_between_writes():
+    client = app.test_client()
+    response_cache.clear()
+    client.get('/projects/public')
+    hits = response_cache.stats()['hits']
+    client.get('/projects/public')
+    assert response_cache.stats()['hits'] == hits + 1
+
+
+if __name__ == "__main__":
+    test_unchanged_lists_return_304()
+    test_writes_change_etag()
+    test_bulk_updates_change_etag()
+    test_etag_is_per_user()
+    test_responses_are_cached_between_writes()
+    print("✅ Read endpoints support conditional GET")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Coalesced /predict batching test
+A request that fails inside a coalesced batch only fails itself, not the requests batched with it,
+and requests for different delay models are each served by their own model
+"""
+
+import os
+import sys
+import threading
+
+# Run against a throwaway in-memory database
+os.environ['DATABASE_URI'] = 'sqlite://'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import app_updated
+from inference_queue import BatchingQueue
+
+
+def fake_predict_batch(items):
+    # Stands in for the model pipeline: any corrupt item fails the whole model call
+    if any(item == 'corrupt' for item in items):
+        raise ValueError('cannot identify image file')
+    return [f"prediction for {item}" for item in items]
+
+
+def test_failing_item_does_not_fail_its_batch():
+    original = app_updated.predict_batch
+    app_updated.predict_batch = fake_predict_batch
+    try:
+        results = app_updated.run_prediction_batch(['a', 'corrupt', 'b'])
+    finally:
+        app_updated.predict_batch = original
+    assert results[0] == 'prediction for a' and results[2] == 'prediction for b'
+    assert isinstance(results[1], ValueError)
+
+
+def test_queue_delivers_per_item_errors():
+    original = app_updated.predict_batch
+    app_updated.predict_batch = fake_predict_batch
+    queue = BatchingQueue(app_updated.run_prediction_batch, max_batch_size=3, max_wait_ms=200, name='test')
+    outcomes = {}
+
+    def call(item):
+        try:
+            outcomes[item] = queue(item, timeout=10)
+        except ValueError as e:
+            outcomes[item] = e
+
+    try:
+        threads = [threading.Thread(target=call, args=(item,)) for item in ('a', 'corrupt', 'b')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        queue.stop()
+        app_updated.predict_batch = original
+    assert queue.metrics()['batches'] == 1
+    assert outcomes['a'] == 'prediction for a' and outcomes['b'] == 'prediction for b'
+    assert isinstance(outcomes['corrupt'], ValueError)
+
+
+def test_batch_is_split_by_delay_model():
+    calls = []
+
+    def fake(items, delay_model):
+        calls.append((delay_model, [item[0] for item in items]))
+        return [f"{delay_model}:{item[0]}" for item in items]
+
+    original = app_updated._predict_batch
+    app_updated._predict_batch = fake
+    try:
+        items = [(name, None, 10, 20, None, delay_model)
+                 for name, delay_model in (('a', 'hybrid'), ('b', 'slim'), ('c', 'hybrid'))]
+        results = app_updated.predict_batch(items)
+    finally:
+        app_updated._predict_batch = original
+    assert results == ['hybrid:a', 'slim:b', 'hybrid:c']
+    assert sorted(calls) == [('hybrid', ['a', 'c']), ('slim', ['b'])]
+
+
+def test_unknown_delay_model_is_rejected():
+    client = app_updated.app.test_client()
+    response = client.post('/predict', data={'delay_model': 'huge'})
+    assert response.status_code == 400
+    assert 'hybrid' in response.get_json()['error']
+
+
+if __name__ == "__main__":
+    test_failing_item_does_not_fail_its_batch()
+    test_queue_delivers_per_item_errors()
+    test_batch_is_split_by_delay_model()
+    test_unknown_delay_model_is_rejected()
+    print("✅ Failures stay with the request that caused them")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Model process test
+A registry switched to a model server loads nothing itself: model calls, registry.run functions and
+load failures all go through the socket to the process that holds the models
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from model_registry import ModelRegistry
+from model_server import ModelClient, ModelServer, RemoteModel, listen
+
+
+class Doubler:
+    def predict_on_batch(self, inputs):
+        return [x * 2 for x in inputs]
+
+    def __call__(self, inputs):
+        # Stands in for YOLO: a result the caller only needs part of
+        return [{'box': (x, x + 1), 'raw': object()} for x in inputs]
+
+
+def boxes(model, inputs, offset=0):
+    return [r['box'][0] + offset for r in model(inputs)]
+
+
+def failing_loader():
+    raise OSError('weights missing')
+
+
+def serve():
+    # The model process's registry
+    models = ModelRegistry()
+    models.register('doubler', Doubler)
+    models.register('broken', failing_loader)
+    sock = listen(os.path.join(tempfile.mkdtemp(), 'models.sock'))
+    threading.Thread(target=ModelServer(models, sock).serve_forever, daemon=True).start()
+    # A worker's registry, registered the same way but served by the model process
+    worker = ModelRegistry()
+    worker.register('doubler', lambda: 1 / 0)
+    worker.register('broken', lambda: 1 / 0)
+    worker.use_model_server(ModelClient(sock.getsockname()))
+    return models, worker
+
+
+def test_calls_run_in_the_model_process():
+    models, worker = serve()
+    model = worker.get('doubler')
+    assert isinstance(model, RemoteModel)
+    assert model.predict_on_batch([1, 2]) == [2, 4]
+    assert worker.run('doubler', boxes, [3, 4], offset=10) == [13, 14]
+    assert worker.is_ready('doubler') and models.is_ready('doubler')
+
+
+def test_load_failures_come_back():
+    _, worker = serve()
+    try:
+        worker.get('broken')
+    except RuntimeError as e:
+        assert 'weights missing' in str(e)
+    else:
+        raise AssertionError('expected the model process to report the failed load')
+    assert worker.status()['broken']['state'] == ModelRegistry.FAILED
+
+
+def test_threads_share_the_model_process():
+    _, worker = serve()
+    results = {}
+
+    def call(i):
+        results[i] = worker.get('doubler').predict_on_batch([i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {i: [i * 2] for i in range(8)}
+
+
+if __name__ == "__main__":
+    test_calls_run_in_the_model_process()
+    test_load_failures_come_back()
+    test_threads_share_the_model_process()
+    print("✅ Models are served from one process")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Re-prediction scheduler test
+Only projects whose inputs, photo or model version changed are re-predicted, and each run is recorded
+"""
+
+import os
+import sys
+import tempfile
+
+# Run against a throwaway in-memory database
+os.environ['DATABASE_URI'] = 'sqlite://'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from flask_jwt_extended import create_access_token
+import app_updated
+from app_updated import app, db, Project, prediction_scheduler, registry
+from prediction_cache import image_key
+from tabular_delay import load_tabular_model, read_training_csv, train
+
+# Without TensorFlow here the scheduler falls back to the tabular predictor; train it into a temp file
+MODEL_PATH = os.path.join(tempfile.mkdtemp(), 'tabular_delay_model.joblib')
+train(read_training_csv()).save(MODEL_PATH)
+registry.register(
+    'tabular_delay', lambda: load_tabular_model(MODEL_PATH), imports=('sklearn',), files=(MODEL_PATH,)
+)
+
+
+def auth(user_id):
+    with app.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity=str(user_id))}"}
+
+
+def backlog():
+    with app.app_context():
+        return prediction_scheduler.backlog()
+
+
+def run(trigger='manual'):
+    with app.app_context():
+        return prediction_scheduler.run(trigger)
+
+
+def test_only_changed_projects_are_repredicted():
+    run()
+    assert backlog()['dirty'] == 0
+    assert run()['predicted'] == 0
+
+    client = app.test_client()
+    client.put('/projects/1/update', json={'name': 'Renamed only'}, headers=auth(1))
+    assert backlog()['dirty'] == 0
+
+    client.put('/projects/1/update', json={'progress': 55}, headers=auth(1))
+    assert backlog()['inputs_changed'] == 1
+    record = run()
+    assert record['predicted'] == 1 and record['batches'] == 1
+    assert record['backlog']['inputs_changed'] == 1
+    assert backlog()['dirty'] == 0
+
+    response = client.post('/projects', json={'name': 'Scheduler test', 'progress': 10}, headers=auth(1))
+    assert response.status_code == 201
+    assert backlog()['never_predicted'] == 1
+    run()
+
+    assert client.get('/predict/scheduler').status_code == 401
+    assert client.get('/predict/scheduler', headers=auth(4)).status_code == 403
+    status = client.get('/predict/scheduler', headers=auth(1)).get_json()
+    assert status['backlog']['dirty'] == 0
+    assert status['runs'][-1]['predicted'] == 1
+    assert status['totals']['predicted'] >= 2
+
+
+def test_model_version_change_marks_everything():
+    run()
+    original = app_updated.prediction_model_versions
+    # Every model retrained: predictions and the scheduler both see the new versions
+    app_updated.prediction_model_versions = lambda: {kind: f'retrained-{kind}' for kind in original()}
+    try:
+        with app.app_context():
+            total = Project.query.count()
+        assert backlog()['model_changed'] == total
+        assert run()['predicted'] == total
+        assert backlog()['dirty'] == 0
+    finally:
+        app_updated.prediction_model_versions = original
+    run()
+
+
+def test_prediction_from_another_predictor_stays_current():
+    run()
+    # Made with a different predictor than the scheduler's, whose models are just as current
+    response = app.test_client().post('/projects/2/predict?predictor=tabular', headers=auth(1))
+    assert response.status_code == 200, response.get_json()
+    assert backlog()['dirty'] == 0
+
+    # Predicted from its photo, while the scheduler itself falls back to the tabular model here
+    with app.app_context():
+        project = db.session.get(Project, 2)
+        project.prediction_model_version = app_updated.prediction_model_versions()['hybrid']
+        db.session.commit()
+    assert backlog()['dirty'] == 0
+
+
+def test_idle_and_sla_triggers():
+    client = app.test_client()
+    client.put('/projects/2/update', json={'progress': 40}, headers=auth(1))
+    idle_seconds, sla = prediction_scheduler.idle_seconds, prediction_scheduler.sla
+
+    # A request in flight: not idle, and the SLA has not been breached yet
+    prediction_scheduler._request_started()
+    try:
+        prediction_scheduler.idle_seconds = 0
+        with app.app_context():
+            assert prediction_scheduler.tick() is None
+            prediction_scheduler.sla = sla * 0
+            record = prediction_scheduler.tick()
+        assert record['trigger'] == 'sla' and record['predicted'] == 1
+    finally:
+        prediction_scheduler._request_finished()
+        prediction_scheduler.sla = sla
+
+    client.put('/projects/2/update', json={'progress': 45}, headers=auth(1))
+    try:
+        with app.app_context():
+            record = prediction_scheduler.tick()
+        assert record['trigger'] == 'idle' and record['predicted'] == 1
+    finally:
+        prediction_scheduler.idle_seconds = idle_seconds
+
+
+def test_replaced_photo_marks_project_dirty():
+    run()
+    with tempfile.TemporaryDirectory() as tmp:
+        photo = os.path.join(tmp, 'site.jpg')
+        with open(photo, 'wb') as f:
+            f.write(b'first photo')
+        with app.app_context():
+            db.session.execute(db.update(Project), [{'id': 3, 'prediction_image_hash': image_key(b'first photo')}])
+            db.session.commit()
+
+        image_path, images = prediction_scheduler.image_path, prediction_scheduler._images
+        prediction_scheduler.image_path = lambda project: photo if project.id == 3 else None
+        prediction_scheduler._images = {}
+        try:
+            with app.app_context():
+                assert prediction_scheduler.check_images() == 0
+                with open(photo, 'wb') as f:
+                    f.write(b'second, larger photo')
+                assert prediction_scheduler.check_images() == 1
+                assert prediction_scheduler.check_images() == 0
+            assert backlog()['inputs_changed'] == 1
+        finally:
+            prediction_scheduler.image_path, prediction_scheduler._images = image_path, images
+    run()
+
+
+if __name__ == "__main__":
+    test_only_changed_projects_are_repredicted()
+    test_model_version_change_marks_everything()
+    test_prediction_from_another_predictor_stays_current()
+    test_idle_and_sla_triggers()
+    test_replaced_photo_marks_project_dirty()
+    print("✅ Scheduler re-predicts only dirty projects")
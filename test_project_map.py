@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Project map test
+Point responses say when the viewport holds more projects than MAP_MAX_POINTS returns
+"""
+
+import os
+import sys
+
+# Run against a throwaway in-memory database
+os.environ['DATABASE_URI'] = 'sqlite://'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from app_updated import app, response_cache
+
+WORLD = '/projects/map?bbox=-180,-90,180,90&zoom=12'
+
+
+def map_points(max_points):
+    original = app.config['MAP_MAX_POINTS']
+    app.config['MAP_MAX_POINTS'] = max_points
+    # The cap is not part of the cache key
+    response_cache.clear()
+    try:
+        return app.test_client().get(WORLD).get_json()
+    finally:
+        app.config['MAP_MAX_POINTS'] = original
+        response_cache.clear()
+
+
+def test_points_over_the_cap_are_flagged():
+    body = map_points(2)
+    assert body['type'] == 'points'
+    assert len(body['data']) == 2
+    assert body['truncated'] is True and body['total'] == 3
+
+
+def test_points_under_the_cap_are_complete():
+    body = map_points(3)
+    assert len(body['data']) == 3
+    assert body['truncated'] is False and body['total'] == 3
+
+
+if __name__ == "__main__":
+    test_points_over_the_cap_are_flagged()
+    test_points_under_the_cap_are_complete()
+    print("✅ Map responses flag truncated point lists")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Consistency test for the /stats dashboard aggregates
+The incrementally maintained summary must always match a GROUP BY over the projects table
+"""
+
+import os
+import sys
+
+# Run against a throwaway in-memory database
+os.environ['DATABASE_URI'] = 'sqlite://'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from sqlalchemy import text
+from flask_jwt_extended import create_access_token
+from app_updated import app, db, Project, project_stats, save_project_predictions
+from project_stats import rebuild
+
+
+def auth(user_id):
+    with app.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity=str(user_id))}"}
+
+
+def assert_matches_full_recount():
+    with app.app_context():
+        incremental = project_stats.summary()
+        rebuild(db.session.connection())
+        recounted = project_stats.summary()
+        db.session.rollback()
+    assert incremental == recounted, f"{incremental} != {recounted}"
+    return incremental
+
+
+def test_stats_match_projects_after_writes():
+    client = app.test_client()
+    before = client.get('/stats').get_json()
+    assert before == assert_matches_full_recount()
+
+    response = client.post('/projects', json={'name': 'Stats test', 'status': 'planned', 'budget': 100.0},
+                           headers=auth(3))
+    assert response.status_code == 201
+    project_id = response.get_json()['id']
+    after_create = client.get('/stats').get_json()
+    assert after_create['projects'] == before['projects'] + 1
+    assert after_create['by_status']['planned']['projects'] >= 1
+    assert_matches_full_recount()
+
+    client.put(f'/projects/{project_id}/update', json={'status': 'delayed', 'progress': 30}, headers=auth(3))
+    assert_matches_full_recount()
+
+    with app.app_context():
+        save_project_predictions([{
+            'project_id': project_id, 'predicted_stage': 2, 'confidence': 0.9, 'delay_probability': 0.8,
+            'delay_model': 'hybrid',
+        }])
+    stats = assert_matches_full_recount()
+    assert stats['delay_risk']['at_risk'] == before['delay_risk']['at_risk'] + 1
+
+
+def test_other_bulk_statements_rebuild():
+    with app.app_context():
+        db.session.execute(db.update(Project).where(Project.manager_id == 3).values(progress=Project.progress + 1))
+        db.session.commit()
+    assert_matches_full_recount()
+
+
+def test_stats_for_one_manager():
+    client = app.test_client()
+    stats = client.get('/stats?manager_id=3').get_json()
+    with app.app_context():
+        count = db.session.execute(text("SELECT COUNT(*) FROM projects WHERE manager_id = 3")).scalar()
+    assert stats['projects'] == count
+    assert 'by_manager' not in stats
+    assert client.get('/stats?manager_id=abc').status_code == 400
+
+
+if __name__ == "__main__":
+    test_stats_match_projects_after_writes()
+    test_other_bulk_statements_rebuild()
+    test_stats_for_one_manager()
+    print("✅ Dashboard aggregates stay consistent with the projects table")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tabular delay predictor test
+?predictor=tabular answers without any photo model and leaves the recorded stage alone, and
+projects whose photo cannot be used get the tabular model instead of a hard-coded probability;
+the model is trained up front, never by the app
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+# Run against a throwaway in-memory database
+os.environ['DATABASE_URI'] = 'sqlite://'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from flask_jwt_extended import create_access_token
+from app_updated import (
+    app, db, Project, _predict_project_batch, project_delay_features, registry, tabular_delay_probabilities,
+)
+from tabular_delay import load_tabular_model, read_training_csv, train
+
+# Train a fresh tabular model from the labelled CSV into a temporary file
+MODEL_PATH = os.path.join(tempfile.mkdtemp(), 'tabular_delay_model.joblib')
+train(read_training_csv()).save(MODEL_PATH)
+registry.register(
+    'tabular_delay', lambda: load_tabular_model(MODEL_PATH), imports=('sklearn',), files=(MODEL_PATH,)
+)
+
+
+def auth(user_id):
+    with app.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity=str(user_id))}"}
+
+
+def test_tabular_predictor_per_request():
+    with app.app_context():
+        before = db.session.get(Project, 2)
+        stage, confidence = before.predicted_stage, before.confidence
+
+    client = app.test_client()
+    response = client.post('/projects/2/predict?predictor=tabular', headers=auth(1))
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert 0 <= body['delay_probability'] <= 1
+    assert body['delayed'] == int(body['delay_probability'] > 0.5)
+    # Only the delay is predicted; the stage on record is reported and kept
+    assert body['predicted_stage'] == stage
+    with app.app_context():
+        project = db.session.get(Project, 2)
+        assert project.last_prediction_date is not None
+        assert (project.predicted_stage, project.confidence) == (stage, confidence)
+        assert round(project.delay_probability, 2) == body['delay_probability']
+
+    response = client.post('/projects/2/predict?predictor=crystal-ball', headers=auth(1))
+    assert response.status_code == 400
+
+
+def test_vectorized_matches_single_project_calls():
+    now = datetime.utcnow()
+    with app.app_context():
+        projects = Project.query.order_by(Project.id).all()
+        features = project_delay_features(projects, now)
+        assert features.shape == (len(projects), 4)
+        batch = tabular_delay_probabilities(projects, now)
+        single = [tabular_delay_probabilities([project], now)[0] for project in projects]
+    assert batch == single
+
+
+def test_projects_without_photo_use_tabular_model():
+    now = datetime.utcnow()
+    with app.app_context():
+        projects = Project.query.order_by(Project.id).all()
+        # No readable image files: every project takes the fallback path
+        results = _predict_project_batch(projects, {}, None, now)
+        expected = registry.get('tabular_delay').predict(project_delay_features(projects, now))
+    assert [r['delay_probability'] for r in results] == [float(p) for p in expected]
+
+
+def test_app_never_trains_or_imports_pandas():
+    missing = os.path.join(tempfile.mkdtemp(), 'tabular_delay_model.joblib')
+    try:
+        load_tabular_model(missing)
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError('a missing model must not be trained on load')
+    assert not os.path.exists(missing)
+    # A fresh interpreter: this test process already imported pandas for training
+    check = "import sys, app_updated; sys.exit('pandas' in sys.modules)"
+    env = dict(os.environ, DATABASE_URI='sqlite://')
+    backend = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+    assert subprocess.run([sys.executable, '-c', check], cwd=backend, env=env, capture_output=True).returncode == 0
+
+
+if __name__ == "__main__":
+    test_tabular_predictor_per_request()
+    test_vectorized_matches_single_project_calls()
+    test_projects_without_photo_use_tabular_model()
+    test_app_never_trains_or_imports_pandas()
+    print("✅ Tabular delay predictor serves projects without photos")